@@ -59,10 +59,12 @@ def update_bundle(data_bundle_path, locale):
 @click.option('-fc', '--future-starting-cash', 'base__future_starting_cash', type=click.FLOAT)
 @click.option('-bm', '--benchmark', 'base__benchmark', type=click.STRING, default=None)
 @click.option('-sp', '--slippage', 'base__slippage', type=click.FLOAT)
+@click.option('-spm', '--slippage-model', 'base__slippage_model',
+              type=click.Choice(['price_ratio', 'sqrt_impact', 'spread_volatility']))
 @click.option('-cm', '--commission-multiplier', 'base__commission_multiplier', type=click.FLOAT)
 @click.option('-mm', '--margin-multiplier', 'base__margin_multiplier', type=click.FLOAT)
 @click.option('-st', '--strategy-type', 'base__strategy_type', type=click.Choice(['stock', 'future', 'stock_future']))
-@click.option('-fq', '--frequency', 'base__frequency', type=click.Choice(['1d', '1m']))
+@click.option('-fq', '--frequency', 'base__frequency', type=click.Choice(['1d', '1m', 'tick']))
 @click.option('-me', '--match-engine', 'base__matching_type', type=click.Choice(['current_bar', 'next_bar']))
 @click.option('-rt', '--run-type', 'base__run_type', type=click.Choice(['b', 'p']), default="b")
 @click.option('--resume', 'base__resume_mode', is_flag=True)
@@ -82,6 +84,8 @@ def update_bundle(data_bundle_path, locale):
 @click.option('--report', 'mod__analyser__report_save_path', type=click.Path(writable=True), help="save report")
 @click.option('-o', '--output-file', 'mod__analyser__output_file', type=click.Path(writable=True),
               help="output result pickle file")
+@click.option('--stream-path', 'mod__analyser__stream_path', type=click.Path(writable=True),
+              help="write result in chunks to the rqalpha_result subdirectory of this directory")
 @click.option('--progress/--no-progress', 'mod__progress__enabled', default=None, help="show progress bar")
 @click.option('--short-stock', 'mod__risk_manager__short_stock', is_flag=True, help="enable stock shorting")
 # -- DEPRECATED ARGS && WILL BE REMOVED AFTER VERSION 1.0.0
@@ -122,10 +126,10 @@ def plot(result_dict_file, is_show, plot_save_file):
     """
     Draw result DataFrame
     """
-    import pandas as pd
     from rqalpha.plot import plot_result
+    from rqalpha.mod.analyser.stream import load_result
 
-    result_dict = pd.read_pickle(result_dict_file)
+    result_dict = load_result(result_dict_file)
     if is_show:
         plot_result(result_dict)
     if plot_save_file:
@@ -139,8 +143,8 @@ def report(result_pickle_file_path, target_report_csv_path):
     """
     Generate report from backtest output file
     """
-    import pandas as pd
-    result_dict = pd.read_pickle(result_pickle_file_path)
+    from rqalpha.mod.analyser.stream import load_result
+    result_dict = load_result(result_pickle_file_path)
 
     from rqalpha.utils.report import generate_report
     generate_report(result_dict, target_report_csv_path)
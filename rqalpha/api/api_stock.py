@@ -57,6 +57,7 @@ def export_as_api(func):
 
 @export_as_api
 @ExecutionContext.enforce_phase(EXECUTION_PHASE.ON_BAR,
+                                EXECUTION_PHASE.ON_TICK,
                                 EXECUTION_PHASE.SCHEDULED)
 @apply_rules(verify_that('id_or_ins').is_valid_stock(),
              verify_that('amount').is_number(),
@@ -106,6 +107,14 @@ def order_shares(id_or_ins, amount, style=MarketOrder()):
             raise RQInvalidArgument(_("Limit order price should be positive"))
 
     order_book_id = assure_stock_order_book_id(id_or_ins)  # 检查标的能否交易
+    r_order = _create_order(order_book_id, amount, style)
+    if not r_order._is_final():
+        ExecutionContext.broker.submit_order(r_order)
+
+    return r_order
+
+
+def _create_order(order_book_id, amount, style):  # 创建委托单, 无法下单时返回已被拒绝的委托单
     bar_dict = ExecutionContext.get_current_bar_dict()
     bar = bar_dict[order_book_id]
     price = bar.close
@@ -138,15 +147,14 @@ def order_shares(id_or_ins, amount, style=MarketOrder()):
         r_order._mark_rejected(_("Order Creation Failed: 0 order quantity"))
         return r_order
     if r_order.type == ORDER_TYPE.MARKET:
-        bar_dict = ExecutionContext.get_current_bar_dict()
-        r_order._frozen_price = bar_dict[order_book_id].close  # 市价单, _frozen_price设置为当日收盘价
-    ExecutionContext.broker.submit_order(r_order)
+        r_order._frozen_price = price  # 市价单, _frozen_price设置为当日收盘价
 
     return r_order
 
 
 @export_as_api
 @ExecutionContext.enforce_phase(EXECUTION_PHASE.ON_BAR,
+                                EXECUTION_PHASE.ON_TICK,
                                 EXECUTION_PHASE.SCHEDULED)
 @apply_rules(verify_that('id_or_ins').is_valid_stock(),
              verify_that('amount').is_number(),
@@ -196,6 +204,7 @@ def order_lots(id_or_ins, amount, style=MarketOrder()):
 
 @export_as_api
 @ExecutionContext.enforce_phase(EXECUTION_PHASE.ON_BAR,
+                                EXECUTION_PHASE.ON_TICK,
                                 EXECUTION_PHASE.SCHEDULED)
 @apply_rules(verify_that('id_or_ins').is_valid_stock(),
              verify_that('cash_amount').is_number(),
@@ -275,6 +284,7 @@ def order_value(id_or_ins, cash_amount, style=MarketOrder()):
 
 @export_as_api
 @ExecutionContext.enforce_phase(EXECUTION_PHASE.ON_BAR,
+                                EXECUTION_PHASE.ON_TICK,
                                 EXECUTION_PHASE.SCHEDULED)
 @apply_rules(verify_that('id_or_ins').is_valid_stock(),
              verify_that('percent').is_number().is_greater_than(-1).is_less_than(1),
@@ -326,6 +336,7 @@ def order_percent(id_or_ins, percent, style=MarketOrder()):
 
 @export_as_api
 @ExecutionContext.enforce_phase(EXECUTION_PHASE.ON_BAR,
+                                EXECUTION_PHASE.ON_TICK,
                                 EXECUTION_PHASE.SCHEDULED)
 @apply_rules(verify_that('id_or_ins').is_valid_stock(),
              verify_that('cash_amount').is_number(),
@@ -380,6 +391,7 @@ def order_target_value(id_or_ins, cash_amount, style=MarketOrder()):
 
 @export_as_api
 @ExecutionContext.enforce_phase(EXECUTION_PHASE.ON_BAR,
+                                EXECUTION_PHASE.ON_TICK,
                                 EXECUTION_PHASE.SCHEDULED)
 @apply_rules(verify_that('id_or_ins').is_valid_stock(),
              verify_that('percent').is_number().is_greater_than(0).is_less_than(1),
@@ -451,6 +463,94 @@ def order_target_percent(id_or_ins, percent, style=MarketOrder()):
     return order_value(order_book_id, portfolio.portfolio_value * percent - current_value, style)
 
 
+@export_as_api
+@ExecutionContext.enforce_phase(EXECUTION_PHASE.ON_BAR,
+                                EXECUTION_PHASE.ON_TICK,
+                                EXECUTION_PHASE.SCHEDULED)
+@apply_rules(verify_that('target_portfolio').is_instance_of(dict))
+def order_target_portfolio(target_portfolio):
+    """
+    批量调整股票仓位至目标组合，所有订单均为市价单。适用于一次需要调整大量股票仓位的调仓场景。
+
+    *   target_portfolio 中每个证券的仓位会被调整到占投资组合总价值的目标百分比。
+    *   当前持有、但不在 target_portfolio 中的证券会被全部卖出。
+
+    所有订单会在一次校验后批量提交，先提交卖单再提交买单，买单可用资金的计算与逐个调用 :func:`order_target_percent` 一致。
+    在 `current_bar` 撮合方式下，卖单与买单各只触发一次撮合。
+
+    :param dict target_portfolio: 目标组合，key 为 :class:`~Instrument` object 或 `str`，value 为目标百分比，
+        每个值应在 [0, 1] 之间，且总和不能超过 1。
+
+    :return: list[:class:`~Order`]
+
+    :example:
+
+    .. code-block:: python
+
+        #将平安银行和浦发银行的仓位分别调整至投资组合价值的30%和20%，并卖出其余持仓：
+        order_target_portfolio({
+            '000001.XSHE': 0.3,
+            '600000.XSHG': 0.2,
+        })
+    """
+    target = {}
+    for id_or_ins, percent in six.iteritems(target_portfolio):
+        order_book_id = assure_stock_order_book_id(id_or_ins)
+        if percent < 0 or percent > 1:
+            raise RQInvalidArgument(_('percent should between 0 and 1'))
+        target[order_book_id] = percent
+    if sum(six.itervalues(target)) > 1:
+        raise RQInvalidArgument(_('total percent of target portfolio should not be greater than 1'))
+
+    portfolio = ExecutionContext.accounts[ACCOUNT_TYPE.STOCK].portfolio
+    positions = portfolio.positions
+    for order_book_id in list(positions.keys()):
+        if order_book_id not in target and positions[order_book_id]._quantity > 0:
+            target[order_book_id] = 0  # 不在目标组合中的持仓全部卖出
+
+    bar_dict = ExecutionContext.get_current_bar_dict()
+    portfolio_value = portfolio.portfolio_value  # 只读取一次组合总价值
+
+    rejected_orders = []
+    sell_orders = []
+    buy_values = []
+    for order_book_id in sorted(target):
+        bar = bar_dict[order_book_id]
+        price = 0 if bar.isnan else bar.close
+        if price == 0:
+            rejected_orders.append(_create_order(order_book_id, 0, MarketOrder()))
+            continue
+
+        position = positions[order_book_id]
+        delta_value = portfolio_value * target[order_book_id] - position._quantity * price
+        if delta_value < 0:
+            round_lot = int(ExecutionContext.get_instrument(order_book_id).round_lot)
+            amount = int(Decimal(delta_value) / Decimal(price) / Decimal(round_lot)) * round_lot
+            amount = downsize_amount(amount, position)
+            if amount != 0:
+                sell_orders.append(_create_order(order_book_id, amount, MarketOrder()))
+        elif delta_value > 0:
+            buy_values.append((order_book_id, price, delta_value))
+
+    ExecutionContext.broker.submit_orders([o for o in sell_orders if not o._is_final()])
+
+    # 卖单处理完毕后再计算买单, 可用资金逐单扣减, 与逐个调用 order_value 时的资金上限一致
+    available_cash = portfolio.cash
+    buy_orders = []
+    for order_book_id, price, cash_amount in buy_values:
+        round_lot = int(ExecutionContext.get_instrument(order_book_id).round_lot)
+        cash_amount = min(cash_amount, available_cash)
+        amount = int(Decimal(cash_amount) / Decimal(price) / Decimal(round_lot)) * round_lot
+        if amount == 0:
+            continue
+        available_cash -= amount * price
+        buy_orders.append(_create_order(order_book_id, amount, MarketOrder()))
+
+    ExecutionContext.broker.submit_orders([o for o in buy_orders if not o._is_final()])
+
+    return rejected_orders + sell_orders + buy_orders
+
+
 def assure_stock_order_book_id(id_or_symbols):
     if isinstance(id_or_symbols, Instrument):
         order_book_id = id_or_symbols.order_book_id
@@ -107,6 +107,11 @@ PERSIST_MODE = CustomEnum("PERSIST_MODE", [
     "REAL_TIME"
 ])
 
+PERSIST_CODEC = CustomEnum("PERSIST_CODEC", [
+    "JSON",
+    "BINARY"
+])
+
 MARGIN_TYPE = CustomEnum("MARGIN_TYPE", [
     "BY_MONEY",
     "BY_VOLUME",
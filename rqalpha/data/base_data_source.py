@@ -126,6 +126,16 @@ class BaseDataSource(AbstractDataSource):
             return np.nan
         return bar['settlement']
 
+    def get_settle_prices(self, instruments, date):
+        if (six.get_unbound_function(type(self).get_settle_price) is not
+                six.get_unbound_function(BaseDataSource.get_settle_price)):
+            # 子类改写了 get_settle_price 时沿用逐个合约的查询, 以免绕过子类的实现
+            return super(BaseDataSource, self).get_settle_prices(instruments, date)
+        # 期货日线存放在同一张表中, 截面一次查出所有合约的结算价
+        store = self._day_bars[self.INSTRUMENT_TYPE_MAP['Future']]
+        return store.get_field_at([instrument.order_book_id for instrument in instruments],
+                                  convert_date_to_int(date) // 1000000, 'settlement')
+
     @staticmethod
     def _are_fields_valid(fields, valid_fields):
         if fields is None:
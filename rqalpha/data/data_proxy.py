@@ -112,6 +112,21 @@ class DataProxy(InstrumentMixin, TradingDatesMixin):
             return np.nan
         return self._data_source.get_settle_price(instrument, date)
 
+    def get_settle_prices(self, order_book_ids, date):
+        """
+        截面获取多个合约在 date 的结算价
+
+        :param list order_book_ids: 合约代码列表
+        :param datetime.date date: 结算日期
+        :return: `numpy.ndarray`, 与 order_book_ids 一一对应, 非期货或没有数据时为 nan
+        """
+        instruments = [self.instruments(order_book_id) for order_book_id in order_book_ids]
+        futures = [i for i, instrument in enumerate(instruments) if instrument.type == 'Future']
+        prices = np.full(len(instruments), np.nan)
+        if futures:
+            prices[futures] = self._data_source.get_settle_prices([instruments[i] for i in futures], date)
+        return prices
+
     def get_bar(self, order_book_id, dt, frequency='1d'):
         instrument = self.instruments(order_book_id)
         bar = self._data_source.get_bar(instrument, dt, frequency)
@@ -61,3 +61,49 @@ class DayBarStore(object):
     def get_date_range(self, order_book_id):
         s, e = self._index[order_book_id]
         return self._table.cols['date'][s], self._table.cols['date'][e - 1]
+
+    def _cross_section_keys(self):
+        # 全表按 (标的序号, 日期) 排序的查找键, 只在第一次截面查询时生成
+        try:
+            return self._ranks, self._keys
+        except AttributeError:
+            pass
+        dates = self._table.cols['date'][:].astype(np.int64)
+        rows = np.empty(len(dates), dtype=np.int64)
+        ranks = {}
+        for rank, (order_book_id, (s, e)) in enumerate(sorted(self._index.items(), key=lambda item: item[1][0])):
+            ranks[order_book_id] = rank
+            rows[s:e] = rank
+        self._ranks = ranks
+        self._keys = rows * 100000000 + dates
+        self._field_cache = {}
+        return self._ranks, self._keys
+
+    def get_field_at(self, order_book_ids, date, field):
+        """
+        截面读取多个标的在某一天的同一字段, 一次 searchsorted 完成全部查找
+
+        :param list order_book_ids: 合约代码列表
+        :param int date: YYYYMMDD 形式的日期
+        :param str field: 字段名
+        :return: `numpy.ndarray`, 与 order_book_ids 一一对应, 没有数据时为 nan
+        """
+        ranks, keys = self._cross_section_keys()
+        result = np.full(len(order_book_ids), np.nan)
+        known = np.array([order_book_id in ranks for order_book_id in order_book_ids], dtype=bool)
+        if not known.any():
+            return result
+        targets = np.array([ranks[order_book_id] for order_book_id, k in zip(order_book_ids, known) if k],
+                           dtype=np.int64) * 100000000 + date
+        pos = keys.searchsorted(targets)
+        found = pos < len(keys)
+        found[found] = keys[pos[found]] == targets[found]
+
+        try:
+            column = self._field_cache[field]
+        except KeyError:
+            column = self._field_cache[field] = self._table.cols[field][:]
+        values = np.full(len(targets), np.nan)
+        values[found] = self._converter.convert(field, column[pos[found]])
+        result[known] = values
+        return result
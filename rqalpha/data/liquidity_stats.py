@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Ricequant, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+
+import numpy as np
+
+from ..utils.datetime_func import convert_date_to_int
+
+# 读取日线时使用的截止日期, 一次性取出标的的全部日线
+_MAX_DT = datetime.datetime(2050, 1, 1)
+_MAX_BAR_COUNT = 100000
+
+
+# 标的流动性统计: 滚动平均日成交量(ADV)和日收益率波动率
+class LiquidityStats(object):
+    def __init__(self, data_proxy, window=20):
+        self._data_proxy = data_proxy
+        self._window = window
+        self._stats = {}  # order_book_id -> (日期, ADV, 波动率), 每个标的只从日线计算一次
+        self._last = {}  # order_book_id -> (日期, ADV, 波动率), 同一天内的重复查询直接返回
+
+    def _compute(self, order_book_id):
+        bars = self._data_proxy.history_bars(order_book_id, _MAX_BAR_COUNT, '1d', ['datetime', 'close', 'volume'],
+                                             _MAX_DT, skip_suspended=True)
+        if bars is None or len(bars) == 0:
+            empty = np.empty(0)
+            return empty.astype(np.uint64), np.full(1, np.nan), np.full(1, np.nan)
+
+        w = self._window
+        n = len(bars)
+        # 第 i 个位置的统计量只使用第 i 个交易日之前的 w 个交易日数据, 避免使用未来数据
+        idx = np.arange(n + 1)
+        left = np.maximum(idx - w, 0)
+
+        volume_sum = np.concatenate([[0.], np.cumsum(bars['volume'].astype(np.float64))])
+        count = idx - left
+        with np.errstate(invalid='ignore', divide='ignore'):
+            adv = (volume_sum[idx] - volume_sum[left]) / count
+
+        close = bars['close'].astype(np.float64)
+        returns = np.zeros(n)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            returns[1:] = np.log(close[1:] / close[:-1])
+        returns[~np.isfinite(returns)] = 0
+        ret_sum = np.concatenate([[0.], np.cumsum(returns)])
+        ret_sq_sum = np.concatenate([[0.], np.cumsum(returns ** 2)])
+        # 第 0 天没有收益率, 从第 1 天开始计算
+        ret_left = np.maximum(left, 1)
+        ret_count = np.maximum(idx - ret_left, 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = (ret_sum[idx] - ret_sum[ret_left]) / ret_count
+            variance = (ret_sq_sum[idx] - ret_sq_sum[ret_left]) / ret_count - mean ** 2
+        volatility = np.sqrt(np.maximum(variance, 0))
+        volatility[ret_count < 2] = np.nan
+
+        return bars['datetime'], adv, volatility
+
+    def get(self, order_book_id, dt):
+        """
+        获取标的在 dt 所在交易日之前的流动性统计
+
+        :param str order_book_id: 合约代码
+        :param datetime.datetime dt: 交易日
+        :return: (ADV, 日波动率), 数据不足时为 nan
+        """
+        date_int = convert_date_to_int(dt)
+        try:
+            last_date, adv, volatility = self._last[order_book_id]
+            if last_date == date_int:
+                return adv, volatility
+        except KeyError:
+            pass
+
+        try:
+            dates, advs, volatilities = self._stats[order_book_id]
+        except KeyError:
+            dates, advs, volatilities = self._stats[order_book_id] = self._compute(order_book_id)
+
+        pos = dates.searchsorted(date_int)
+        adv, volatility = advs[pos], volatilities[pos]
+        self._last[order_book_id] = (date_int, adv, volatility)
+        return adv, volatility
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Ricequant, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import datetime
+
+from ..model.snapshot import SnapshotObject
+from ..utils.datetime_func import convert_dt_to_int
+from .base_data_source import BaseDataSource
+from .tick_store import TickStore
+
+
+BAR_FIELDS_FROM_TICK = ['datetime', 'open', 'high', 'low', 'volume', 'total_turnover', 'open_interest',
+                        'prev_close', 'prev_settlement', 'limit_up', 'limit_down']
+
+
+# 在基础数据源之上增加 tick 数据, 用于 tick 级别回测
+class TickDataSource(BaseDataSource):
+    def __init__(self, path, tick_path=None):
+        BaseDataSource.__init__(self, path)
+        self._ticks = TickStore(tick_path if tick_path else os.path.join(path, 'ticks'))
+        self._calendar = None
+
+    def get_ticks(self, instrument, trading_date):
+        """
+        获取合约某个交易日的全部 tick
+
+        :param instrument: 合约对象
+        :param datetime.date trading_date: 交易日
+        :return: `numpy.ndarray`
+        """
+        return self._ticks.get_ticks(instrument.order_book_id, trading_date)
+
+    def _trading_date_of(self, dt):
+        # 夜盘 tick 归属于下一个交易日
+        if self._calendar is None:
+            self._calendar = self.get_trading_calendar()
+        if dt.hour >= 18:
+            day = dt.date() + datetime.timedelta(days=1)
+        else:
+            day = dt.date()
+        pos = self._calendar.searchsorted(datetime.datetime.combine(day, datetime.time()))
+        if pos >= len(self._calendar):
+            return day
+        return self._calendar[pos].date()
+
+    def _tick_at(self, instrument, dt):
+        ticks = self._ticks.get_ticks(instrument.order_book_id, self._trading_date_of(dt))
+        pos = ticks['datetime'].searchsorted(convert_dt_to_int(dt), side='right') - 1
+        if pos < 0:
+            return None
+        return ticks[pos]
+
+    def get_bar(self, instrument, dt, frequency):
+        if frequency != 'tick':
+            return BaseDataSource.get_bar(self, instrument, dt, frequency)
+
+        # 以截止到 dt 的最新一笔 tick 作为当前 bar
+        tick = self._tick_at(instrument, dt)
+        if tick is None:
+            return None
+        bar = {k: tick[k] for k in BAR_FIELDS_FROM_TICK}
+        bar['close'] = tick['last']
+        return bar
+
+    def current_snapshot(self, instrument, frequency, dt):
+        if frequency != 'tick':
+            return BaseDataSource.current_snapshot(self, instrument, frequency, dt)
+
+        tick = self._tick_at(instrument, dt)
+        if tick is None:
+            return SnapshotObject(instrument, None, dt)
+        return SnapshotObject(instrument, {k: tick[k] for k in SnapshotObject.fields_for_(instrument)})
+
+    def available_data_range(self, frequency):
+        if frequency == 'tick':
+            return BaseDataSource.available_data_range(self, '1d')
+        return BaseDataSource.available_data_range(self, frequency)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Ricequant, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import numpy as np
+try:
+    # For Python 2 兼容
+    from functools import lru_cache
+except Exception as e:
+    from fastcache import lru_cache
+
+from ..utils.datetime_func import convert_date_to_int
+
+
+# tick 数据格式, datetime 为 YYYYMMDDHHMMSS 形式的整数, volume / total_turnover 为当日累计值, 买卖盘为一档行情
+TICK_DTYPE = np.dtype([
+    ('datetime', np.uint64),
+    ('open', np.float64),
+    ('high', np.float64),
+    ('low', np.float64),
+    ('last', np.float64),
+    ('volume', np.float64),
+    ('total_turnover', np.float64),
+    ('open_interest', np.float64),
+    ('prev_close', np.float64),
+    ('prev_settlement', np.float64),
+    ('limit_up', np.float64),
+    ('limit_down', np.float64),
+    ('bid', np.float64),
+    ('bid_volume', np.float64),
+    ('ask', np.float64),
+    ('ask_volume', np.float64),
+])
+
+EMPTY_TICKS = np.empty(shape=(0, ), dtype=TICK_DTYPE)
+
+
+# tick数据存储类, 每个标的每个交易日一个 .npy 文件: <path>/<order_book_id>/<YYYYMMDD>.npy
+class TickStore(object):
+    def __init__(self, path):
+        self._path = path
+
+    def _file_of(self, order_book_id, trading_date):
+        return os.path.join(self._path, order_book_id, '{}.npy'.format(convert_date_to_int(trading_date) // 1000000))
+
+    @lru_cache(256)
+    def get_ticks(self, order_book_id, trading_date):
+        """
+        获取标的某个交易日的全部 tick, 按时间升序排列
+
+        :param str order_book_id: 合约代码
+        :param datetime.date trading_date: 交易日
+        :return: `numpy.ndarray`, dtype 为 TICK_DTYPE; 没有数据时返回空数组
+        """
+        path = self._file_of(order_book_id, trading_date)
+        if not os.path.exists(path):
+            return EMPTY_TICKS
+        # 使用内存映射读取, 回放时只有被访问到的页才会真正从磁盘载入
+        return np.load(path, mmap_mode='r')
+
+    def save_ticks(self, order_book_id, trading_date, ticks):
+        """
+        保存标的某个交易日的 tick 数据, 用于录制行情
+
+        :param str order_book_id: 合约代码
+        :param datetime.date trading_date: 交易日
+        :param ticks: dtype 为 TICK_DTYPE 的 `numpy.ndarray`
+        """
+        path = self._file_of(order_book_id, trading_date)
+        directory = os.path.dirname(path)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        ticks = np.asarray(ticks, dtype=TICK_DTYPE)
+        np.save(path, ticks[np.argsort(ticks['datetime'], kind='mergesort')])
+        self.get_ticks.cache_clear()
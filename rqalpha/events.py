@@ -19,6 +19,8 @@ from collections import defaultdict
 
 
 class Event(object):
+    __slots__ = ["event_type", "calendar_dt", "trading_dt", "data"]
+
     def __init__(self, event_type, calendar_dt, trading_dt, data={}):
         self.event_type = event_type
         self.calendar_dt = calendar_dt
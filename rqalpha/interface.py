@@ -74,6 +74,43 @@ class AbstractEventSource(with_metaclass(abc.ABCMeta)):
         raise NotImplementedError
 
 
+class AbstractAsyncEventSource(with_metaclass(abc.ABCMeta)):
+    """
+    基于 asyncio 的事件源接口, 仅支持 Python 3.6 及以上版本。
+
+    事件源在 asyncio 事件循环中产生事件, 多个行情源与时钟可以共用一个事件循环, 等待事件时不需要轮询。
+    主循环通过 :func:`~rqalpha.utils.async_utils.iter_async_events` 驱动异步事件源:
+    只有在主循环等待下一个事件时事件循环才会运行。
+    """
+    @abc.abstractmethod
+    def async_events(self, start_date, end_date, frequency):
+        """
+        【Required】
+
+        参数与 :meth:`AbstractEventSource.events` 相同
+
+        :return: 异步迭代器(如 async generator), 依次产生 :class:`~Event`
+        """
+        raise NotImplementedError
+
+
+class AbstractAsyncQuoteProvider(with_metaclass(abc.ABCMeta)):
+    """
+    异步行情源接口, 仅支持 Python 3.6 及以上版本。异步事件源可以同时使用多个行情源。
+    """
+    @abc.abstractmethod
+    def fetch(self):
+        """
+        【Required】
+
+        获取最新的行情快照, 为 coroutine 函数(``async def``), 不应阻塞事件循环,
+        阻塞的网络请求可以通过 ``loop.run_in_executor`` 在线程池中进行。
+
+        :return: 行情快照, 格式由使用它的事件源约定
+        """
+        raise NotImplementedError
+
+
 class AbstractDataSource(object):
     """
     数据源接口。RQAlpha 中通过 :class:`DataProxy` 进一步进行了封装，向上层提供更易用的接口。
@@ -157,6 +194,21 @@ class AbstractDataSource(object):
         """
         raise NotImplementedError
 
+    def get_settle_prices(self, instruments, date):
+        """
+        批量获取多个期货品种在 date 的结算价, 默认逐个调用 get_settle_price
+
+        结算时只调用本方法. 子类如果同时提供了批量实现, 改写 get_settle_price 时需要一并改写本方法, 保证两者结果一致;
+        :class:`~BaseDataSource` 在 get_settle_price 被子类改写时会退回逐个调用.
+
+        :param list instruments: 合约对象列表
+
+        :param datetime.date date: 结算日期
+
+        :return: list, 与 instruments 一一对应, 没有数据时为 nan
+        """
+        return [self.get_settle_price(instrument, date) for instrument in instruments]
+
     def history_bars(self, instrument, bar_count, frequency, fields, dt, skip_suspended=True):
         """
         获取历史数据
@@ -280,6 +332,19 @@ class AbstractBroker(with_metaclass(abc.ABCMeta)):
         """
         raise NotImplementedError
 
+    def submit_orders(self, orders):
+        """
+        【Optional】
+
+        批量提交订单。默认实现为逐个调用 ``submit_order``，自带撮合引擎的 Broker 可以覆盖此接口，
+        在一次校验后统一提交，并只触发一次撮合，以降低调仓时大量下单的开销。
+
+        :param orders: 订单列表
+        :type orders: list[:class:`~Order`]
+        """
+        for order in orders:
+            self.submit_order(order)
+
     @abc.abstractmethod
     def cancel_order(self, order):
         """
@@ -365,6 +430,9 @@ class AbstractPersistProvider(with_metaclass(abc.ABCMeta)):
     持久化服务提供者接口。
 
     扩展模块可以通过调用 ``env.set_persist_provider`` 接口来替换默认的持久化方案。
+
+    持久化方案可以选择实现 ``begin_batch`` 和 ``commit_batch``, 一次保存中的全部 ``store`` 调用会在这两者之间进行,
+    以便作为一批原子地写入; 同时可以实现 ``abort_batch``, 在一批写入中途失败时调用, 丢弃该批的全部写入。
     """
     @abc.abstractmethod
     def store(self, key, value):
@@ -385,8 +453,23 @@ class AbstractPersistProvider(with_metaclass(abc.ABCMeta)):
         """
         raise NotImplementedError
 
+    def delete(self, key):
+        """
+        删除 key 对应的值, 没有对应的值时忽略。PersistHelper 用它清理增量保存中不再使用的部分,
+        未实现时这些部分会一直保留。
+
+        :param str key:
+        """
+        raise NotImplementedError
+
 
 class Persistable(with_metaclass(abc.ABCMeta)):
+    """
+    可持久化对象接口。
+
+    除 `get_state` 和 `set_state` 外, 对象可以选择实现 `is_dirty` / `mark_clean` 以跳过未变化对象的保存,
+    以及 `get_state_delta` / `set_state_parts` 以只保存变化的部分, 详见 :class:`~rqalpha.utils.persisit_helper.PersistHelper`。
+    """
     @abc.abstractmethod
     def get_state(self):
         """
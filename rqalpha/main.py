@@ -39,7 +39,7 @@ from .data.data_proxy import DataProxy
 from .environment import Environment
 from .events import EVENT
 from .execution_context import ExecutionContext
-from .interface import Persistable
+from .interface import Persistable, AbstractAsyncEventSource
 from .mod.mod_handler import ModHandler
 from .model.bar import BarMap
 from .model.account import MixedAccount
@@ -48,6 +48,9 @@ from .utils.exception import CustomException, is_user_exc, patch_user_exc
 from .utils.i18n import gettext as _
 from .utils.logger import user_log, user_system_log, system_log, user_print, user_detail_log
 from .utils.persisit_helper import CoreObjectsPersistProxy, PersistHelper
+from .utils.async_persist_provider import AsyncPersistProvider
+from .utils.async_utils import iter_async_events
+from .utils.state_codec import set_persist_codec
 from .utils.scheduler import Scheduler
 from .utils.config import set_locale
 
@@ -232,7 +235,12 @@ def run(config, source_code=None): # 此处的config是RqAttrDict类, 是dict转
                 setattr(ucontext, k, v)
 
         if config.base.persist:
+            set_persist_codec(config.base.persist_codec)
             persist_provider = env.persist_provider
+            if config.base.persist_async:
+                # 由后台线程写入, 在 mod_handler.tear_down 中等待写完
+                persist_provider = AsyncPersistProvider(persist_provider)
+                env.set_persist_provider(persist_provider)
             persist_helper = PersistHelper(persist_provider, env.event_bus, config.base.persist_mode)
             persist_helper.register('core', CoreObjectsPersistProxy(scheduler))
             persist_helper.register('user_context', ucontext)
@@ -260,7 +268,13 @@ def run(config, source_code=None): # 此处的config是RqAttrDict类, 是dict转
             with run_with_user_log_disabled(disabled=False):
                 user_strategy.init()
 
-        for event in event_source.events(config.base.start_date, config.base.end_date, config.base.frequency):
+        if isinstance(event_source, AbstractAsyncEventSource):
+            events = iter_async_events(event_source, config.base.start_date, config.base.end_date,
+                                       config.base.frequency)
+        else:
+            events = event_source.events(config.base.start_date, config.base.end_date, config.base.frequency)
+
+        for event in events:
             calendar_dt = event.calendar_dt
             trading_dt = event.trading_dt
             event_type = event.event_type
@@ -282,6 +296,7 @@ def run(config, source_code=None): # 此处的config是RqAttrDict类, 是dict转
                 env.event_bus.publish_event(EVENT.BAR, bar_dict)
                 env.event_bus.publish_event(EVENT.POST_BAR)
             elif event_type == EVENT.TICK:
+                bar_dict.update_dt(calendar_dt)
                 env.event_bus.publish_event(EVENT.PRE_TICK)
                 env.event_bus.publish_event(EVENT.TICK, event.data['tick'])
                 env.event_bus.publish_event(EVENT.POST_TICK)
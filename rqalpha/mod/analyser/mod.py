@@ -16,7 +16,7 @@
 
 import os
 import pickle
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 
 import six
 from enum import Enum
@@ -28,7 +28,11 @@ from rqalpha.events import EVENT
 from rqalpha.const import ACCOUNT_TYPE, EXIT_CODE
 from rqalpha.utils.risk import Risk
 from rqalpha.utils.repr import properties
+from rqalpha.utils.column_table import ColumnTable
 from rqalpha.execution_context import ExecutionContext
+from rqalpha.utils.logger import system_log
+
+from .stream import ResultStreamWriter, StreamResult
 
 # 回测分析: 包含: 收益, 下单记录, 成交记录
 class AnalyserMod(AbstractMod):
@@ -39,52 +43,117 @@ class AnalyserMod(AbstractMod):
         self._result = None
 
         self._orders = defaultdict(list)  # 订单集合
-        self._trades = []
-        self._total_portfolios = []
-        self._sub_portfolios = defaultdict(list)
-        self._positions = defaultdict(list)
-
-        self._benchmark_daily_returns = []
-        self._portfolio_daily_returns = []
+        # 各类记录按列存储, 字段在第一次记录时确定, 之后按固定字段直接读取属性
+        self._capacity = 256
+        self._trades = None
+        self._total_portfolios = None
+        self._sub_portfolios = {}
+        self._positions = {}
+
+        self._days = 0
+        self._benchmark_daily_returns = np.empty(0)
+        self._portfolio_daily_returns = np.empty(0)
         self._latest_portfolio = None
         self._latest_benchmark_portfolio = None
 
+        self._stream = None  # 分块输出时的写出器
+        self._chunk_size = None
+
     def start_up(self, env, mod_config):
         self._env = env
         self._mod_config = mod_config
         self._enabled = (self._mod_config.record or self._mod_config.plot or self._mod_config.output_file or
-                         self._mod_config.plot_save_file or self._mod_config.report_save_path)
+                         self._mod_config.plot_save_file or self._mod_config.report_save_path or
+                         self._mod_config.stream_path)
 
         if self._enabled:
+            # 按回测的交易日数预分配
+            self._capacity = max(len(env.config.base.trading_calendar), 1)
+            self._benchmark_daily_returns = np.empty(self._capacity)
+            self._portfolio_daily_returns = np.empty(self._capacity)
+            if self._mod_config.stream_path:
+                # 分块输出时内存中最多保留一块记录
+                self._stream = ResultStreamWriter(self._mod_config.stream_path)
+                self._chunk_size = self._capacity = max(int(self._mod_config.stream_chunk_size), 1)
             env.event_bus.add_listener(EVENT.POST_SETTLEMENT, self._collect_daily)  # 结算后触发
             env.event_bus.add_listener(EVENT.TRADE, self._collect_trade)  # 成交后触发
             env.event_bus.add_listener(EVENT.ORDER_CREATION_PASS, self._collect_order)  # 创建订单成功后触发
 
     def _collect_trade(self, account, trade):  # 收集成交记录, 向_trades中添加成交单子
-        self._trades.append(self._to_trade_record(trade))
+        if self._trades is None:
+            keys = [k for k in properties(trade) if not k.startswith('_') and not k.endswith('_') and k != 'order']
+            self._trades = ColumnTable(keys + ['order_book_id', 'symbol', 'side', 'position_effect'], self._capacity)
+        order = trade.order
+        values = [getattr(trade, k) for k in self._trades.keys[:-4]]
+        values.extend([order.order_book_id, self._symbol(order.order_book_id), order.side, order.position_effect])
+        self._trades.append(values)
 
     def _collect_order(self, account, order):
         self._orders[order.trading_datetime.date()].append(order)
 
+    def _append_daily_returns(self, portfolio_returns, benchmark_returns):
+        if self._days == len(self._portfolio_daily_returns):
+            self._portfolio_daily_returns = np.concatenate([self._portfolio_daily_returns, np.empty(self._days)])
+            self._benchmark_daily_returns = np.concatenate([self._benchmark_daily_returns, np.empty(self._days)])
+        self._portfolio_daily_returns[self._days] = portfolio_returns
+        self._benchmark_daily_returns[self._days] = benchmark_returns
+        self._days += 1
+
     def _collect_daily(self):  # 收集[股票|基准等]账户的Portfolio以及仓位信息, 并记录在内部变量中
         date = self._env.calendar_dt.date()
         portfolio = self._env.account.get_portfolio(date)  # 获取今日的混合组合信息, 股票策略只有股票组合信息
 
         self._latest_portfolio = portfolio  # 最新组合信息更新
-        self._portfolio_daily_returns.append(portfolio.daily_returns)  # 记录每日收益
-        self._total_portfolios.append(self._to_portfolio_record(date, portfolio))  # 将portfolio转换成dict, 并记录
+        self._record_portfolio(date, portfolio)
 
         if ACCOUNT_TYPE.BENCHMARK in self._env.accounts:  # 处理benchmark账户
             self._latest_benchmark_portfolio = self._env.accounts[ACCOUNT_TYPE.BENCHMARK].portfolio  # 最新benchmark信息更新
-            self._benchmark_daily_returns.append(self._latest_benchmark_portfolio.daily_returns)  # 记录基准每日收益
+            benchmark_daily_returns = self._latest_benchmark_portfolio.daily_returns  # 记录基准每日收益
         else:
-            self._benchmark_daily_returns.append(0)
+            benchmark_daily_returns = 0
+        self._append_daily_returns(portfolio.daily_returns, benchmark_daily_returns)  # 记录每日收益
 
         for account_type, account in six.iteritems(self._env.accounts):
             portfolio = account.get_portfolio(date)
-            self._sub_portfolios[account_type].append(self._to_portfolio_record2(date, portfolio))  # 每种账户的当日portfolio记录
+            self._record_sub_portfolio(account_type, date, portfolio)  # 每种账户的当日portfolio记录
             for order_book_id, position in six.iteritems(portfolio.positions):
-                self._positions[account_type].append(self._to_position_record(date, order_book_id, position))  # 每种账户的仓位中的每支标的的记录
+                self._record_position(account_type, date, order_book_id, position)  # 每种账户的仓位中的每支标的的记录
+
+        if self._stream is not None:
+            self._flush()
+
+    def _record_portfolio(self, date, portfolio):
+        if self._total_portfolios is None:
+            keys = [k for k in properties(portfolio) if not k.startswith('_') and not k.endswith('_') and k not in {
+                "positions", "start_date", "starting_cash"
+            }]
+            self._total_portfolios = ColumnTable(keys + ['date'], self._capacity)
+        values = [getattr(portfolio, k) for k in self._total_portfolios.keys[:-1]]
+        values.append(date)
+        self._total_portfolios.append(values)
+
+    def _record_sub_portfolio(self, account_type, date, portfolio):
+        try:
+            table = self._sub_portfolios[account_type]
+        except KeyError:
+            keys = [k for k in portfolio.__dict__ if not k.startswith('_') and not k.endswith('_') and k not in {
+                "positions", "start_date", "starting_cash"
+            }]
+            table = self._sub_portfolios[account_type] = ColumnTable(keys + ['date'], self._capacity)
+        values = [getattr(portfolio, k) for k in table.keys[:-1]]
+        values.append(date)
+        table.append(values)
+
+    def _record_position(self, account_type, date, order_book_id, position):
+        try:
+            table = self._positions[account_type]
+        except KeyError:
+            keys = [k for k in position.__dict__ if not k.startswith('_') and not k.endswith('_')]
+            table = self._positions[account_type] = ColumnTable(keys + ['order_book_id', 'symbol', 'date'],
+                                                                self._capacity)
+        values = [getattr(position, k) for k in table.keys[:-3]]
+        values.extend([order_book_id, self._symbol(order_book_id), date])
+        table.append(values)
 
     def _symbol(self, order_book_id):
         return self._env.data_proxy.instruments(order_book_id).symbol
@@ -94,53 +163,55 @@ class AnalyserMod(AbstractMod):
         if isinstance(value, Enum):
             return value.name
 
-        if isinstance(value, (float, np.float64, np.float32, np.float16, np.float)):
+        if isinstance(value, (float, np.float64, np.float32, np.float16)):
             return round(value, ndigits)
 
         return value
 
-    def _to_portfolio_record(self, date, portfolio):
-        data = {
-            k: self._safe_convert(v, 3) for k, v in six.iteritems(properties(portfolio))
-            if not k.startswith('_') and not k.endswith('_') and k not in {
-                "positions", "start_date", "starting_cash"
-            }
-        }
-        data['date'] = date
-        return data
-
-    def _to_portfolio_record2(self, date, portfolio):
-        data = {
-            k: self._safe_convert(v, 3) for k, v in six.iteritems(portfolio.__dict__)
-            if not k.startswith('_') and not k.endswith('_') and k not in {
-                "positions", "start_date", "starting_cash"
-            }
-            }
-        data['date'] = date
-        return data
-
-    def _to_position_record(self, date, order_book_id, position):
-        data = {
-            k: self._safe_convert(v, 3) for k, v in six.iteritems(position.__dict__)
-            if not k.startswith('_') and not k.endswith('_')
-            }
-        data['order_book_id'] = order_book_id
-        data['symbol'] = self._symbol(order_book_id)
-        data['date'] = date
-        return data
-
-    def _to_trade_record(self, trade):
-        data = {
-            k: self._safe_convert(v) for k, v in six.iteritems(properties(trade))
-            if not k.startswith('_') and not k.endswith('_') and k != 'order'
-        }
-        data['order_book_id'] = trade.order.order_book_id
-        data['symbol'] = self._symbol(trade.order.order_book_id)
-        data['side'] = self._safe_convert(trade.order.side)
-        data['position_effect'] = self._safe_convert(trade.order.position_effect)
-        data['datetime'] = data['datetime'].strftime("%Y-%m-%d %H:%M:%S")
-        data['trading_datetime'] = data['trading_datetime'].strftime("%Y-%m-%d %H:%M:%S")
-        return data
+    def _to_frame(self, table, ndigits=3):
+        # 浮点列整列取整, 其余 object 列逐个转换, 结果与逐条 _safe_convert 相同
+        if table is None:
+            return pd.DataFrame()
+        data = OrderedDict()
+        for key, values in six.iteritems(table.columns(ndigits)):
+            if values.dtype == object:
+                values = [self._safe_convert(v, ndigits) for v in values]
+            data[key] = values
+        return pd.DataFrame(data)
+
+    def _tables(self):
+        # 结果中按列记录的各个表: 表名 -> ColumnTable
+        tables = OrderedDict([
+            ('trades', self._trades),
+            ('total_portfolios', self._total_portfolios),
+        ])
+        for account_type in self._env.accounts:
+            account_name = account_type.name.lower()
+            tables["{}_portfolios".format(account_name)] = self._sub_portfolios.get(account_type)
+            tables["{}_positions".format(account_name)] = self._positions.get(account_type)
+        return tables
+
+    def _table_frame(self, name, table):
+        df = self._to_frame(table)
+        if name == 'trades':
+            if 'datetime' in df.columns:
+                df['datetime'] = [dt.strftime("%Y-%m-%d %H:%M:%S") for dt in df['datetime']]
+                df['trading_datetime'] = [dt.strftime("%Y-%m-%d %H:%M:%S") for dt in df['trading_datetime']]
+                df = df.set_index('datetime')
+            return df
+        if 'date' in df.columns:
+            df['date'] = pd.to_datetime(df['date'])
+            df = df.set_index('date').sort_index()
+        return df
+
+    def _flush(self, force=False):
+        # 记录数达到一块时写出并清空, force 为 True 时写出全部剩余记录
+        for name, table in six.iteritems(self._tables()):
+            if table is None or len(table) == 0:
+                continue
+            if force or len(table) >= self._chunk_size:
+                self._stream.write(name, self._table_frame(name, table))
+                table.clear()
 
     def tear_down(self, code, exception=None):
         if code != EXIT_CODE.EXIT_SUCCESS or not self._enabled:
@@ -158,7 +229,7 @@ class AnalyserMod(AbstractMod):
                 continue
             summary[k] = self._safe_convert(v, 2)
 
-        risk = Risk(np.array(self._portfolio_daily_returns), np.array(self._benchmark_daily_returns),
+        risk = Risk(self._portfolio_daily_returns[:self._days], self._benchmark_daily_returns[:self._days],
                     data_proxy.get_risk_free_rate(self._env.config.base.start_date, self._env.config.base.end_date),
                     (self._env.config.base.end_date - self._env.config.base.start_date).days + 1)
         summary.update({
@@ -182,19 +253,16 @@ class AnalyserMod(AbstractMod):
             summary['benchmark_total_returns'] = self._latest_benchmark_portfolio.total_returns
             summary['benchmark_annualized_returns'] = self._latest_benchmark_portfolio.annualized_returns
 
-        trades = pd.DataFrame(self._trades)
-        if 'datetime' in trades.columns:
-            trades = trades.set_index('datetime')
-
-        df = pd.DataFrame(self._total_portfolios)
-        df['date'] = pd.to_datetime(df['date'])
-        total_portfolios = df.set_index('date').sort_index()
-
-        result_dict = {
-            'summary': summary,
-            'trades': trades,
-            'total_portfolios': total_portfolios,
-        }
+        if self._stream is None:
+            result_dict = {
+                'summary': summary,
+            }
+            for name, table in six.iteritems(self._tables()):
+                result_dict[name] = self._table_frame(name, table)
+        else:
+            self._flush(force=True)
+            self._stream.write_summary(summary)
+            result_dict = {}
 
         if ExecutionContext.plots is not None:
             plots = ExecutionContext.plots.get_plots()
@@ -209,26 +277,21 @@ class AnalyserMod(AbstractMod):
             df = df.set_index("date").sort_index()
             result_dict["plots"] = df
 
-        for account_type, account in six.iteritems(self._env.accounts):
-            account_name = account_type.name.lower()
-            portfolios_list = self._sub_portfolios[account_type]
-            df = pd.DataFrame(portfolios_list)
-            df["date"] = pd.to_datetime(df["date"])
-            portfolios_df = df.set_index("date").sort_index()
-            result_dict["{}_portfolios".format(account_name)] = portfolios_df
-
-            positions_list = self._positions[account_type]
-            positions_df = pd.DataFrame(positions_list)
-            if "date" in positions_df.columns:
-                positions_df["date"] = pd.to_datetime(positions_df["date"])
-                positions_df = positions_df.set_index("date").sort_index()
-            result_dict["{}_positions".format(account_name)] = positions_df
+        if self._stream is not None:
+            if "plots" in result_dict:
+                self._stream.write("plots", result_dict["plots"])
+            # 分块输出时返回结果目录的只读视图, 各个表在使用时才从磁盘读取
+            result_dict = StreamResult(self._mod_config.stream_path)
 
         self._result = result_dict
 
         if self._mod_config.output_file:
-            with open(self._mod_config.output_file, 'wb') as f:
-                pickle.dump(result_dict, f)
+            if self._stream is not None:
+                # 写出 pickle 需要把全部结果读回内存, 分块输出时结果目录本身即为输出, 可通过 load_result 读取
+                system_log.warn("output_file is ignored when stream_path is set, result is in {}", self._stream.path)
+            else:
+                with open(self._mod_config.output_file, 'wb') as f:
+                    pickle.dump(result_dict, f)
 
         if self._mod_config.plot:
             from rqalpha.plot import plot_result
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Ricequant, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import json
+import pickle
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+import six
+import numpy as np
+import pandas as pd
+
+
+# 写出器只在 stream_path 下的这个子目录中读写, 不影响 stream_path 中的其他文件
+STREAM_DIR = "rqalpha_result"
+SUMMARY_FILE = "summary.pk"
+# 各个表的列类型, 读取时据此还原 csv 中丢失的类型
+SCHEMA_FILE = "schema.json"
+
+_NUMERIC_DTYPES = {"bool", "int64", "float64"}
+
+
+def _table_file(path, name):
+    return os.path.join(path, "{}.csv".format(name))
+
+
+def _dtype_name(dtype):
+    kind = getattr(dtype, "kind", "O")
+    if kind == 'M':
+        return "datetime64[ns]"
+    if kind == 'b':
+        return "bool"
+    if kind in 'iu':
+        return "int64"
+    if kind == 'f':
+        return "float64"
+    return "object"
+
+
+def _merge_dtype(old, new):
+    # 同一列在不同块中的类型不一致时取能容纳两者的类型
+    if old == new:
+        return old
+    if old in _NUMERIC_DTYPES and new in _NUMERIC_DTYPES:
+        return "float64"
+    return "object"
+
+
+def _load_schema(path):
+    try:
+        with open(os.path.join(path, SCHEMA_FILE)) as f:
+            return json.load(f)
+    except (IOError, OSError):
+        return {}
+
+
+def _read_kwargs(path, name, schema=None):
+    if schema is None:
+        schema = _load_schema(path)
+    try:
+        table_schema = schema[name]
+    except KeyError:
+        # 没有类型记录时按索引是否为日期解析
+        return {"index_col": 0, "parse_dates": name != "trades"}
+    dtype = {}
+    parse_dates = []
+    for column, dtype_name in [table_schema["index"]] + table_schema["columns"]:
+        if dtype_name == "datetime64[ns]":
+            parse_dates.append(column)
+        elif dtype_name == "bool":
+            dtype[column] = bool
+        elif dtype_name == "int64":
+            dtype[column] = np.int64
+        elif dtype_name == "float64":
+            dtype[column] = np.float64
+        else:
+            dtype[column] = object
+    return {"index_col": 0, "dtype": dtype, "parse_dates": parse_dates}
+
+
+def result_path(path):
+    """
+    回测结果所在的目录: path 为 stream_path 时返回其中的结果子目录, 否则返回 path 本身
+    """
+    sub_path = os.path.join(path, STREAM_DIR)
+    if os.path.isdir(sub_path):
+        return sub_path
+    return path
+
+
+# 分块写出回测结果: 每个表一个 csv 文件, 每次追加一块, 只在第一次写入表头
+class ResultStreamWriter(object):
+    def __init__(self, stream_path):
+        self._path = os.path.join(stream_path, STREAM_DIR)
+        self._schema = {}
+        if not os.path.exists(self._path):
+            os.makedirs(self._path)
+        # 结果子目录由写出器独占, 清理上一次运行留下的结果, 避免追加到旧文件中
+        for file_name in os.listdir(self._path):
+            if file_name.endswith(".csv") or file_name in (SUMMARY_FILE, SCHEMA_FILE):
+                os.remove(os.path.join(self._path, file_name))
+
+    @property
+    def path(self):
+        return self._path
+
+    def _update_schema(self, name, df):
+        index = [df.index.name, _dtype_name(df.index.dtype)]
+        columns = [[column, _dtype_name(dtype)] for column, dtype in six.iteritems(df.dtypes)]
+        try:
+            old = self._schema[name]
+        except KeyError:
+            table_schema = {"index": index, "columns": columns}
+        else:
+            old_columns = dict(old["columns"])
+            table_schema = {
+                "index": [index[0], _merge_dtype(old["index"][1], index[1])],
+                "columns": [[column, _merge_dtype(old_columns.get(column, dtype_name), dtype_name)]
+                            for column, dtype_name in columns],
+            }
+            if table_schema == old:
+                return
+        self._schema[name] = table_schema
+        with open(os.path.join(self._path, SCHEMA_FILE), 'w') as f:
+            json.dump(self._schema, f)
+
+    def write(self, name, df):
+        header = name not in self._schema
+        self._update_schema(name, df)
+        with open(_table_file(self._path, name), 'a') as f:
+            df.to_csv(f, header=header, encoding='utf-8')
+
+    def write_summary(self, summary):
+        with open(os.path.join(self._path, SUMMARY_FILE), 'wb') as f:
+            pickle.dump(summary, f)
+
+
+def iter_table(path, name, chunk_size=10000):
+    """
+    按块读取分块输出的结果表
+
+    :param str path: stream_path 或结果目录
+    :param str name: 表名, 如 `total_portfolios`, `stock_positions`, `trades`
+    :param int chunk_size: 每块的行数
+    :return: 逐块返回 `pandas.DataFrame`
+    """
+    path = result_path(path)
+    for df in pd.read_csv(_table_file(path, name), chunksize=chunk_size, **_read_kwargs(path, name)):
+        yield df
+
+
+def read_table(path, name):
+    path = result_path(path)
+    return pd.read_csv(_table_file(path, name), **_read_kwargs(path, name))
+
+
+# 分块输出结果目录的只读视图, 与内存中的 result_dict 用法一致, 但只在访问某个表时才从磁盘读取该表;
+# 大表可以通过 iter_table 按块读取
+class StreamResult(Mapping):
+    def __init__(self, path):
+        self._path = result_path(path)
+
+    def _names(self):
+        names = [file_name[:-4] for file_name in os.listdir(self._path) if file_name.endswith(".csv")]
+        if os.path.exists(os.path.join(self._path, SUMMARY_FILE)):
+            names.append("summary")
+        return sorted(names)
+
+    def __getitem__(self, name):
+        if name == "summary":
+            summary_file = os.path.join(self._path, SUMMARY_FILE)
+            if not os.path.exists(summary_file):
+                raise KeyError(name)
+            with open(summary_file, 'rb') as f:
+                return pickle.load(f)
+        if not os.path.exists(_table_file(self._path, name)):
+            raise KeyError(name)
+        return read_table(self._path, name)
+
+    def iter_table(self, name, chunk_size=10000):
+        if not os.path.exists(_table_file(self._path, name)):
+            raise KeyError(name)
+        return iter_table(self._path, name, chunk_size)
+
+    def __contains__(self, name):
+        return name in self._names()
+
+    def __iter__(self):
+        return iter(self._names())
+
+    def __len__(self):
+        return len(self._names())
+
+
+def load_result(path):
+    """
+    读取回测结果: path 为目录时按分块输出的结果目录读取, 否则按 pickle 文件读取
+    """
+    if os.path.isdir(path):
+        return StreamResult(path)
+    return pd.read_pickle(path)
@@ -18,6 +18,7 @@ from importlib import import_module
 from collections import OrderedDict
 
 from rqalpha.utils.logger import system_log
+from rqalpha.utils.async_persist_provider import AsyncPersistProvider
 from rqalpha.utils.i18n import gettext as _
 
 
@@ -58,5 +59,13 @@ class ModHandler(object):
             self._mod_dict[mod_name].start_up(self._env, mod_config)
 
     def tear_down(self, *args):
+        # 先等待后台持久化写完, 模块的 tear_down 可能会关闭其提供的持久化方案
+        persist_provider = self._env.persist_provider
+        if isinstance(persist_provider, AsyncPersistProvider):
+            try:
+                persist_provider.close()
+            except Exception:
+                # 写入失败不能影响各个模块的 tear_down, 否则其提供的持久化方案不会被关闭
+                system_log.exception("failed to flush persist provider")
         for mod_name, _ in reversed(self._mod_list):
             self._mod_dict[mod_name].tear_down(*args)
@@ -16,43 +16,150 @@
 
 import os
 import csv
+import time
+
+import numpy as np
+import pandas as pd
 
 from rqalpha.interface import AbstractMod
 from rqalpha.events import EVENT
+from rqalpha.utils.datetime_func import convert_dt_to_int
 
 
-class ProgressiveOutputCSVMod(AbstractMod):
+FIELDNAMES = ["datetime", "portfolio_value", "market_value", "total_returns"]
+
+# 二进制列式输出: 每列一个文件, 依次追加该列的原始数值
+COLUMNS_DIR = "portfolio_columns"
+COLUMN_DTYPES = {
+    "datetime": np.int64,
+    "portfolio_value": np.float64,
+    "market_value": np.float64,
+    "total_returns": np.float64,
+}
+
+
+def _column_file(path, field):
+    return os.path.join(path, "{}.{}".format(field, np.dtype(COLUMN_DTYPES[field]).str[1:]))
 
-    def start_up(self, env, mod_config):
-        self._env = env
-        self._mod_config = mod_config
 
-        env.event_bus.add_listener(EVENT.POST_BAR, self._output_feeds)
+def _column_length(path, field):
+    file_path = _column_file(path, field)
+    if not os.path.exists(file_path):
+        return 0
+    return os.path.getsize(file_path) // np.dtype(COLUMN_DTYPES[field]).itemsize
 
-        output_path = mod_config.output_path
 
+def read_columns(output_path):
+    """
+    读取二进制列式输出。各列分别追加, 写入中途退出时各列长度可能不同, 只读取各列都完整的行
+
+    :param str output_path: 与配置中的 output_path 相同
+    :return: `pandas.DataFrame`, datetime 为 YYYYMMDDHHMMSS 形式的整数
+    """
+    path = os.path.join(output_path, COLUMNS_DIR)
+    length = min(_column_length(path, field) for field in FIELDNAMES)
+    return pd.DataFrame({field: np.fromfile(_column_file(path, field), dtype=COLUMN_DTYPES[field], count=length)
+                         for field in FIELDNAMES}, columns=FIELDNAMES)
+
+
+class CSVOutput(object):
+    def __init__(self, output_path):
         filename = os.path.join(output_path, "portfolio.csv")
         new_file = False
         if not os.path.exists(filename):
             new_file = True
         self.csv_file = open(filename, 'a')
-        fieldnames = ["datetime", "portfolio_value", "market_value", "total_returns"]
-        self.csv_writer = csv.DictWriter(self.csv_file, fieldnames)
+        self.csv_writer = csv.DictWriter(self.csv_file, FIELDNAMES)
         if new_file:
             self.csv_writer.writeheader()
+            self.csv_file.flush()
+
+    def write(self, rows):
+        self.csv_writer.writerows({
+            "datetime": dt.date(),
+            "portfolio_value": portfolio_value,
+            "market_value": market_value,
+            "total_returns": total_returns,
+        } for dt, portfolio_value, market_value, total_returns in rows)
+        self.csv_file.flush()
+
+    def close(self):
+        self.csv_file.close()
+
+
+class ColumnsOutput(object):
+    def __init__(self, output_path):
+        self._path = os.path.join(output_path, COLUMNS_DIR)
+        if not os.path.exists(self._path):
+            os.makedirs(self._path)
+        # 上次写入中途退出时截掉多出的部分, 之后追加的各列才能逐行对齐
+        length = min(_column_length(self._path, field) for field in FIELDNAMES)
+        for field in FIELDNAMES:
+            file_path = _column_file(self._path, field)
+            if os.path.exists(file_path):
+                with open(file_path, 'r+b') as f:
+                    f.truncate(length * np.dtype(COLUMN_DTYPES[field]).itemsize)
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        columns[0] = [convert_dt_to_int(dt) for dt in columns[0]]
+        for field, values in zip(FIELDNAMES, columns):
+            with open(_column_file(self._path, field), 'ab') as f:
+                np.asarray(values, dtype=COLUMN_DTYPES[field]).tofile(f)
+
+    def close(self):
+        pass
+
+
+class ProgressiveOutputCSVMod(AbstractMod):
+
+    def __init__(self):
+        self._env = None
+        self._mod_config = None
+        self._output = None
+        self._rows = []
+        self._last_flush_time = None
+
+    def start_up(self, env, mod_config):
+        self._env = env
+        self._mod_config = mod_config
+        self._rows = []
+        self._last_flush_time = time.time()
+
+        # 只在每个交易日结束时输出一行, 否则每个 bar 输出一行
+        if mod_config.daily_only:
+            env.event_bus.add_listener(EVENT.POST_AFTER_TRADING, self._output_feeds)
+        else:
+            env.event_bus.add_listener(EVENT.POST_BAR, self._output_feeds)
+
+        if mod_config.output_format == "columns":
+            self._output = ColumnsOutput(mod_config.output_path)
+        else:
+            self._output = CSVOutput(mod_config.output_path)
 
     def _output_feeds(self, *args, **kwargs):
         misc_account = self._env.account
-        calendar_date = self._env.calendar_dt.date()
         portfolio = misc_account.portfolio
 
-        self.csv_writer.writerow({
-            "datetime": calendar_date,
-            "total_returns": portfolio.total_returns,
-            "portfolio_value": portfolio.portfolio_value,
-            "market_value": portfolio.market_value,
-        })
-        self.csv_file.flush()
+        self._rows.append((self._env.calendar_dt, portfolio.portfolio_value, portfolio.market_value,
+                           portfolio.total_returns))
+        # 累积到一定行数或距离上次写入超过一定时间后再写入文件
+        if (len(self._rows) >= self._mod_config.flush_rows or
+                time.time() - self._last_flush_time >= self._mod_config.flush_interval):
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self._output.write(self._rows)
+            self._rows = []
+        self._last_flush_time = time.time()
 
     def tear_down(self, code, exception=None):
-        pass
+        # 之前的模块 start_up 失败时本模块没有启动
+        if self._output is None:
+            return
+        try:
+            self._flush()
+        finally:
+            self._output.close()
+            self._output = None
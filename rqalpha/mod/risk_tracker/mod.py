@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Ricequant, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from rqalpha.interface import AbstractMod
+from rqalpha.events import EVENT
+from rqalpha.const import ACCOUNT_TYPE
+from rqalpha.utils.risk import OnlineRisk
+
+
+# 逐日累积风险指标, 运行过程中可以随时通过 get_risk 查看截至上一个结算日的指标, 不必每次从头计算
+class RiskTrackerMod(AbstractMod):
+    def __init__(self):
+        self._env = None
+        self._risk = OnlineRisk()
+        self._last_date = None
+
+    def start_up(self, env, mod_config):
+        self._env = env
+        env.event_bus.add_listener(EVENT.POST_SETTLEMENT, self._update)  # 结算后累积当日收益
+
+        from rqalpha.api.api_base import register_api
+        register_api('get_risk', self.get_risk)
+
+    def _update(self):
+        date = self._env.calendar_dt.date()
+        # 与 analyser 一致: 组合收益取当日保存的组合, 基准收益取基准账户的当前组合
+        daily_returns = self._env.account.get_portfolio(date).daily_returns
+        if ACCOUNT_TYPE.BENCHMARK in self._env.accounts:
+            benchmark_daily_returns = self._env.accounts[ACCOUNT_TYPE.BENCHMARK].portfolio.daily_returns
+        else:
+            benchmark_daily_returns = 0
+        self._risk.update(daily_returns, benchmark_daily_returns)
+        self._last_date = date
+
+    def get_risk(self):
+        """
+        获取截至最近一个结算日的风险指标, 需要开启 risk_tracker mod
+
+        :return: dict, 包含 return, annual_return, benchmark_return, benchmark_annual_return, alpha, beta, sharpe,
+            max_drawdown, volatility, annual_volatility, information_ratio, downside_risk, sortino,
+            tracking_error, calmar; 还没有经过结算时返回 None
+        """
+        if self._last_date is None:
+            return None
+        start_date = self._env.config.base.start_date
+        risk_free_rate = self._env.data_proxy.get_risk_free_rate(start_date, self._last_date)
+        self._risk.set_period(risk_free_rate, (self._last_date - start_date).days + 1)
+        return self._risk.all()
+
+    def tear_down(self, code, exception=None):
+        pass
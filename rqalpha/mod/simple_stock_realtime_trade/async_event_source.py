@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Ricequant, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# 本模块使用 async/await 语法, 仅支持 Python 3.6 及以上版本, 只在开启 async_mode 时导入
+
+import asyncio
+import datetime
+
+from rqalpha.interface import AbstractAsyncEventSource, AbstractAsyncQuoteProvider
+from rqalpha.utils.async_utils import iter_async_events
+from rqalpha.utils.logger import system_log
+from .event_source import RealtimeEventSource
+from .utils import get_realtime_quotes, is_holiday_today, is_tradetime_now
+
+
+class TushareQuoteProvider(AbstractAsyncQuoteProvider):
+    """
+    在线程池中调用 tushare 获取实时行情, 不阻塞事件循环
+    """
+    def __init__(self, codes_getter):
+        self._codes_getter = codes_getter
+
+    async def fetch(self):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, get_realtime_quotes, self._codes_getter())
+
+
+class AsyncRealtimeEventSource(RealtimeEventSource, AbstractAsyncEventSource):
+    """
+    在同一个 asyncio 事件循环中运行时钟和各个行情源, 代替时钟线程和行情线程;
+    等待事件时挂起在 asyncio.Event 上, 不再每秒轮询队列。
+    """
+    def __init__(self, fps, subscribe_universe_only=False, recorder=None, coalesce_bars=True,
+                 lag_warning_threshold=None, quote_providers=None):
+        super(AsyncRealtimeEventSource, self).__init__(fps, subscribe_universe_only, recorder, coalesce_bars,
+                                                       lag_warning_threshold)
+        if quote_providers is None:
+            quote_providers = [TushareQuoteProvider(self._subscribed_codes)]
+        self._quote_providers = quote_providers
+        self._event_ready = None
+        self._quotes_ready = None
+
+    def _on_quotes(self, fetch_time, df):
+        super(AsyncRealtimeEventSource, self)._on_quotes(fetch_time, df)
+        self._quotes_ready.set()
+
+    def _clock_tick(self, dt):
+        super(AsyncRealtimeEventSource, self)._clock_tick(dt)
+        if len(self.event_queue) > 0:
+            self._event_ready.set()
+
+    async def _quotation_task(self, provider):
+        while True:
+            if not is_holiday_today() and is_tradetime_now():
+                try:
+                    fetch_time = datetime.datetime.now()
+                    self._on_quotes(fetch_time, await provider.fetch())
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    system_log.exception("quote provider {} fail", provider)
+
+            await asyncio.sleep(1)
+
+    async def _clock_task(self):
+        # wait for the first data ready
+        await self._quotes_ready.wait()
+
+        while True:
+            await asyncio.sleep(self.fps)
+
+            if is_holiday_today():
+                await asyncio.sleep(60)
+                continue
+
+            self._clock_tick(datetime.datetime.now())
+
+    async def async_events(self, start_date, end_date, frequency):
+        self._event_ready = asyncio.Event()
+        self._quotes_ready = asyncio.Event()
+        tasks = [asyncio.ensure_future(self._quotation_task(provider)) for provider in self._quote_providers]
+        tasks.append(asyncio.ensure_future(self._clock_task()))
+
+        try:
+            while True:
+                item = self.event_queue.get(timeout=0)
+                if item is None:
+                    self._event_ready.clear()
+                    await self._event_ready.wait()
+                    continue
+
+                for event in self._dispatch(item, datetime.datetime.now()):
+                    yield event
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def events(self, start_date, end_date, frequency):
+        return iter_async_events(self, start_date, end_date, frequency)
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Ricequant, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+
+BAR_DTYPE = np.dtype([
+    ('datetime', np.uint64),
+    ('open', np.float64),
+    ('high', np.float64),
+    ('low', np.float64),
+    ('close', np.float64),
+    ('volume', np.float64),
+    ('total_turnover', np.float64),
+])
+
+_MINUTES_PER_DAY = 24 * 60
+_MARKET_OPEN = 93000
+
+
+def _grow(array, size):
+    new = np.zeros((size, ) + array.shape[1:], dtype=array.dtype)
+    new[:len(array)] = array
+    return new
+
+
+class MinuteBarAggregator(object):
+    """
+    将实时行情快照合成为分钟线, 行号与 QuoteTable 一致。
+
+    每个标的一个固定长度的环形缓冲区, 保存最近 capacity 根已完成的分钟线; 另外保存正在合成的一根。
+    分钟线的时间为该分钟的结束时间, 如 09:30:01 ~ 09:31:00 的快照合成为 09:31:00 的分钟线;
+    成交量、成交额为累计值在该分钟内的增量; 开盘后才开始接收行情时, 第一根分钟线从第一个快照开始累计。
+    """
+    def __init__(self, capacity=240):
+        self._capacity = capacity
+        self._bars = np.zeros((0, capacity), dtype=BAR_DTYPE)
+        self._count = np.zeros(0, dtype=np.int64)  # 已完成的分钟线数量
+        self._current = np.zeros(0, dtype=BAR_DTYPE)  # 正在合成的分钟线
+        self._minute = np.zeros(0, dtype=np.int64)  # 正在合成的分钟线的序号: 日期 * 1440 + 当日分钟数
+        self._volume_start = np.zeros(0)  # 正在合成的分钟线开始时的累计成交量
+        self._turnover_start = np.zeros(0)
+        self._last_volume = np.zeros(0)
+        self._last_turnover = np.zeros(0)
+
+    def _ensure_rows(self, size):
+        if size <= len(self._count):
+            return
+        size = max(size, 2 * len(self._count))
+        for name in ("_bars", "_count", "_current", "_minute", "_volume_start", "_turnover_start",
+                     "_last_volume", "_last_turnover"):
+            setattr(self, name, _grow(getattr(self, name), size))
+
+    def update(self, rows, datetimes, prices, volumes, turnovers):
+        """
+        :param rows: 行号数组, 不重复
+        :param datetimes: 快照时间, YYYYMMDDHHMMSS 形式的整数数组
+        :param prices: 最新价
+        :param volumes: 当日累计成交量
+        :param turnovers: 当日累计成交额
+        """
+        valid = (datetimes > 0) & (prices > 0)
+        rows, datetimes, prices = rows[valid], datetimes[valid], prices[valid]
+        volumes, turnovers = volumes[valid], turnovers[valid]
+        if len(rows) == 0:
+            return
+        self._ensure_rows(rows.max() + 1)
+
+        date = datetimes // 1000000
+        hms = datetimes % 1000000
+        minute_of_day = hms // 10000 * 60 + hms // 100 % 100 + (hms % 100 > 0)
+        minute = date * _MINUTES_PER_DAY + minute_of_day
+        label = (date * 1000000 + minute_of_day // 60 * 10000 + minute_of_day % 60 * 100).astype(np.uint64)
+
+        current_minute = self._minute[rows]
+        new = minute > current_minute
+        same = minute == current_minute
+
+        # 进入新的一分钟: 之前正在合成的分钟线完成, 写入环形缓冲区
+        done = rows[new & (current_minute > 0)]
+        if len(done):
+            slots = self._count[done] % self._capacity
+            self._bars[done, slots] = self._current[done]
+            self._count[done] += 1
+
+        r = rows[new]
+        # 当日第一个快照: 开盘前的快照从 0 开始累计; 开盘后才开始接收行情时, 之前的成交不属于任何一根分钟线,
+        # 以该快照的累计值为起点
+        new_day = date[new] != current_minute[new] // _MINUTES_PER_DAY
+        from_open = hms[new] <= _MARKET_OPEN
+        self._volume_start[r] = np.where(new_day, np.where(from_open, 0, volumes[new]), self._last_volume[r])
+        self._turnover_start[r] = np.where(new_day, np.where(from_open, 0, turnovers[new]), self._last_turnover[r])
+        self._minute[r] = minute[new]
+        bars = self._current
+        bars['datetime'][r] = label[new]
+        for field in ('open', 'high', 'low', 'close'):
+            bars[field][r] = prices[new]
+
+        r = rows[same]
+        bars['high'][r] = np.maximum(bars['high'][r], prices[same])
+        bars['low'][r] = np.minimum(bars['low'][r], prices[same])
+        bars['close'][r] = prices[same]
+
+        # 早于正在合成的分钟线的快照直接忽略
+        updated = new | same
+        r = rows[updated]
+        bars['volume'][r] = volumes[updated] - self._volume_start[r]
+        bars['total_turnover'][r] = turnovers[updated] - self._turnover_start[r]
+        self._last_volume[r] = volumes[updated]
+        self._last_turnover[r] = turnovers[updated]
+
+    def history(self, row, bar_count, dt):
+        """
+        获取时间不晚于 dt 的最近 bar_count 根分钟线; 正在合成的分钟线在其结束时间不晚于 dt 时视为已完成
+
+        :param int row: 行号
+        :param int bar_count: 数量
+        :param int dt: YYYYMMDDHHMMSS 形式的整数
+        :return: dtype 为 BAR_DTYPE 的 `numpy.ndarray`, 按时间升序排列
+        """
+        if row >= len(self._count):
+            return np.empty(0, dtype=BAR_DTYPE)
+        count = self._count[row]
+        n = min(count, self._capacity)
+        bars = self._bars[row, (count - n + np.arange(n)) % self._capacity]
+        if self._minute[row] > 0:
+            bars = np.append(bars, self._current[row:row + 1])
+        i = bars['datetime'].searchsorted(np.uint64(dt), side='right')
+        return bars[max(i - bar_count, 0):i]
@@ -16,33 +16,72 @@
 
 import datetime
 
-import pandas as pd
+import numpy as np
 
 from rqalpha.data.base_data_source import BaseDataSource
 from rqalpha.environment import Environment
 from rqalpha.model.snapshot import SnapshotObject
+from rqalpha.utils.datetime_func import convert_dt_to_int
+from .quote_table import QuoteTable
+from .bar_aggregator import BAR_DTYPE
 
 
 class DataSource(BaseDataSource):
-    def __init__(self, path):
+    def __init__(self, path, bar_buffer_size=240):
         super(DataSource, self).__init__(path)
         self._env = Environment.get_instance()
-        self.realtime_quotes_df = pd.DataFrame()
+        # 由 event_source 中的行情线程更新
+        self.quotes = QuoteTable(bar_capacity=bar_buffer_size)
+
+    @property
+    def realtime_quotes_df(self):
+        return self.quotes.to_frame()
 
     def get_bar(self, instrument, dt, frequency):
         # if frequency == '1d':
         #     return super(DataSource, self).get_bar(instrument, dt, frequency)
 
         # FIXME: 目前这样仅仅给撮合引擎用，不是定义的bar
-        # FIXME: self.realtime_quotes_df 是从 event_source.py 那边「飞线」设置过来的
-        bar = self.realtime_quotes_df.loc[instrument.order_book_id].to_dict()
+        return self.quotes.get(instrument.order_book_id)
+
+    def history_bars(self, instrument, bar_count, frequency, fields, dt, skip_suspended=True):
+        if frequency != '1m':
+            return super(DataSource, self).history_bars(instrument, bar_count, frequency, fields, dt, skip_suspended)
+
+        if not self._are_fields_valid(fields, BAR_DTYPE.names):
+            return None
+
+        # 当日的分钟线来自实时行情的合成, 数量不足时以之前的分钟线补齐
+        bars = self.quotes.history_bars(instrument.order_book_id, bar_count, convert_dt_to_int(dt))
+        if len(bars) < bar_count:
+            bars = self._stitch(self._stored_minute_bars(instrument, bar_count - len(bars), dt, skip_suspended), bars)
+
+        if fields is None:
+            return bars
+        return bars[fields]
+
+    def _stored_minute_bars(self, instrument, bar_count, dt, skip_suspended):
+        try:
+            return super(DataSource, self).history_bars(instrument, bar_count, '1m', None, dt, skip_suspended)
+        except NotImplementedError:
+            # 数据源没有分钟线
+            return None
 
-        return bar
+    @staticmethod
+    def _stitch(stored, bars):
+        if stored is None or len(stored) == 0:
+            return bars
+        if len(bars):
+            stored = stored[stored['datetime'] < bars['datetime'][0]]
+        result = np.zeros(len(stored) + len(bars), dtype=BAR_DTYPE)
+        for field in BAR_DTYPE.names:
+            if field in stored.dtype.names:
+                result[field][:len(stored)] = stored[field]
+        result[len(stored):] = bars
+        return result
 
     def current_snapshot(self, instrument, frequency, dt):
-        snapshot_dict = self.realtime_quotes_df.loc[instrument.order_book_id].to_dict()
-        snapshot_dict["last"] = snapshot_dict["price"]
-        return SnapshotObject(instrument, snapshot_dict)
+        return SnapshotObject(instrument, self.quotes.get(instrument.order_book_id), dt)
 
     def available_data_range(self, frequency):
         return datetime.date(2017, 1, 1), datetime.date.max
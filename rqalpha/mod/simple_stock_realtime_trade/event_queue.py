@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Ricequant, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+import threading
+from collections import deque
+
+from rqalpha.events import EVENT
+
+
+class EventQueue(object):
+    """
+    时钟线程与主循环之间的事件队列。
+
+    开启 coalesce_bars 时, 连续的待处理 BAR 事件合并为最新的一个: 策略处理不过来时只处理最新的行情,
+    队列不会无限增长; 其他事件不会被合并, 也不会改变先后顺序。
+    """
+    def __init__(self, coalesce_bars=True):
+        self._coalesce_bars = coalesce_bars
+        self._items = deque()  # (dt, event_type, 入队时间)
+        self._cond = threading.Condition()
+        self.coalesced = 0  # 被合并掉的 BAR 事件数量
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, dt, event_type):
+        with self._cond:
+            if (self._coalesce_bars and event_type == EVENT.BAR and self._items and
+                    self._items[-1][1] == EVENT.BAR):
+                # 保留较早的入队时间, 延迟从策略开始落后时算起
+                self._items[-1] = (dt, event_type, self._items[-1][2])
+                self.coalesced += 1
+            else:
+                self._items.append((dt, event_type, time.time()))
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """
+        :return: (dt, event_type, 入队时间), 超时或 timeout 为 0 且队列为空时返回 None
+        """
+        with self._cond:
+            if not self._items and timeout != 0:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+
+class EventSourceMetrics(object):
+    """
+    事件源的运行指标: 队列长度、事件从入队到开始处理的延迟、BAR 事件的处理耗时
+    """
+    def __init__(self, lag_warning_threshold=None):
+        self.lag_warning_threshold = lag_warning_threshold
+        self.events = 0
+        self.bars = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.last_lag = 0.
+        self.max_lag = 0.
+        self.last_bar_time = 0.
+        self.max_bar_time = 0.
+        self.total_bar_time = 0.
+
+    def on_dequeue(self, enqueue_time, queue_depth):
+        """
+        :return: 本次的延迟(秒)
+        """
+        self.events += 1
+        self.queue_depth = queue_depth
+        self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+        self.last_lag = time.time() - enqueue_time
+        self.max_lag = max(self.max_lag, self.last_lag)
+        return self.last_lag
+
+    def on_bar_handled(self, seconds):
+        self.bars += 1
+        self.last_bar_time = seconds
+        self.max_bar_time = max(self.max_bar_time, seconds)
+        self.total_bar_time += seconds
+
+    def is_lagging(self):
+        return self.lag_warning_threshold is not None and self.last_lag > self.lag_warning_threshold
+
+    def to_dict(self):
+        return {
+            "events": self.events,
+            "bars": self.bars,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+            "last_bar_time": self.last_bar_time,
+            "max_bar_time": self.max_bar_time,
+            "mean_bar_time": self.total_bar_time / self.bars if self.bars else 0.,
+        }
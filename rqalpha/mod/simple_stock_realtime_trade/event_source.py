@@ -18,7 +18,7 @@ import datetime
 import time
 from threading import Thread
 
-from six.moves.queue import Queue, Empty
+import six
 
 from rqalpha.interface import AbstractEventSource
 from rqalpha.environment import Environment
@@ -26,15 +26,27 @@ from rqalpha.utils.logger import system_log
 from rqalpha.events import Event, EVENT
 from rqalpha.execution_context import ExecutionContext
 from rqalpha.utils import json as json_utils
-from .utils import get_realtime_quotes, order_book_id_2_tushare_code, is_holiday_today, is_tradetime_now
+from .event_queue import EventQueue, EventSourceMetrics
+from .utils import get_realtime_quotes, order_book_id_2_tushare_code, is_holiday_today, is_tradetime_now, \
+    is_tradetime, TUSHARE_CODE_MAPPING
+
+INDEX_ORDER_BOOK_IDS = set(TUSHARE_CODE_MAPPING.values())
 
 
 class RealtimeEventSource(AbstractEventSource):
 
-    def __init__(self, fps):
+    def __init__(self, fps, subscribe_universe_only=False, recorder=None, coalesce_bars=True,
+                 lag_warning_threshold=None):
         self._env = Environment.get_instance()
         self.fps = fps
-        self.event_queue = Queue()
+        # 只获取股票池、基准及持仓标的的行情, 否则获取全部股票的行情
+        self._subscribe_universe_only = subscribe_universe_only
+        # 录制获取到的行情, 用于之后回放
+        self._recorder = recorder
+        self._all_codes = None
+        self.event_queue = EventQueue(coalesce_bars)
+        self._metrics = EventSourceMetrics(lag_warning_threshold)
+        self._lagging = False
 
         self.before_trading_fire_date = datetime.date(2000, 1, 1)
         self.after_trading_fire_date = datetime.date(2000, 1, 1)
@@ -56,24 +68,53 @@ class RealtimeEventSource(AbstractEventSource):
             "after_trading_fire_date": self.after_trading_fire_date,
         }).encode('utf-8')
 
+    def _subscribed_codes(self):
+        if not self._subscribe_universe_only:
+            if self._all_codes is None:
+                order_book_id_list = sorted(ExecutionContext.data_proxy.all_instruments("CS").order_book_id.tolist())
+                self._all_codes = [order_book_id_2_tushare_code(code) for code in order_book_id_list]
+            return self._all_codes
+
+        order_book_ids = set(self._env.universe)
+        if self._env.config.base.benchmark:
+            order_book_ids.add(self._env.config.base.benchmark)
+        for account in list(six.itervalues(self._env.accounts)):
+            order_book_ids.update(list(account.portfolio.positions))
+        # 指数行情总是单独获取
+        return sorted(order_book_id_2_tushare_code(order_book_id) for order_book_id in order_book_ids
+                      if order_book_id.endswith((".XSHE", ".XSHG")) and order_book_id not in INDEX_ORDER_BOOK_IDS)
+
+    def _on_quotes(self, fetch_time, df):
+        self._env.data_source.quotes.update(df)
+        if self._recorder is not None:
+            self._recorder.record(fetch_time, df)
+
+    def _clock_tick(self, dt):
+        if dt.strftime("%H:%M:%S") >= "08:30:00" and dt.date() > self.before_trading_fire_date:
+            self.event_queue.put(dt, EVENT.BEFORE_TRADING)
+            self.before_trading_fire_date = dt.date()
+        elif dt.strftime("%H:%M:%S") >= "15:10:00" and dt.date() > self.after_trading_fire_date:
+            self.event_queue.put(dt, EVENT.AFTER_TRADING)
+            self.after_trading_fire_date = dt.date()
+
+        if is_tradetime(dt):
+            self.event_queue.put(dt, EVENT.BAR)
+
     def quotation_worker(self):
         while True:
             if not is_holiday_today() and is_tradetime_now():
-                order_book_id_list = sorted(ExecutionContext.data_proxy.all_instruments("CS").order_book_id.tolist())
-                code_list = [order_book_id_2_tushare_code(code) for code in order_book_id_list]
-
                 try:
-                    self._env.data_source.realtime_quotes_df = get_realtime_quotes(code_list)
+                    fetch_time = datetime.datetime.now()
+                    self._on_quotes(fetch_time, get_realtime_quotes(self._subscribed_codes()))
                 except Exception as e:
                     system_log.exception("get_realtime_quotes fail")
-                    continue
 
             time.sleep(1)
 
     def clock_worker(self):
         while True:
             # wait for the first data ready
-            if not self._env.data_source.realtime_quotes_df.empty:
+            if len(self._env.data_source.quotes) > 0:
                 break
             time.sleep(0.1)
 
@@ -84,17 +125,35 @@ class RealtimeEventSource(AbstractEventSource):
                 time.sleep(60)
                 continue
 
-            dt = datetime.datetime.now()
-
-            if dt.strftime("%H:%M:%S") >= "08:30:00" and dt.date() > self.before_trading_fire_date:
-                self.event_queue.put((dt, EVENT.BEFORE_TRADING))
-                self.before_trading_fire_date = dt.date()
-            elif dt.strftime("%H:%M:%S") >= "15:10:00" and dt.date() > self.after_trading_fire_date:
-                self.event_queue.put((dt, EVENT.AFTER_TRADING))
-                self.after_trading_fire_date = dt.date()
-
-            if is_tradetime_now():
-                self.event_queue.put((dt, EVENT.BAR))
+            self._clock_tick(datetime.datetime.now())
+
+    @property
+    def metrics(self):
+        """
+        【dict】事件队列长度、事件延迟、BAR 处理耗时等运行指标
+        """
+        metrics = self._metrics.to_dict()
+        metrics["coalesced_bars"] = self.event_queue.coalesced
+        return metrics
+
+    def _dispatch(self, item, calendar_dt):
+        dt, event_type, enqueue_time = item
+        lag = self._metrics.on_dequeue(enqueue_time, len(self.event_queue))
+        if self._metrics.is_lagging() != self._lagging:
+            self._lagging = not self._lagging
+            if self._lagging:
+                system_log.warn("strategy is lagging behind realtime events: lag {:.3f}s, queue depth {}",
+                                lag, len(self.event_queue))
+            else:
+                system_log.info("strategy caught up with realtime events")
+
+        system_log.debug("real_dt {}, dt {}, event {}", calendar_dt, dt, event_type)
+        start = time.time()
+        yield Event(event_type, calendar_dt, dt)
+        if event_type == EVENT.BAR:
+            self._metrics.on_bar_handled(time.time() - start)
+        elif event_type == EVENT.AFTER_TRADING:
+            system_log.info("realtime event source metrics: {}", self.metrics)
 
     def events(self, start_date, end_date, frequency):
         running = True
@@ -103,13 +162,9 @@ class RealtimeEventSource(AbstractEventSource):
         self.quotation_engine_thread.start()
 
         while running:
-            real_dt = datetime.datetime.now()
-            while True:
-                try:
-                    dt, event_type = self.event_queue.get(timeout=1)
-                    break
-                except Empty:
-                    continue
+            item = self.event_queue.get(timeout=1)
+            if item is None:
+                continue
 
-            system_log.debug("real_dt {}, dt {}, event {}", real_dt, dt, event_type)
-            yield Event(event_type, real_dt, dt)
+            for event in self._dispatch(item, datetime.datetime.now()):
+                yield event
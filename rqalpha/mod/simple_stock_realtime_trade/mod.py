@@ -14,27 +14,70 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+
+import six
+
 from rqalpha.interface import AbstractMod
 from rqalpha.utils.disk_persist_provider import DiskPersistProvider
+from rqalpha.utils.wal_persist_provider import WALPersistProvider
+from rqalpha.utils.sqlite_persist_provider import SQLitePersistProvider
 from rqalpha.const import RUN_TYPE, PERSIST_MODE
 
 from .data_source import DataSource
 from .event_source import RealtimeEventSource
+from .replay_event_source import ReplayEventSource
+from .quote_recorder import QuoteRecorder
 
 
 class RealtimeTradeMod(AbstractMod):
 
+    def __init__(self):
+        self._persist_provider = None
+
     def start_up(self, env, mod_config):
 
         if env.config.base.run_type == RUN_TYPE.PAPER_TRADING:
-            env.set_data_source(DataSource(env.config.base.data_bundle_path))
-            env.set_event_source(RealtimeEventSource(mod_config.fps))
+            env.set_data_source(DataSource(env.config.base.data_bundle_path, mod_config.bar_buffer_size))
+            if mod_config.replay_path:
+                env.set_event_source(ReplayEventSource(mod_config.fps, mod_config.replay_path, mod_config.replay_speed,
+                                                       mod_config.lag_warning_threshold))
+            else:
+                recorder = QuoteRecorder(mod_config.record_path) if mod_config.record_path else None
+                if mod_config.async_mode:
+                    if six.PY2:
+                        raise RuntimeError("async_mode of simple_stock_realtime_trade requires python 3.6+")
+                    from .async_event_source import AsyncRealtimeEventSource
+                    event_source_type = AsyncRealtimeEventSource
+                else:
+                    event_source_type = RealtimeEventSource
+                env.set_event_source(event_source_type(mod_config.fps, mod_config.subscribe_universe_only, recorder,
+                                                       mod_config.coalesce_bars, mod_config.lag_warning_threshold))
 
-            persist_provider = DiskPersistProvider(mod_config.persist_path)
+            if mod_config.replay_path:
+                # 回放录制的行情时不持久化, 以免覆盖实盘运行保存的策略状态
+                env.config.base.persist = False
+                return
+
+            if mod_config.persist_provider == "wal":
+                persist_provider = WALPersistProvider(mod_config.persist_path)
+            elif mod_config.persist_provider == "sqlite":
+                persist_provider = SQLitePersistProvider(mod_config.sqlite_path, self._run_id(env, mod_config))
+            else:
+                persist_provider = DiskPersistProvider(mod_config.persist_path)
             env.set_persist_provider(persist_provider)
+            self._persist_provider = persist_provider
 
             env.config.base.persist = True
             env.config.base.persist_mode = PERSIST_MODE.REAL_TIME
 
+    @staticmethod
+    def _run_id(env, mod_config):
+        # 默认以策略文件名区分同一数据库中的各个策略
+        if mod_config.run_id:
+            return mod_config.run_id
+        return os.path.splitext(os.path.basename(env.config.base.strategy_file))[0]
+
     def tear_down(self, code, exception=None):
-        pass
+        if isinstance(self._persist_provider, (WALPersistProvider, SQLitePersistProvider)):
+            self._persist_provider.close()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Ricequant, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import datetime
+
+import numpy as np
+import pandas as pd
+
+
+FETCH_TIME = "fetch_time"
+_FETCH_TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def _record_file(path, date):
+    return os.path.join(path, "{}.csv".format(date.strftime("%Y%m%d")))
+
+
+# 录制实时行情: 每次获取到的原始行情追加到当天的 csv 文件中, 并记录获取时间
+class QuoteRecorder(object):
+    def __init__(self, path):
+        self._path = path
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+    def record(self, fetch_time, df):
+        """
+        :param datetime.datetime fetch_time: 获取行情的时间
+        :param pandas.DataFrame df: `get_realtime_quotes` 返回的原始行情
+        """
+        file_path = _record_file(self._path, fetch_time.date())
+        header = not os.path.exists(file_path)
+        df = df.copy()
+        df.insert(0, FETCH_TIME, fetch_time.strftime(_FETCH_TIME_FORMAT))
+        with open(file_path, "a") as f:
+            df.to_csv(f, header=header, index=False, encoding="utf-8")
+
+
+def _iter_groups(df):
+    """
+    :return: 逐次返回 (获取时间, 该次获取的行情), 同一次获取的行情在文件中是连续的
+    """
+    fetch_times = df[FETCH_TIME].values
+    starts = np.flatnonzero(fetch_times[1:] != fetch_times[:-1]) + 1
+    for start, end in zip(np.r_[0, starts], np.r_[starts, len(df)]):
+        yield fetch_times[start], df.iloc[start:end]
+
+
+def _parse_group(fetch_time, group):
+    group = group.drop(FETCH_TIME, axis=1).reset_index(drop=True)
+    group["is_index"] = group["is_index"] == "True"
+    return datetime.datetime.strptime(fetch_time, _FETCH_TIME_FORMAT), group
+
+
+def iter_records(path, chunksize=100000):
+    """
+    按时间顺序读取录制的行情, 每个文件分块读取, 不会一次性读入内存
+
+    :param str path: 录制目录
+    :param int chunksize: 每次读取的行数
+    :return: 逐次返回 (获取时间, 与 `get_realtime_quotes` 格式相同的原始行情)
+    """
+    for file_name in sorted(os.listdir(path)):
+        if not file_name.endswith(".csv"):
+            continue
+        reader = pd.read_csv(os.path.join(path, file_name), dtype=str, keep_default_na=False, chunksize=chunksize)
+        # 每块最后一次获取的行情可能延续到下一块, 留到下一块读出后再返回
+        rest = None
+        for chunk in reader:
+            if rest is not None:
+                chunk = pd.concat([rest, chunk], ignore_index=True)
+            groups = list(_iter_groups(chunk))
+            for fetch_time, group in groups[:-1]:
+                yield _parse_group(fetch_time, group)
+            rest = groups[-1][1] if groups else None
+        if rest is not None and len(rest):
+            yield _parse_group(rest[FETCH_TIME].values[0], rest)
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Ricequant, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .utils import tushare_code_2_order_book_id
+from .bar_aggregator import MinuteBarAggregator, BAR_DTYPE
+
+
+# tushare 实时行情中的数值字段
+QUOTE_FIELDS = ["open", "pre_close", "price", "high", "low", "bid", "ask", "volume", "amount"] + \
+               ["{}{}_{}".format(side, i, kind) for side in "ba" for i in range(1, 6) for kind in "vp"]
+
+# 由行情字段派生, 与 bar/snapshot 的字段名对应
+DERIVED_FIELDS = {
+    "close": "price",
+    "last": "price",
+    "prev_close": "pre_close",
+    "total_turnover": "amount",
+}
+
+
+def _parse_numbers(df, fields):
+    """
+    :return: 2 维 float64 数组, 每个字段一列; 空字符串记为 0
+    """
+    values = df[fields].values
+    flat = values.ravel()
+    try:
+        flat = np.where(flat == "", "0", flat).astype(np.float64)
+    except (TypeError, ValueError):
+        # 含有其他无法解析的值时逐列解析, 无法解析的值记为 0
+        return np.column_stack([pd.to_numeric(df[field], errors="coerce").fillna(0).values for field in fields])
+    return flat.reshape(values.shape)
+
+
+def _parse_datetimes(date, time):
+    dt = pd.DatetimeIndex(pd.to_datetime(date + " " + time, format="%Y-%m-%d %H:%M:%S", errors="coerce"))
+    result = np.zeros(len(dt), dtype=np.int64)
+    for part, scale in ((dt.year, 10000000000), (dt.month, 100000000), (dt.day, 1000000),
+                        (dt.hour, 10000), (dt.minute, 100), (dt.second, 1)):
+        result += np.nan_to_num(np.asarray(part, dtype=np.float64)).astype(np.int64) * scale
+    return result
+
+
+class QuoteTable(object):
+    """
+    实时行情表: 每个标的一行, 每个字段一个预先分配的 numpy 数组, 新的行情按行号原地更新。
+    行情线程写入, 主线程读取, 由锁保证读到的一行来自同一次更新。
+    """
+    def __init__(self, capacity=4096, bar_capacity=240):
+        self._capacity = capacity
+        self._rows = {}  # order_book_id -> 行号
+        self._code_rows = {}  # tushare 代码 -> 行号
+        self._order_book_ids = []
+        self._names = np.empty(capacity, dtype=object)
+        self._is_index = np.zeros(capacity, dtype=bool)
+        self._datetime = np.zeros(capacity, dtype=np.int64)
+        self._values = {field: np.zeros(capacity) for field in QUOTE_FIELDS}
+        # 由行情合成的分钟线, 每个标的保存最近 bar_capacity 根
+        self._minute_bars = MinuteBarAggregator(bar_capacity)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._order_book_ids)
+
+    def __contains__(self, order_book_id):
+        return order_book_id in self._rows
+
+    def _grow(self):
+        self._capacity *= 2
+        for name in ("_names", "_is_index", "_datetime"):
+            old = getattr(self, name)
+            new = np.zeros(self._capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        for field, old in list(self._values.items()):
+            new = np.zeros(self._capacity)
+            new[:len(old)] = old
+            self._values[field] = new
+
+    def _row_of(self, code):
+        try:
+            return self._code_rows[code]
+        except KeyError:
+            pass
+        order_book_id = tushare_code_2_order_book_id(code)
+        row = self._rows.get(order_book_id)
+        if row is None:
+            row = len(self._order_book_ids)
+            if row == self._capacity:
+                self._grow()
+            self._order_book_ids.append(order_book_id)
+            self._rows[order_book_id] = row
+        self._code_rows[code] = row
+        return row
+
+    def update(self, df):
+        """
+        用 tushare 返回的原始行情更新
+
+        :param pandas.DataFrame df: 包含 code, name, date, time, is_index 及各数值字段, 值为字符串
+        """
+        if df.empty:
+            return
+        rows = np.array([self._row_of(code) for code in df["code"].values], dtype=np.int64)
+        fields = [field for field in QUOTE_FIELDS if field in df.columns]
+        values = _parse_numbers(df, fields)
+        datetimes = _parse_datetimes(df["date"], df["time"])
+
+        with self._lock:
+            for i, field in enumerate(fields):
+                self._values[field][rows] = values[:, i]
+            self._datetime[rows] = datetimes
+            self._names[rows] = df["name"].values
+            self._is_index[rows] = df["is_index"].values.astype(bool)
+            self._minute_bars.update(rows, datetimes, self._values["price"][rows], self._values["volume"][rows],
+                                     self._values["amount"][rows])
+
+    def _row_dict(self, row):
+        bar = {field: float(column[row]) for field, column in self._values.items()}
+        for field, source in DERIVED_FIELDS.items():
+            bar[field] = bar[source]
+        bar["chg"] = bar["price"] / bar["pre_close"] - 1 if bar["pre_close"] else 0.
+        bar["datetime"] = int(self._datetime[row])
+        bar["name"] = self._names[row]
+        bar["is_index"] = bool(self._is_index[row])
+        bar["order_book_id"] = self._order_book_ids[row]
+        return bar
+
+    def get(self, order_book_id):
+        """
+        :return: dict, 标的的最新行情, 没有行情时为 None
+        """
+        with self._lock:
+            row = self._rows.get(order_book_id)
+            if row is None:
+                return None
+            return self._row_dict(row)
+
+    def history_bars(self, order_book_id, bar_count, dt):
+        """
+        获取由实时行情合成的分钟线
+
+        :param str order_book_id: 合约代码
+        :param int bar_count: 数量
+        :param int dt: YYYYMMDDHHMMSS 形式的整数, 只返回时间不晚于 dt 的分钟线
+        :return: dtype 为 BAR_DTYPE 的 `numpy.ndarray`
+        """
+        with self._lock:
+            row = self._rows.get(order_book_id)
+            if row is None:
+                return np.empty(0, dtype=BAR_DTYPE)
+            return self._minute_bars.history(row, bar_count, dt)
+
+    def to_frame(self):
+        with self._lock:
+            records = [self._row_dict(row) for row in range(len(self._order_book_ids))]
+        if not records:
+            return pd.DataFrame()
+        return pd.DataFrame(records).set_index("order_book_id", drop=False).sort_index()
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Ricequant, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import time
+
+from .event_source import RealtimeEventSource
+from .quote_recorder import iter_records
+from .utils import is_holiday
+
+# 每个交易日的时钟至少走到该时间, 以触发 after_trading
+_DAY_END = datetime.time(15, 10)
+
+
+class ReplayEventSource(RealtimeEventSource):
+    """
+    回放录制的行情: 不启动行情和时钟线程, 而是在同一个线程中按录制的时间依次更新行情、推进时钟,
+    行情解析、事件生成与实时运行时完全相同, 可以在没有网络的情况下通过 `metrics` 测量每个 bar 的耗时。
+    """
+    def __init__(self, fps, path, speed=0, lag_warning_threshold=None):
+        """
+        :param fps: 时钟间隔(秒)
+        :param str path: 录制目录
+        :param speed: 回放倍速, 1 为按实际时间回放, 0 为不等待, 尽可能快地回放
+        """
+        super(ReplayEventSource, self).__init__(fps, lag_warning_threshold=lag_warning_threshold)
+        self._path = path
+        self._speed = speed
+        self._next_tick = None
+        self._holidays = {}
+
+    def _is_holiday(self, date):
+        try:
+            return self._holidays[date]
+        except KeyError:
+            holiday = self._holidays[date] = is_holiday(date)
+            return holiday
+
+    def _drain(self):
+        while True:
+            item = self.event_queue.get(timeout=0)
+            if item is None:
+                return
+            for event in self._dispatch(item, item[0]):
+                yield event
+
+    def _ticks_until(self, end):
+        interval = datetime.timedelta(seconds=self.fps)
+        while self._next_tick < end:
+            dt = self._next_tick
+            self._next_tick += interval
+            if self._speed:
+                time.sleep(float(self.fps) / self._speed)
+            if not self._is_holiday(dt.date()):
+                self._clock_tick(dt)
+            for event in self._drain():
+                yield event
+
+    def _finish_day(self, last_fetch_time):
+        # 最后一次行情之后再走一个时钟间隔, 之后直接跳到收盘后, 不再用过期的行情产生 bar
+        interval = datetime.timedelta(seconds=self.fps)
+        for event in self._ticks_until(last_fetch_time + interval):
+            yield event
+        day_end = datetime.datetime.combine(last_fetch_time.date(), _DAY_END)
+        self._next_tick = max(self._next_tick, day_end)
+        for event in self._ticks_until(day_end + interval):
+            yield event
+
+    def events(self, start_date, end_date, frequency):
+        last_fetch_time = None
+        for fetch_time, df in iter_records(self._path):
+            if last_fetch_time is None:
+                self._next_tick = fetch_time
+            elif fetch_time.date() != last_fetch_time.date():
+                for event in self._finish_day(last_fetch_time):
+                    yield event
+                self._next_tick = fetch_time
+
+            # 先推进到获取这次行情之前的时钟, 再更新行情
+            for event in self._ticks_until(fetch_time):
+                yield event
+            self._on_quotes(fetch_time, df)
+            last_fetch_time = fetch_time
+
+        if last_fetch_time is not None:
+            for event in self._finish_day(last_fetch_time):
+                yield event
@@ -14,35 +14,38 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import math
-import time
 import datetime
 try:
     from functools import lru_cache
 except Exception as e:
     from fastcache import lru_cache
 
-from six.moves import reduce
+import pandas as pd
 
 from rqalpha.environment import Environment
-from rqalpha.utils.datetime_func import convert_dt_to_int
 
 
-def is_holiday_today():
-    today = datetime.date.today()
-    df = Environment.get_instance().data_proxy.get_trading_dates(today, today)
+def is_holiday(date):
+    df = Environment.get_instance().data_proxy.get_trading_dates(date, date)
 
     return len(df) == 0
 
 
-def is_tradetime_now():
-    now_time = time.localtime()
-    now = (now_time.tm_hour, now_time.tm_min, now_time.tm_sec)
+def is_holiday_today():
+    return is_holiday(datetime.date.today())
+
+
+def is_tradetime(dt):
+    now = (dt.hour, dt.minute, dt.second)
     if (9, 15, 0) <= now <= (11, 30, 0) or (13, 0, 0) <= now <= (15, 0, 0):
         return True
     return False
 
 
+def is_tradetime_now():
+    return is_tradetime(datetime.datetime.now())
+
+
 TUSHARE_CODE_MAPPING = {
     "sh": "000001.XSHG",
     "sz": "399001.XSHE",
@@ -70,41 +73,27 @@ def order_book_id_2_tushare_code(order_book_id):
     return order_book_id.split(".")[0]
 
 
-def get_realtime_quotes(code_list, open_only=False):
-    import tushare as ts
+INDEX_SYMBOLS = ["sh", "sz", "hs300", "sz50", "zxb", "cyb"]
 
-    max_len = 800
-    loop_cnt = int(math.ceil(float(len(code_list)) / max_len))
 
-    total_df = reduce(lambda df1, df2: df1.append(df2),
-                      [ts.get_realtime_quotes([code for code in code_list[i::loop_cnt]])
-                       for i in range(loop_cnt)])
-    total_df["is_index"] = False
+def get_realtime_quotes(code_list):
+    """
+    获取股票及主要指数的实时行情, 不做解析, 由 QuoteTable 统一进行向量化的解析
 
-    index_symbol = ["sh", "sz", "hs300", "sz50", "zxb", "cyb"]
-    index_df = ts.get_realtime_quotes(index_symbol)
-    index_df["code"] = index_symbol
-    index_df["is_index"] = True
-    total_df = total_df.append(index_df)
-    total_df = total_df.set_index("code").sort_index()
-
-    columns = set(total_df.columns) - set(["name", "time", "date"])
-    # columns = filter(lambda x: "_v" not in x, columns)
-    for label in columns:
-        total_df[label] = total_df[label].map(lambda x: 0 if str(x).strip() == "" else x)
-        total_df[label] = total_df[label].astype(float)
-
-    total_df["chg"] = total_df["price"] / total_df["pre_close"] - 1
-
-    total_df["order_book_id"] = total_df.index
-    total_df["order_book_id"] = total_df["order_book_id"].apply(tushare_code_2_order_book_id)
-
-    total_df["datetime"] = total_df["date"] + " " + total_df["time"]
-    total_df["datetime"] = total_df["datetime"].apply(lambda x: convert_dt_to_int(datetime.datetime.strptime(x, "%Y-%m-%d %H:%M:%S")))
-
-    total_df["close"] = total_df["price"]
+    :return: `pandas.DataFrame`, 值为 tushare 返回的字符串, 另有 is_index 列
+    """
+    import tushare as ts
 
-    if open_only:
-        total_df = total_df[total_df.open > 0]
+    max_len = 800
+    dfs = []
+    for i in range(0, len(code_list), max_len):
+        df = ts.get_realtime_quotes(code_list[i:i + max_len])
+        df["is_index"] = False
+        dfs.append(df)
+
+    index_df = ts.get_realtime_quotes(INDEX_SYMBOLS)
+    index_df["code"] = INDEX_SYMBOLS
+    index_df["is_index"] = True
+    dfs.append(index_df)
 
-    return total_df
+    return pd.concat(dfs, ignore_index=True)
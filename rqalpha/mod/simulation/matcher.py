@@ -42,107 +42,242 @@ class Matcher(object):
         self._calendar_dt = calendar_dt
         self._trading_dt = trading_dt
 
-    def match(self, open_orders):  # 撮合订单
+    def match(self, open_orders):  # 撮合订单, 按提交顺序逐个撮合, 每个标的的行情状态只计算一次
+        event_bus = Environment.get_instance().event_bus
+        states = {}
         for account, order in open_orders:
-            slippage_decider = account.slippage_decider  # 获取账户的滑点
-            commission_decider = account.commission_decider  # 获取账户的佣金
-            tax_decider = account.tax_decider  # 获取账户的印花税
-
-            bar = self._board[order.order_book_id]  # 此股今日的BAR
-            bar_status = bar._bar_status
-
-            if bar_status == BAR_STATUS.ERROR:
-                listed_date = bar.instrument.listed_date.date()
-                if listed_date == self._trading_dt.date():
-                    reason = _("Order Cancelled: current security [{order_book_id}] can not be traded in listed date [{listed_date}]").format(
-                        order_book_id=order.order_book_id,
-                        listed_date=listed_date,
-                    )
-                else:
-                    reason = _("Order Cancelled: current bar [{order_book_id}] miss market data.").format(
-                        order_book_id=order.order_book_id)
+            order_book_id = order.order_book_id
+            try:
+                state = states[order_book_id]
+            except KeyError:
+                state = states[order_book_id] = self._instrument_state(order_book_id)
+            self._match_order(account, order, state, event_bus)
+
+    def _instrument_state(self, order_book_id):  # 计算标的在当前 bar 的撮合参数, 同一标的的委托单共用
+        bar = self._board[order_book_id]  # 此股今日的BAR
+        bar_status = bar._bar_status  # 比较耗费性能, 每个标的只计算一次
+
+        if bar_status == BAR_STATUS.ERROR:
+            listed_date = bar.instrument.listed_date.date()
+            if listed_date == self._trading_dt.date():
+                reason = _("Order Cancelled: current security [{order_book_id}] can not be traded in listed date [{listed_date}]").format(
+                    order_book_id=order_book_id,
+                    listed_date=listed_date,
+                )
+            else:
+                reason = _("Order Cancelled: current bar [{order_book_id}] miss market data.").format(
+                    order_book_id=order_book_id)
+            return reason, None, None, None, None, None, None, None
+
+        deal_price = self._deal_price_decider(bar)  # 撮合的价格
+        buy_blocked = self._bar_limit and bar_status == BAR_STATUS.LIMIT_UP  # 涨停, 不能买入
+        sell_blocked = self._bar_limit and bar_status == BAR_STATUS.LIMIT_DOWN  # 跌停, 不能卖出
+        volume_cap = round(bar.volume * self._volume_percent)  # 该bar可成交股数的上限
+        round_lot = bar.instrument.round_lot  # 操作单位股数
+        return None, deal_price, bar.limit_up, bar.limit_down, buy_blocked, sell_blocked, volume_cap, round_lot
+
+    def _match_order(self, account, order, state, event_bus):  # 撮合单个委托单
+        reason, deal_price, limit_up, limit_down, buy_blocked, sell_blocked, volume_cap, round_lot = state
+        if reason is not None:
+            order._mark_rejected(reason)
+            return
+
+        order_book_id = order.order_book_id
+        if order.type == ORDER_TYPE.LIMIT:
+            if order.price > limit_up:
+                reason = _(
+                    "Order Rejected: limit order price {limit_price} is higher than limit up {limit_up}."
+                ).format(
+                    limit_price=order.price,
+                    limit_up=limit_up
+                )
                 order._mark_rejected(reason)
+                return
+
+            if order.price < limit_down:
+                reason = _(
+                    "Order Rejected: limit order price {limit_price} is lower than limit down {limit_down}."
+                ).format(
+                    limit_price=order.price,
+                    limit_down=limit_down
+                )
+                order._mark_rejected(reason)
+                return
+
+            if order.side == SIDE.BUY and order.price < deal_price:
+                return
+            if order.side == SIDE.SELL and order.price > deal_price:
+                return
+        else:  # 市价单
+            if order.side == SIDE.BUY and buy_blocked:  # 涨停, 拒买单
+                reason = _(
+                    "Order Cancelled: current bar [{order_book_id}] reach the limit_up price."
+                ).format(order_book_id=order_book_id)
+                order._mark_rejected(reason)  # 拒单
+                return
+            elif order.side == SIDE.SELL and sell_blocked:  # 跌停, 拒卖单
+                reason = _(
+                    "Order Cancelled: current bar [{order_book_id}] reach the limit_down price."
+                ).format(order_book_id=order_book_id)
+                order._mark_rejected(reason)  # 拒单
+                return
+
+        if order.side == SIDE.BUY and buy_blocked:
+            return
+        if order.side == SIDE.SELL and sell_blocked:
+            return
+
+        volume_limit = volume_cap - self._turnover[order_book_id]  # 可操作的股数的上限
+        volume_limit = (volume_limit // round_lot) * round_lot  # 规整后的可操作的股数的上限
+        if volume_limit <= 0:  # 标的成交量不符合该订单的需求量
+            if order.type == ORDER_TYPE.MARKET:
+                reason = _('Order Cancelled: market order {order_book_id} volume {order_volume}'
+                           ' due to volume limit').format(
+                    order_book_id=order_book_id,
+                    order_volume=order.quantity
+                )
+                order._mark_cancelled(reason)
+            return
+        # 到此处, 订单撮合成功, 可以生成成交记录
+        unfilled = order.unfilled_quantity  # 订单未成交股数
+        fill = min(unfilled, volume_limit)  # 限制成交的股数, 一般不会触发
+        ct_amount = account.portfolio.positions[order_book_id]._cal_close_today_amount(fill, order.side)
+        price = account.slippage_decider.get_trade_price(order, deal_price)  # 加上滑点, 计算最终的订单价格
+        trade = Trade.__from_create__(order=order, calendar_dt=self._calendar_dt, trading_dt=self._trading_dt,
+                                      price=price, amount=fill, close_today_amount=ct_amount)  # 生成成交记录
+        trade._commission = account.commission_decider.get_commission(trade)  # 成交记录佣金更新
+        trade._tax = account.tax_decider.get_tax(trade)  # # 成交记录印花税更新
+        order._fill(trade)  # 根据成交填补订单, 股数成交完毕则修改订单状态为成交完毕
+        self._turnover[order_book_id] += fill  # 更新该标的今天成交的股数
+
+        event_bus.publish_event(EVENT.TRADE, account, trade)  # 触发成交后事件, 主要是更新账户的Portfolio, Position等信息
+
+        if order.type == ORDER_TYPE.MARKET and order.unfilled_quantity != 0:
+            reason = _(
+                "Order Cancelled: market order {order_book_id} volume {order_volume} is"
+                " larger than {volume_percent_limit} percent of current bar volume, fill {filled_volume} actually"
+            ).format(
+                order_book_id=order_book_id,
+                order_volume=order.quantity,
+                volume_percent_limit='{:g}'.format(self._volume_percent * 100),
+                filled_volume=order.filled_quantity
+            )
+            order._mark_cancelled(reason)
+
+
+# tick 撮合机制: 买单按卖一价成交, 卖单按买一价成交, 没有盘口时使用最新价
+class TickMatcher(object):
+    def __init__(self,
+                 bar_limit=True,
+                 volume_percent=0.25):
+        self._ticks = {}  # 各标的最新的 tick
+        self._tick_volume = {}  # 各标的最新 tick 相对上一笔 tick 的成交量增量
+        self._turnover = defaultdict(int)  # 最新 tick 内本策略已经成交的数量
+        self._side_turnover = defaultdict(int)  # (标的, 方向) -> 最新 tick 内该方向已经成交的数量
+        self._calendar_dt = None
+        self._trading_dt = None
+        self._volume_percent = volume_percent  # 成交量占每笔 tick 成交量增量的上限
+        self._bar_limit = bar_limit
+
+    def reset(self):  # 交易日切换时清空盘口状态
+        self._ticks.clear()
+        self._tick_volume.clear()
+        self._turnover.clear()
+        self._side_turnover.clear()
+
+    def update(self, calendar_dt, trading_dt, tick):
+        order_book_id = tick.order_book_id
+        last_tick = self._ticks.get(order_book_id)
+        volume = tick.volume
+        if last_tick is None or volume < last_tick.volume:
+            self._tick_volume[order_book_id] = volume
+        else:
+            self._tick_volume[order_book_id] = volume - last_tick.volume
+        self._ticks[order_book_id] = tick
+        self._turnover[order_book_id] = 0
+        self._side_turnover[order_book_id, SIDE.BUY] = 0
+        self._side_turnover[order_book_id, SIDE.SELL] = 0
+        self._calendar_dt = calendar_dt
+        self._trading_dt = trading_dt
+
+    def match(self, open_orders):  # 撮合订单
+        data_proxy = Environment.get_instance().data_proxy
+        for account, order in open_orders:
+            order_book_id = order.order_book_id
+            tick = self._ticks.get(order_book_id)
+            if tick is None:  # 还没有收到该标的的行情, 等待下一笔 tick
                 continue
 
-            deal_price = self._deal_price_decider(bar)  # 撮合的价格
+            limit_up, limit_down = tick.limit_up, tick.limit_down
+            if order.side == SIDE.BUY:
+                deal_price = tick.ask if tick.ask > 0 else tick.last
+                book_volume = tick.ask_volume
+                reach_limit = self._bar_limit and limit_up > 0 and tick.last >= limit_up
+            else:
+                deal_price = tick.bid if tick.bid > 0 else tick.last
+                book_volume = tick.bid_volume
+                reach_limit = self._bar_limit and limit_down > 0 and tick.last <= limit_down
+
             if order.type == ORDER_TYPE.LIMIT:
-                if order.price > bar.limit_up:
+                if limit_up > 0 and order.price > limit_up:
                     reason = _(
                         "Order Rejected: limit order price {limit_price} is higher than limit up {limit_up}."
                     ).format(
                         limit_price=order.price,
-                        limit_up=bar.limit_up
+                        limit_up=limit_up
                     )
                     order._mark_rejected(reason)
                     continue
 
-                if order.price < bar.limit_down:
+                if limit_down > 0 and order.price < limit_down:
                     reason = _(
                         "Order Rejected: limit order price {limit_price} is lower than limit down {limit_down}."
                     ).format(
                         limit_price=order.price,
-                        limit_down=bar.limit_down
+                        limit_down=limit_down
                     )
                     order._mark_rejected(reason)
                     continue
 
+                # 限价单只有在价格穿越时才成交
                 if order.side == SIDE.BUY and order.price < deal_price:
                     continue
                 if order.side == SIDE.SELL and order.price > deal_price:
                     continue
-            else:  # 市价单
-                if self._bar_limit and order.side == SIDE.BUY and bar_status == BAR_STATUS.LIMIT_UP:  # 涨停, 拒买单
+            elif reach_limit:
+                if order.side == SIDE.BUY:
                     reason = _(
                         "Order Cancelled: current bar [{order_book_id}] reach the limit_up price."
-                    ).format(order_book_id=order.order_book_id)
-                    order._mark_rejected(reason)  # 拒单
-                    continue
-                elif self._bar_limit and order.side == SIDE.SELL and bar_status == BAR_STATUS.LIMIT_DOWN:  # 跌停, 拒卖单
+                    ).format(order_book_id=order_book_id)
+                else:
                     reason = _(
                         "Order Cancelled: current bar [{order_book_id}] reach the limit_down price."
-                    ).format(order_book_id=order.order_book_id)
-                    order._mark_rejected(reason)  # 拒单
-                    continue
+                    ).format(order_book_id=order_book_id)
+                order._mark_rejected(reason)
+                continue
 
-            if self._bar_limit:
-                if order.side == SIDE.BUY and bar_status == BAR_STATUS.LIMIT_UP:  # 涨停, 拒买单
-                    continue
-                if order.side == SIDE.SELL and bar_status == BAR_STATUS.LIMIT_DOWN:  # 跌停, 拒卖单
-                    continue
+            if reach_limit:
+                continue
 
-            volume_limit = round(bar.volume * self._volume_percent) - self._turnover[order.order_book_id]  # 可操作的股数的上限
-            round_lot = bar.instrument.round_lot  # 操作单位股数
-            volume_limit = (volume_limit // round_lot) * round_lot  # 规整后的可操作的股数的上限
-            if volume_limit <= 0:  # 标的成交量不符合该订单的需求量
-                if order.type == ORDER_TYPE.MARKET:
-                    reason = _('Order Cancelled: market order {order_book_id} volume {order_volume}'
-                               ' due to volume limit').format(
-                        order_book_id=order.order_book_id,
-                        order_volume=order.quantity
-                    )
-                    order._mark_cancelled(reason)
+            # 单笔 tick 的可成交量: 成交量增量的一定比例, 且不超过对手盘一档挂单量; 买卖双方各自消耗对手盘的挂单
+            volume_limit = round(self._tick_volume[order_book_id] * self._volume_percent) - \
+                self._turnover[order_book_id]
+            if book_volume > 0:
+                volume_limit = min(volume_limit, book_volume - self._side_turnover[order_book_id, order.side])
+            round_lot = data_proxy.instruments(order_book_id).round_lot
+            volume_limit = (volume_limit // round_lot) * round_lot
+            if volume_limit <= 0:  # 市价单不撤单, 留待后续 tick 继续成交
                 continue
-            # 到此处, 订单撮合成功, 可以生成成交记录
-            unfilled = order.unfilled_quantity  # 订单未成交股数
-            fill = min(unfilled, volume_limit)  # 限制成交的股数, 一般不会触发
-            ct_amount = account.portfolio.positions[order.order_book_id]._cal_close_today_amount(fill, order.side)
-            price = slippage_decider.get_trade_price(order, deal_price)  # 加上滑点, 计算最终的订单价格
-            trade = Trade.__from_create__(order=order, calendar_dt=self._calendar_dt, trading_dt=self._trading_dt,
-                                          price=price, amount=fill, close_today_amount=ct_amount)  # 生成成交记录
-            trade._commission = commission_decider.get_commission(trade)  # 成交记录佣金更新
-            trade._tax = tax_decider.get_tax(trade)  # # 成交记录印花税更新
-            order._fill(trade)  # 根据成交填补订单, 股数成交完毕则修改订单状态为成交完毕
-            self._turnover[order.order_book_id] += fill  # 更新该标的今天成交的股数
 
-            Environment.get_instance().event_bus.publish_event(EVENT.TRADE, account, trade)  # 触发成交后事件, 主要是更新账户的Portfolio, Position等信息
+            fill = min(order.unfilled_quantity, volume_limit)
+            ct_amount = account.portfolio.positions[order_book_id]._cal_close_today_amount(fill, order.side)
+            price = account.slippage_decider.get_trade_price(order, deal_price)
+            trade = Trade.__from_create__(order=order, calendar_dt=self._calendar_dt, trading_dt=self._trading_dt,
+                                          price=price, amount=fill, close_today_amount=ct_amount)
+            trade._commission = account.commission_decider.get_commission(trade)
+            trade._tax = account.tax_decider.get_tax(trade)
+            order._fill(trade)
+            self._turnover[order_book_id] += fill
+            self._side_turnover[order_book_id, order.side] += fill
 
-            if order.type == ORDER_TYPE.MARKET and order.unfilled_quantity != 0:
-                reason = _(
-                    "Order Cancelled: market order {order_book_id} volume {order_volume} is"
-                    " larger than 25 percent of current bar volume, fill {filled_volume} actually"
-                ).format(
-                    order_book_id=order.order_book_id,
-                    order_volume=order.quantity,
-                    filled_volume=order.filled_quantity
-                )
-                order._mark_cancelled(reason)
+            Environment.get_instance().event_bus.publish_event(EVENT.TRADE, account, trade)
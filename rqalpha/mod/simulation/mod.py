@@ -15,6 +15,7 @@
 # limitations under the License.
 
 from rqalpha.interface import AbstractMod
+from rqalpha.data.tick_data_source import TickDataSource
 
 from .simulation_broker import SimulationBroker
 from .simulation_event_source import SimulationEventSource
@@ -28,6 +29,9 @@ class SimulationMod(AbstractMod):
         self._env = env
         self._env.set_broker(SimulationBroker(self._env)) # 给环境设置broker, 即模拟帐号
 
+        if env.config.base.frequency == 'tick' and not env.data_source:  # tick 回测需要能够提供 tick 数据的数据源
+            env.set_data_source(TickDataSource(env.config.base.data_bundle_path, mod_config.tick_data_path))
+
         event_source = SimulationEventSource(env, env.config.base.account_list)
         env.set_event_source(event_source)
 
@@ -19,13 +19,14 @@ import jsonpickle
 from rqalpha.interface import AbstractBroker, Persistable
 from rqalpha.utils import get_account_type
 from rqalpha.utils.i18n import gettext as _
+from rqalpha.utils import state_codec
 from rqalpha.events import EVENT
-from rqalpha.const import MATCHING_TYPE, ORDER_STATUS
+from rqalpha.const import MATCHING_TYPE, ORDER_STATUS, SIDE
 from rqalpha.const import ACCOUNT_TYPE
 from rqalpha.environment import Environment
 from rqalpha.model.account import BenchmarkAccount, StockAccount, FutureAccount
 
-from .matcher import Matcher
+from .matcher import Matcher, TickMatcher
 
 # 账户初始化
 def init_accounts(env):
@@ -53,11 +54,17 @@ def init_accounts(env):
 class SimulationBroker(AbstractBroker, Persistable):
     def __init__(self, env):
         self._env = env
-        if env.config.base.matching_type == MATCHING_TYPE.CURRENT_BAR_CLOSE:  # 当日收盘交易
-            self._matcher = Matcher(lambda bar: bar.close, env.config.validator.bar_limit)
+        self._tick_mode = env.config.base.frequency == 'tick'
+        if self._tick_mode:  # tick 回测, current_bar 按当前 tick 盘口撮合, next_bar 按下一笔 tick 撮合
+            self._matcher = TickMatcher(env.config.validator.bar_limit, env.config.base.volume_percent)
+            self._match_immediately = env.config.base.matching_type == MATCHING_TYPE.CURRENT_BAR_CLOSE
+        elif env.config.base.matching_type == MATCHING_TYPE.CURRENT_BAR_CLOSE:  # 当日收盘交易
+            self._matcher = Matcher(lambda bar: bar.close, env.config.validator.bar_limit,
+                                    env.config.base.volume_percent)
             self._match_immediately = True
         else:  # 下日开盘交易
-            self._matcher = Matcher(lambda bar: bar.open, env.config.validator.bar_limit)
+            self._matcher = Matcher(lambda bar: bar.open, env.config.validator.bar_limit,
+                                    env.config.base.volume_percent)
             self._match_immediately = False
 
         self._accounts = None
@@ -85,10 +92,10 @@ class SimulationBroker(AbstractBroker, Persistable):
         return self._open_orders
 
     def get_state(self):
-        return jsonpickle.dumps([o.order_id for _, o in self._delayed_orders]).encode('utf-8')
+        return state_codec.dumps([o.order_id for _, o in self._delayed_orders], jsonpickle.dumps)
 
     def set_state(self, state):
-        delayed_orders = jsonpickle.loads(state.decode('utf-8'))
+        delayed_orders = state_codec.loads(state, jsonpickle.loads)
         for account in self._accounts.values():
             for o in account.daily_orders.values():
                 if not o._is_final():
@@ -102,24 +109,36 @@ class SimulationBroker(AbstractBroker, Persistable):
         return self._accounts[account_type]
 
     def submit_order(self, order):  # 提交订单
+        if self._submit(order) and self._match_immediately:
+            self._match()  # 在此撮合订单
+
+    def submit_orders(self, orders):  # 批量提交订单, 只撮合一次
+        # 卖单先于买单校验和撮合, 与逐个下单时卖出后再买入的资金顺序保持一致
+        orders = sorted(orders, key=lambda o: 0 if o.side == SIDE.SELL else 1)
+        submitted = False
+        for order in orders:
+            submitted = self._submit(order) or submitted
+        if submitted and self._match_immediately:
+            self._match()
+
+    def _submit(self, order):  # 校验并登记订单, 返回订单是否进入待撮合队列
         account = self._get_account_for(order.order_book_id)  # 获取相应账户
 
         self._env.event_bus.publish_event(EVENT.ORDER_PENDING_NEW, account, order)  # 触发创建订单事件
 
         account.append_order(order)  # 向账户中添加该订单
         if order._is_final():
-            return
+            return False
 
         # account.on_order_creating(order)
         if self._env.config.base.frequency == '1d' and not self._match_immediately:
             self._delayed_orders.append((account, order))
-            return
+            return False
 
         self._open_orders.append((account, order))
         order._active()  # 激活委托单, 可以被交易
         self._env.event_bus.publish_event(EVENT.ORDER_CREATION_PASS, account, order)  # 触发订单创建成功事件
-        if self._match_immediately:
-            self._match()  # 在此撮合订单
+        return True
 
     def cancel_order(self, order):
         account = self._get_account_for(order.order_book_id)
@@ -132,6 +151,7 @@ class SimulationBroker(AbstractBroker, Persistable):
         self._env.event_bus.publish_event(EVENT.ORDER_CANCELLATION_PASS, account, order)
 
         # account.on_order_cancellation_pass(order)
+        account.commission_decider.release([order])
         try:
             self._open_orders.remove((account, order))
         except ValueError:
@@ -141,6 +161,8 @@ class SimulationBroker(AbstractBroker, Persistable):
                 pass
 
     def before_trading(self):
+        if self._tick_mode:
+            self._matcher.reset()
         for account, order in self._open_orders:
             order._active()
             self._env.event_bus.publish_event(EVENT.ORDER_CREATION_PASS, account, order)
@@ -151,6 +173,7 @@ class SimulationBroker(AbstractBroker, Persistable):
                 order_book_id=order.order_book_id
             ))
             self._env.event_bus.publish_event(EVENT.ORDER_UNSOLICITED_UPDATE, account, order)
+            account.commission_decider.release([order])  # 收盘被拒的订单不再成交, 释放手续费记录
         self._open_orders = self._delayed_orders
         self._delayed_orders = []
 
@@ -159,18 +182,20 @@ class SimulationBroker(AbstractBroker, Persistable):
         self._matcher.update(env.calendar_dt, env.trading_dt, bar_dict)
         self._match()  # 委托单撮合
 
-    def tick(self, tick):
-        # TODO support tick matching
-        pass
-        # env = Environment.get_instance()
-        # self._matcher.update(env.calendar_dt, env.trading_dt, tick)
-        # self._match()
+    def tick(self, tick):  # 更新盘口, 只撮合该 tick 对应标的的委托单
+        env = Environment.get_instance()
+        self._matcher.update(env.calendar_dt, env.trading_dt, tick)
+        self._match(tick.order_book_id)
 
-    def _match(self):  # 撮合订单
-        self._matcher.match(self._open_orders)  # 在此撮合委托单
+    def _match(self, order_book_id=None):  # 撮合订单
+        if order_book_id is None:
+            self._matcher.match(self._open_orders)  # 在此撮合委托单
+        else:
+            self._matcher.match([(a, o) for a, o in self._open_orders if o.order_book_id == order_book_id])
         final_orders = [(a, o) for a, o in self._open_orders if o._is_final()]  # 处理完毕的单子
         self._open_orders = [(a, o) for a, o in self._open_orders if not o._is_final()]  # 剩余的待处理的单子
 
         for account, order in final_orders:
             if order.status == ORDER_STATUS.REJECTED or order.status == ORDER_STATUS.CANCELLED:  # 对于被拒以及取消的单子
                 self._env.event_bus.publish_event(EVENT.ORDER_UNSOLICITED_UPDATE, account, order)
+            account.commission_decider.release([order])  # 终态订单不再成交, 释放手续费记录
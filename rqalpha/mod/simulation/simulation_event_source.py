@@ -16,8 +16,12 @@
 
 import datetime
 
+import numpy as np
+
 from rqalpha.interface import AbstractEventSource
 from rqalpha.events import Event, EVENT
+from rqalpha.model.tick import Tick
+from rqalpha.data.tick_store import TICK_DTYPE
 from rqalpha.environment import Environment
 from rqalpha.utils import get_account_type
 from rqalpha.utils.exception import CustomException, CustomError, patch_user_exc
@@ -80,9 +84,85 @@ class SimulationEventSource(AbstractEventSource):
             elif account_type == ACCOUNT_TYPE.FUTURE:
                 trading_minutes = trading_minutes.union(self._get_future_trading_minutes(trading_date))
         return sorted(list(trading_minutes))
+
+    def _merge_ticks(self, trading_date, order_book_ids, after_dt_int=None):
+        # 将多个合约当日的 tick 按时间归并成一条流, 返回 (时间数组, 合约数组, tick数组), 三者一一对应
+        data_proxy = self._env.data_proxy
+        owners, ticks_list = [], []
+        for order_book_id in order_book_ids:
+            ticks = data_proxy.get_ticks(data_proxy.instruments(order_book_id), trading_date)
+            if after_dt_int is not None:
+                ticks = ticks[ticks['datetime'].searchsorted(after_dt_int, side='right'):]
+            if len(ticks) == 0:
+                continue
+            owners.append(np.full(len(ticks), order_book_id, dtype=object))
+            ticks_list.append(ticks)
+        if not ticks_list:
+            return self._concat_ticks([], [])
+        return self._concat_ticks(owners, ticks_list)
+
+    @staticmethod
+    def _concat_ticks(owners, ticks_list):
+        if not ticks_list:
+            return np.empty(0, dtype=np.uint64), np.empty(0, dtype=object), np.empty(0, dtype=TICK_DTYPE)
+        ticks = np.concatenate(ticks_list)
+        owners = np.concatenate(owners)
+        index = np.argsort(ticks['datetime'], kind='mergesort')  # 稳定排序, 同一时刻的 tick 保持原有先后顺序
+        ticks = ticks[index]
+        return ticks['datetime'], owners[index], ticks
+
+    def _tick_events(self, start_date, end_date):
+        for day in self._env.data_proxy.get_trading_dates(start_date, end_date):
+            date = day.to_pydatetime()
+            dt_before_day_trading = date.replace(hour=8, minute=30)
+            before_trading_flag = True
+
+            order_book_ids = set(self._get_universe())
+            dts, owners, ticks = self._merge_ticks(date.date(), order_book_ids)
+            dt_list, owner_list = dts.tolist(), owners.tolist()
+            i = 0
+            while i < len(dt_list):
+                calendar_dt = convert_int_to_datetime(dt_list[i])
+                if calendar_dt < dt_before_day_trading:  # 夜盘 tick 归属于当前交易日
+                    trading_dt = calendar_dt.replace(year=date.year, month=date.month, day=date.day)
+                else:
+                    trading_dt = calendar_dt
+                if before_trading_flag:
+                    before_trading_flag = False
+                    before_trading_dt = trading_dt - datetime.timedelta(minutes=30)
+                    yield Event(EVENT.BEFORE_TRADING, before_trading_dt, before_trading_dt)
+                yield Event(EVENT.TICK, calendar_dt, trading_dt, {'tick': Tick(owner_list[i], calendar_dt, ticks[i])})
+                i += 1
+
+                if self._universe_changed:
+                    # 股票池变化后, 剔除已移出合约的 tick, 并将新增合约之后的 tick 并入剩余的 tick 流
+                    self._universe_changed = False
+                    universe = set(self._get_universe())
+                    added = universe - order_book_ids
+                    order_book_ids = universe
+                    keep = np.array([o in universe for o in owner_list[i:]], dtype=bool)
+                    _, new_owners, new_ticks = self._merge_ticks(date.date(), added, dt_list[i - 1])
+                    dts, owners, ticks = self._concat_ticks([owners[i:][keep], new_owners],
+                                                            [ticks[i:][keep], new_ticks])
+                    dt_list, owner_list = dts.tolist(), owners.tolist()
+                    i = 0
+
+            if before_trading_flag:
+                dt = date.replace(hour=9, minute=0)
+                yield Event(EVENT.BEFORE_TRADING, dt, dt)
+
+            dt = date.replace(hour=15, minute=30)
+            yield Event(EVENT.AFTER_TRADING, dt, dt)
+
+            dt = date.replace(hour=17, minute=0)
+            yield Event(EVENT.SETTLEMENT, dt, dt)
     # 事件生成器, 按日回测会产生 BEFORE_TRADING | BAR | AFTER_TRADING | SETTLEMENT(结算)
     def events(self, start_date, end_date, frequency):
-        if frequency == "1d":
+        if frequency == "tick":
+            # 按 tick 回放: BEFORE_TRADING | TICK ... | AFTER_TRADING | SETTLEMENT
+            for e in self._tick_events(start_date, end_date):
+                yield e
+        elif frequency == "1d":
             # 根据起始日期和结束日期，获取所有的交易日，然后再循环获取每一个交易日
             for day in self._env.data_proxy.get_trading_dates(start_date, end_date):
                 date = day.to_pydatetime()  # datetime.datetime格式
@@ -18,13 +18,14 @@ import six
 from collections import OrderedDict
 
 from ..portfolio import init_portfolio
+from ..portfolio.portfolio_history import PortfolioHistory
 from ..slippage import init_slippage
 from ..tax import init_tax
 from ..trade import Trade
 from ..order import Order
 from ...execution_context import ExecutionContext
 from ...interface import Persistable
-from ...utils import json as json_utils
+from ...utils import state_codec
 from ...events import EVENT
 
 
@@ -35,12 +36,13 @@ class BaseAccount(Persistable):
         self.config = env.config
 
         self.portfolio = init_portfolio(init_cash, start_date, account_type)
-        self.slippage_decider = init_slippage(env.config.base.slippage)  # 滑点设置
+        self.slippage_decider = init_slippage(env.config.base.slippage, env.config.base.slippage_model,
+                                              env.config.base.slippage_params)  # 滑点设置
         commission_initializer = env._commission_initializer
         self.commission_decider = commission_initializer(self._account_type, env.config.base.commission_multiplier)  # 佣金初始化
         self.tax_decider = init_tax(self._account_type)  # 印花税初始化
 
-        self.all_portfolios = OrderedDict()
+        self.all_portfolios = PortfolioHistory()  # 按列存储的每日组合快照
         self.daily_orders = {}  # 每日的订单, 类方法before_trading每日清理结束的订单, 留下未完成订单
         self.daily_trades = []  # 每日的成交单, 类方法before_trading每日清空
         self._last_trade_id = 0
@@ -73,25 +75,130 @@ class BaseAccount(Persistable):
         # 成交
         self._env.event_bus.add_listener(EVENT.TRADE, self.trade)
 
+        # 增量保存: 分别记录自上次保存后组合、各订单、成交单及 last_trade_id 是否变化
+        self._portfolio_dirty = True
+        self._dirty_order_ids = set()
+        self._persisted_trades = None
+        self._persisted_last_trade_id = None
+        for event in (EVENT.BEFORE_TRADING, EVENT.AFTER_TRADING, EVENT.SETTLEMENT):
+            self._env.event_bus.add_listener(event, self._mark_dirty)
+        # 没有持仓时行情不会改变账户状态
+        self._env.event_bus.add_listener(EVENT.BAR, self._mark_dirty_if_holding)
+        self._env.event_bus.add_listener(EVENT.TICK, self._mark_dirty_if_holding)
+        # 创建、拒绝、撤销订单时会冻结或解冻资金, 其余订单事件只改变订单本身
+        for event in (EVENT.ORDER_PENDING_NEW, EVENT.ORDER_CREATION_REJECT, EVENT.ORDER_CANCELLATION_PASS,
+                      EVENT.ORDER_UNSOLICITED_UPDATE):
+            self._env.event_bus.add_listener(event, self._mark_order_and_portfolio_dirty)
+        for event in (EVENT.ORDER_CREATION_PASS, EVENT.ORDER_PENDING_CANCEL, EVENT.ORDER_CANCELLATION_REJECT):
+            self._env.event_bus.add_listener(event, self._mark_order_dirty)
+        self._env.event_bus.add_listener(EVENT.TRADE, self._mark_trade_dirty)
+
     def set_state(self, state):
-        persist_dict = json_utils.convert_json_to_dict(state.decode('utf-8'))
+        persist_dict = state_codec.loads(state)
         self.portfolio.restore_from_dict_(persist_dict['portfolio'])
 
         del self.daily_trades[:]
         self.daily_orders.clear()
 
-        for order_id, order_dict in six.iteritems(persist_dict["daily_orders"]):
-            self.daily_orders[order_id] = Order.__from_dict__(order_dict)
+        # json 格式下 daily_orders 的 key 为字符串, 二进制格式下为整数, 统一以订单的 order_id 为 key
+        for order_dict in six.itervalues(persist_dict["daily_orders"]):
+            order = Order.__from_dict__(order_dict)
+            self.daily_orders[order.order_id] = order
 
         for trade_dict in persist_dict["daily_trades"]:
-            trade = Trade.__from_dict__(trade_dict, self.daily_orders[str(trade_dict["_order_id"])])
+            trade = Trade.__from_dict__(trade_dict, self.daily_orders[int(trade_dict["_order_id"])])
             self.daily_trades.append(trade)
 
         if 'last_trade_id' in persist_dict:
             self._last_trade_id = persist_dict['last_trade_id']
+        self.mark_clean()
 
     def get_state(self):
-        return json_utils.convert_dict_to_json(self.__to_dict__()).encode('utf-8')
+        return state_codec.dumps(self.__to_dict__())
+
+    def _mark_dirty(self, *args):
+        self._portfolio_dirty = True
+
+    def _mark_dirty_if_holding(self, *args):
+        if len(self.portfolio.positions) > 0:
+            self._portfolio_dirty = True
+
+    def _mark_order_dirty(self, account, order):
+        if account is self:
+            self._dirty_order_ids.add(order.order_id)
+
+    def _mark_order_and_portfolio_dirty(self, account, order):
+        if account is self:
+            self._portfolio_dirty = True
+            self._dirty_order_ids.add(order.order_id)
+
+    def _mark_trade_dirty(self, account, trade):
+        if account is self:
+            self._portfolio_dirty = True
+            self._dirty_order_ids.add(trade.order.order_id)
+
+    def _trades_signature(self):
+        # 成交单每日只追加, 用数量和最后一笔成交的 id 判断是否变化
+        if not self.daily_trades:
+            return 0, None
+        return len(self.daily_trades), self.daily_trades[-1].exec_id
+
+    def is_dirty(self):
+        return self._portfolio_dirty or bool(self._dirty_order_ids) or \
+            self._trades_signature() != self._persisted_trades or \
+            self._last_trade_id != self._persisted_last_trade_id
+
+    def mark_clean(self):
+        self._portfolio_dirty = False
+        self._dirty_order_ids.clear()
+        self._persisted_trades = self._trades_signature()
+        self._persisted_last_trade_id = self._last_trade_id
+
+    def get_state_delta(self, full=False):
+        """
+        分部分保存账户状态: 组合、成交单、last_trade_id 各为一个部分, 每个订单一个部分, 只返回有变化的部分
+
+        :param bool full: 是否返回全部部分
+        :return: (全部部分名称的列表, OrderedDict: 有变化的部分名称 -> bytes)
+        """
+        changed = OrderedDict()
+        if full or self._portfolio_dirty:
+            changed['portfolio'] = state_codec.dumps(self.portfolio.__to_dict__())
+        if full or self._last_trade_id != self._persisted_last_trade_id:
+            changed['meta'] = state_codec.dumps({'last_trade_id': self._last_trade_id})
+        if full or self._trades_signature() != self._persisted_trades:
+            changed['trades'] = state_codec.dumps([trade.__to_dict__() for trade in self.daily_trades])
+
+        order_ids = self.daily_orders if full else self._dirty_order_ids
+        for order_id in order_ids:
+            order = self.daily_orders.get(order_id)
+            if order is not None:
+                changed['order.{}'.format(order_id)] = state_codec.dumps(order.__to_dict__())
+
+        parts = ['portfolio', 'meta', 'trades'] + ['order.{}'.format(order_id) for order_id in self.daily_orders]
+        return parts, changed
+
+    def set_state_parts(self, parts):
+        """
+        :param parts: OrderedDict, 部分名称 -> bytes, 与 `get_state_delta` 对应
+        """
+        states = {name: state_codec.loads(state) for name, state in six.iteritems(parts)}
+        self.portfolio.restore_from_dict_(states['portfolio'])
+
+        del self.daily_trades[:]
+        self.daily_orders.clear()
+
+        for name, order_dict in six.iteritems(states):
+            if name.startswith('order.'):
+                order = Order.__from_dict__(order_dict)
+                self.daily_orders[order.order_id] = order
+
+        for trade_dict in states['trades']:
+            trade = Trade.__from_dict__(trade_dict, self.daily_orders[int(trade_dict["_order_id"])])
+            self.daily_trades.append(trade)
+
+        self._last_trade_id = states['meta']['last_trade_id']
+        self.mark_clean()
 
     def __to_dict__(self):
         account_dict = {
@@ -104,7 +211,7 @@ class BaseAccount(Persistable):
 
     def portfolio_persist(self):
         trading_date = ExecutionContext.get_current_trading_dt().date()
-        self.all_portfolios[trading_date] = self.portfolio._clone()  # 将今天的组合信息保存在all_portfolios中
+        self.all_portfolios.append(trading_date, self.portfolio)  # 将今天的组合信息保存在all_portfolios中
 
     def get_portfolio(self, trading_date):
         return self.all_portfolios[trading_date]
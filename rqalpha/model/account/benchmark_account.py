@@ -40,14 +40,13 @@ class BenchmarkAccount(BaseAccount):
         if np.isnan(price):
             return
         portfolio = self.portfolio  # 基准组合信息
-        portfolio._portfolio_value = None
         position = portfolio.positions[self.benchmark]  # 基准仓位信息
 
         if portfolio.market_value == 0:
             trade_quantity = int(portfolio.cash / price)  # 可买入股数
             delta_value = trade_quantity * price  # 买入上面的股数需要的资金
             commission = 0.0008 * trade_quantity * price  # 交易产生的佣金
-            position._total_commission = commission  # 记录佣金
+            position._transaction_cost = commission  # 记录佣金
             position._buy_trade_quantity = trade_quantity  # 记录买入股数
             position._buy_trade_value = delta_value  # 记录买入资金
             position._market_value = delta_value  # 记录基准市值
@@ -15,6 +15,7 @@
 # limitations under the License.
 
 import six
+import numpy as np
 
 from ..margin import Margin
 from ...const import SIDE, POSITION_EFFECT, ACCOUNT_TYPE
@@ -56,26 +57,29 @@ class FutureAccount(BaseAccount):
         data_proxy = ExecutionContext.get_data_proxy()
         trading_date = ExecutionContext.get_current_trading_dt().date()
 
-        for order_book_id, position in six.iteritems(positions):
-            settle_price = data_proxy.get_settle_price(order_book_id, trading_date)
-            position._last_price = settle_price
-            self._update_market_value(position, settle_price)
+        # 一次性取出全部仓位的结算价, 与 Positions 中的行一一对应
+        settle_prices = data_proxy.get_settle_prices(positions._row_order_book_ids(), trading_date)
+        self._mark_to_market(positions, settle_prices, skip_nan=False)
 
         self.portfolio_persist()
 
         portfolio._yesterday_portfolio_value = portfolio.portfolio_value
 
+        # 结算价成为昨结算价, 当日平仓盈亏清零
+        n = len(settle_prices)
+        columns = positions._columns
+        columns['_prev_settle_price'][:n] = settle_prices
+        columns['_daily_realized_pnl'][:n] = 0
+        columns['_buy_daily_realized_pnl'][:n] = 0
+        columns['_sell_daily_realized_pnl'][:n] = 0
+
         de_listed_id_list = []
         for order_book_id, position in six.iteritems(positions):
             # 检查合约是否到期,如果到期,则按照结算价来进行平仓操作
             if position._de_listed_date is not None and trading_date >= position._de_listed_date.date():
                 de_listed_id_list.append(order_book_id)
-            else:
-                settle_price = data_proxy.get_settle_price(order_book_id, trading_date)
-                self._update_holding_by_settle(position, settle_price)
-                position._daily_realized_pnl = 0
-                position._buy_daily_realized_pnl = 0
-                position._sell_daily_realized_pnl = 0
+            elif position._buy_today_holding_list or position._sell_today_holding_list:
+                self._roll_today_holding(position)
         for de_listed_id in de_listed_id_list:
             if positions[de_listed_id]._quantity != 0:
                 user_system_log.warn(
@@ -89,11 +93,9 @@ class FutureAccount(BaseAccount):
         portfolio._portfolio_value = None
         positions = portfolio.positions
 
-        for order_book_id, position in six.iteritems(positions):
-            bar = bar_dict[order_book_id]
-            if not bar.isnan:
-                position._last_price = bar.close
-                self._update_market_value(position, bar.close)
+        prices = np.array([bar_dict[order_book_id].close for order_book_id in positions._row_order_book_ids()],
+                          dtype=np.float64)
+        self._mark_to_market(positions, prices)
 
     def tick(self, tick):
         portfolio = self.portfolio
@@ -192,8 +194,8 @@ class FutureAccount(BaseAccount):
         self._last_trade_id = trade.exec_id
 
     @staticmethod
-    def _update_holding_by_settle(position, settle_price):
-        position._prev_settle_price = settle_price
+    def _roll_today_holding(position):
+        # 今仓在结算后转为昨仓
         position._buy_old_holding_list += position._buy_today_holding_list
         position._sell_old_holding_list += position._sell_today_holding_list
         position._buy_today_holding_list = []
@@ -342,6 +344,32 @@ class FutureAccount(BaseAccount):
         position._sell_market_value = (bctq - sotq) * price * position._contract_multiplier
         position._market_value = position._buy_market_value + position._sell_market_value
 
+    @staticmethod
+    def _mark_to_market(positions, prices, skip_nan=True):
+        """
+        按列批量计算全部仓位的 last_price / market_value, 与 _update_market_value 的逐仓位计算一致
+
+        :param positions: 期货账户的 Positions
+        :param prices: 与 positions._row_order_book_ids() 一一对应的价格数组
+        :param bool skip_nan: 为 True 时价格为 nan 的仓位保持不变
+        """
+        n = len(prices)
+        if n == 0:
+            return
+        columns = positions._columns
+        multiplier = np.array([position._contract_multiplier for position in positions._rows], dtype=np.float64)
+        long_quantity = columns['_buy_open_trade_quantity'][:n] - columns['_sell_close_trade_quantity'][:n]
+        short_quantity = columns['_buy_close_trade_quantity'][:n] - columns['_sell_open_trade_quantity'][:n]
+        buy_market_value = long_quantity * prices * multiplier
+        sell_market_value = short_quantity * prices * multiplier
+
+        rows = ~np.isnan(prices) if skip_nan else slice(None)
+        columns['_last_price'][:n][rows] = prices[rows]
+        columns['_buy_market_value'][:n][rows] = buy_market_value[rows]
+        columns['_sell_market_value'][:n][rows] = sell_market_value[rows]
+        columns['_market_value'][:n][rows] = (buy_market_value + sell_market_value)[rows]
+        positions._refresh_market_value()
+
     def _cal_daily_realized_pnl(self, trade, cost_price, consumed_quantity):
         order = trade.order
         position = self.portfolio.positions[order.order_book_id]
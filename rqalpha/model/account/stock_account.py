@@ -15,6 +15,7 @@
 # limitations under the License.
 
 import six
+import numpy as np
 import pandas as pd
 
 from .base_account import BaseAccount
@@ -47,8 +48,6 @@ class StockAccount(BaseAccount):
     def after_trading(self):
         trading_date = ExecutionContext.get_current_trading_dt().date()
         portfolio = self.portfolio
-        # de_listed may occur
-        portfolio._portfolio_value = None
 
         positions = portfolio.positions
 
@@ -73,31 +72,25 @@ class StockAccount(BaseAccount):
 
     def settlement(self):  # 股票账户结算
         portfolio = self.portfolio
+        portfolio.positions._refresh_market_value()  # 每日结算时全量校准一次市值汇总
         trading_date = ExecutionContext.get_current_trading_dt().date()
         self.portfolio_persist()  # StockAccount中存储今天的PORTFOLIO
         portfolio._yesterday_portfolio_value = portfolio.portfolio_value  # 用今天的组合资金更新昨天的组合资金
         self._handle_dividend_ex_dividend(trading_date)  # 处理今天仓位的分红
 
     def bar(self, bar_dict):  # 更新仓位每支股票的仓位情况
-        portfolio = self.portfolio  # 股票账户组合信息
-        # invalidate cache
-        portfolio._portfolio_value = None
-        positions = portfolio.positions
-
-        for order_book_id, position in six.iteritems(positions):  # 更新仓位中每支股票的信息
-            bar = bar_dict[order_book_id]
-            if not bar.isnan:
-                position._market_value = position._quantity * bar.close  # 更新市值信息
-                position._last_price = bar.close  # 更新最新价格
+        positions = self.portfolio.positions  # 股票账户仓位信息
+        # 取出所有持仓的收盘价, 一次性更新全部仓位的最新价和市值
+        prices = np.array([bar_dict[order_book_id].close for order_book_id in positions._row_order_book_ids()],
+                          dtype=np.float64)
+        positions._mark_to_market(prices)
 
     def tick(self, tick):
         portfolio = self.portfolio
-        # invalidate cache
-        portfolio._portfolio_value = None
         position = portfolio.positions[tick.order_book_id]
 
-        position._market_value = position._quantity * tick.last_price
-        position._last_price = tick.last_price
+        position._market_value = position._quantity * tick.last
+        position._last_price = tick.last
 
     def order_pending_new(self, account, order):  # 模拟下单
         if self != account:
@@ -151,7 +144,6 @@ class StockAccount(BaseAccount):
         if self != account:
             return
         portfolio = self.portfolio
-        portfolio._portfolio_value = None
         order = trade.order
         bar_dict = ExecutionContext.get_current_bar_dict()
         order_book_id = order.order_book_id
@@ -232,7 +224,8 @@ class StockAccount(BaseAccount):
 
             ratio = series.split_coefficient_to / series.split_coefficient_from
             for key in ["_buy_order_quantity", "_sell_order_quantity", "_buy_trade_quantity", "_sell_trade_quantity"]:
-                setattr(position, key, getattr(position, key) * ratio)
+                # 数量列为整数, 拆股后显式取整, 避免挂在 Positions 上的仓位被截断而独立仓位保留小数
+                setattr(position, key, int(round(getattr(position, key) * ratio)))
 
             user_system_log.info(_("split {order_book_id}, {position}").format(
                 order_book_id=order_book_id,
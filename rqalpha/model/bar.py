@@ -34,6 +34,9 @@ NANDict = {i: np.nan for i in NAMES}
 
 
 class BarObject(object):
+    __slots__ = ["_dt", "_data", "_prev_close", "_prev_settlement", "_basis_spread", "_limit_up", "_limit_down",
+                 "__internal_limit_up", "__internal_limit_down", "_instrument"]
+
     def __init__(self, instrument, data, dt=None):
         self._dt = dt
         self._data = data if data is not None else NANDict
@@ -344,7 +347,7 @@ class BarObject(object):
         return "Bar({0})".format(', '.join('{0}: {1}'.format(k, v) for k, v in base))
 
     def __getitem__(self, key):
-        return self.__dict__[key]
+        return getattr(self, key)
 
 
 class BarMap(object):
@@ -38,6 +38,12 @@ class BaseCommission(with_metaclass(abc.ABCMeta)):
     def get_commission(self, trade):
         raise NotImplementedError
 
+    def release(self, orders):
+        """
+        订单进入终态(全部成交/撤单/拒单)后调用, 释放与这些订单相关的手续费记录
+        """
+        pass
+
 
 class StockCommission(BaseCommission):
     def __init__(self, multiplier, min_commission=5):
@@ -76,6 +82,11 @@ class StockCommission(BaseCommission):
                 self.commission_map[order_id] -= cost_money
                 return 0
 
+    def release(self, orders):
+        # 终态订单不会再有成交, 剩余最低手续费的记录可以丢弃
+        for order in orders:
+            self.commission_map.pop(order.order_id, None)
+
 
 class FutureCommission(BaseCommission):
     def __init__(self, multiplier, hedge_type=HEDGE_TYPE.SPECULATION):
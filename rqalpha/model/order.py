@@ -42,6 +42,8 @@ OrderPersistMap = {
 
 
 class Order(object):
+    __slots__ = ["_order_id", "_calendar_dt", "_trading_dt", "_quantity", "_order_book_id", "_side", "_position_effect",
+                 "_message", "_filled_quantity", "_status", "_frozen_price", "_type", "_avg_price", "_transaction_cost"]
 
     order_id_gen = id_gen(int(time.time()))
 
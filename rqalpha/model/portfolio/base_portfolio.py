@@ -14,8 +14,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from six import itervalues
-
 from ...const import DAYS_CNT
 from ...utils.repr import property_repr
 
@@ -124,7 +122,7 @@ class BasePortfolio(object):
         """
         【float】投资组合当前所有证券仓位的市值的加总
         """
-        return sum(position.market_value for position in itervalues(self.positions))
+        return self.positions._market_value
 
     @property
     def pnl(self):
@@ -45,6 +45,8 @@ class FuturePortfolioClone(object):
 
 
 class FuturePortfolio(BasePortfolio):
+    _clone_type = FuturePortfolioClone  # 每日快照对象的类型
+
     def __init__(self, cash, start_date, account_type):
         super(FuturePortfolio, self).__init__(cash, start_date, account_type)
         self._daily_transaction_cost = 0
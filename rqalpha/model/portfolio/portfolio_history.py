@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Ricequant, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+from ..position import PositionsClone
+from ...utils.column_table import ColumnTable
+
+
+def _snapshot_keys(obj, keys):
+    # 只看类属性判断是否为方法, 避免在这里求值 property
+    return [key for key in keys if not callable(getattr(type(obj), key, None))]
+
+
+def _slot_keys(position_type, column_names):
+    # 仓位的原始状态: 除按列存储的字段及与 Positions 关联的属性外的全部 slot
+    excluded = {"_container", "_row"}
+    excluded.update('_raw' + name for name in column_names)
+    keys = []
+    for klass in reversed(position_type.__mro__):
+        for key in getattr(klass, '__slots__', ()):
+            if key not in excluded and key not in keys:
+                keys.append(key)
+    return keys
+
+
+# 按列存储的每日组合快照, 替代每天保存一份完整的组合拷贝; 按日期读取时才还原出组合快照对象
+# 仓位只保存原始状态: 按列存储的字段直接从 Positions 的列数组整块复制, 其余字段读取 slot, 不求值 property;
+# 仓位的 property 在读取该日快照时才计算, 依赖当前运行环境的字段(如 value_percent)以读取时的环境为准
+class PortfolioHistory(object):
+    def __init__(self):
+        self._dates = []
+        self._index = {}  # 交易日 -> 行号
+        self._clone_type = None
+        self._position_type = None
+        self._portfolios = None  # 每天一行, 组合的各项数值
+        self._positions = None  # 每个交易日的每个仓位一行, 仓位的 slot 字段
+        self._position_columns = None  # 与 _positions 按行对应, Positions 中按列存储的字段
+        self._position_ids = []  # 仓位行对应的 order_book_id
+        self._position_offsets = [0]  # 第 i 天的仓位行为 [offsets[i], offsets[i + 1])
+        self._last_view = (None, None)
+
+    def __len__(self):
+        return len(self._dates)
+
+    def __contains__(self, trading_date):
+        return trading_date in self._index
+
+    def __iter__(self):
+        return iter(self._dates)
+
+    def keys(self):
+        return list(self._dates)
+
+    def _init_tables(self, portfolio):
+        positions = portfolio.positions
+        self._clone_type = portfolio._clone_type
+        self._position_type = positions._position_type
+        keys = [key for key in dir(portfolio) if "__" not in key and key not in ("positions", "_positions")]
+        self._portfolios = ColumnTable(_snapshot_keys(portfolio, keys))
+        self._positions = ColumnTable(_slot_keys(self._position_type, positions._column_names))
+        self._position_columns = {name: np.empty(256, dtype=positions._columns[name].dtype)
+                                  for name in positions._column_names}
+
+    def _pop_last(self):
+        trading_date = self._dates.pop()
+        del self._index[trading_date]
+        self._position_offsets.pop()
+        size = self._position_offsets[-1]
+        del self._position_ids[size:]
+        self._portfolios.truncate(len(self._dates))
+        self._positions.truncate(size)
+
+    def _append_positions(self, positions):
+        rows = positions._rows
+        start = self._position_offsets[-1]
+        end = start + len(rows)
+        for name, column in self._position_columns.items():
+            if end > len(column):  # 容量不足时按倍数扩容
+                grown = np.empty(max(end, len(column) * 2), dtype=column.dtype)
+                grown[:start] = column[:start]
+                column = self._position_columns[name] = grown
+            column[start:end] = positions._columns[name][:len(rows)]
+
+        keys = self._positions.keys
+        for position in rows:
+            # 持仓队列等 list 字段会被原地修改, 需要复制
+            self._positions.append([list(value) if isinstance(value, list) else value
+                                    for value in (getattr(position, key) for key in keys)])
+            self._position_ids.append(position._order_book_id)
+        self._position_offsets.append(end)
+
+    def append(self, trading_date, portfolio):
+        """
+        记录组合在 trading_date 的快照
+
+        :param datetime.date trading_date: 交易日
+        :param portfolio: 当前组合
+        """
+        if self._portfolios is None:
+            self._init_tables(portfolio)
+        if self._dates and self._dates[-1] == trading_date:
+            # 同一交易日重复保存时以最后一次为准
+            self._pop_last()
+        elif trading_date in self._index:
+            raise RuntimeError("portfolio of {} has already been persisted".format(trading_date))
+
+        self._index[trading_date] = len(self._dates)
+        self._dates.append(trading_date)
+        self._portfolios.append([getattr(portfolio, key) for key in self._portfolios.keys])
+        self._append_positions(portfolio.positions)
+        self._last_view = (None, None)
+
+    def _position(self, j):
+        # 用第 j 行的原始状态还原出一个不挂在 Positions 上的仓位
+        position_type = self._position_type
+        position = position_type.__new__(position_type)
+        position._container = None
+        position._row = None
+        for key, value in self._positions.row(j):
+            setattr(position, key, value)
+        for name, column in self._position_columns.items():
+            setattr(position, '_raw' + name, column.item(j))
+        return position
+
+    def __getitem__(self, trading_date):
+        last_date, view = self._last_view
+        if last_date == trading_date:
+            return view
+
+        i = self._index[trading_date]
+        p = self._clone_type()
+        for key, value in self._portfolios.row(i):
+            setattr(p, key, value)
+
+        ps = PositionsClone(self._position_type)
+        for j in range(self._position_offsets[i], self._position_offsets[i + 1]):
+            ps[self._position_ids[j]] = self._position(j)._clone()
+        p.positions = ps
+
+        self._last_view = (trading_date, p)
+        return p
+
+    def get(self, trading_date, default=None):
+        if trading_date not in self._index:
+            return default
+        return self[trading_date]
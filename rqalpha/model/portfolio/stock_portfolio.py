@@ -45,11 +45,11 @@ class StockPortfolioClone(object):
 
 
 class StockPortfolio(BasePortfolio):
+    _clone_type = StockPortfolioClone  # 每日快照对象的类型
 
     def __init__(self, cash, start_date, account_type):
         super(StockPortfolio, self).__init__(cash, start_date, account_type)
         self._positions = Positions(StockPosition)
-        self._portfolio_value = None
 
     def restore_from_dict_(self, portfolio_dict):
         self._cash = portfolio_dict['_cash']
@@ -112,12 +112,8 @@ class StockPortfolio(BasePortfolio):
         """
         【float】总权益，包含市场价值和剩余现金
         """
-        if self._portfolio_value is None:
-            # 总资金 + Sum(position._position_value)
-            self._portfolio_value = self.cash + self.frozen_cash + sum(
-                position._position_value for position in six.itervalues(self.positions))
-
-        return self._portfolio_value
+        # 总资金 + Sum(position._position_value), 股票仓位的 _position_value 即市值, 由 Positions 增量汇总
+        return self._cash + self._frozen_cash + self._positions._market_value
 
     @property
     def dividend_receivable(self):
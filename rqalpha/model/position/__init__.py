@@ -14,21 +14,150 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .base_position import BasePosition, PositionClone
+import numpy as np
+import six
+
+from .base_position import BasePosition, PositionClone, PositionColumn, clone_keys
 from .future_position import FuturePosition
 from .stock_position import StockPosition
 
 
+# 按列存储的仓位字段, 各列与 Positions 中的仓位按行一一对应
+POSITION_COLUMNS = [
+    ('_last_price', np.float64),
+    ('_market_value', np.float64),
+    ('_buy_trade_quantity', np.int64),
+    ('_sell_trade_quantity', np.int64),
+    ('_avg_price', np.float64),
+    ('_buy_open_trade_quantity', np.int64),
+    ('_sell_open_trade_quantity', np.int64),
+    ('_buy_close_trade_quantity', np.int64),
+    ('_sell_close_trade_quantity', np.int64),
+    ('_buy_market_value', np.float64),
+    ('_sell_market_value', np.float64),
+    ('_prev_settle_price', np.float64),
+    ('_daily_realized_pnl', np.float64),
+    ('_buy_daily_realized_pnl', np.float64),
+    ('_sell_daily_realized_pnl', np.float64),
+]
+
+
 class Positions(dict):
-    def __init__(self, position_type):
+    def __init__(self, position_type, capacity=64):
         super(Positions, self).__init__()
         self._position_type = position_type
+        self._market_value = 0.  # 所有仓位市值的汇总, 在市值列变化时增量维护
+        # 该仓位类型实际按列存储的字段
+        self._column_names = [name for name, _ in POSITION_COLUMNS
+                              if isinstance(getattr(position_type, name, None), PositionColumn)]
+        self._columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in POSITION_COLUMNS
+                         if name in self._column_names}
+        self._rows = []  # 第 i 行对应的仓位对象
 
     def __missing__(self, key):
         p = self._position_type(key)
         self[key] = p
         return p
 
+    def __setitem__(self, key, position):
+        old = self.get(key)
+        if position is not old and position._container is not None:
+            # 仓位数据只能存放在一个 Positions 的列中, 重复挂载会使原 Positions 的行与仓位对应关系失效
+            raise RuntimeError("position of {} is already attached to a Positions".format(position._order_book_id))
+        self._detach(old)
+        self._attach(position)
+        super(Positions, self).__setitem__(key, position)
+
+    def __delitem__(self, key):
+        self._detach(self.get(key))
+        super(Positions, self).__delitem__(key)
+
+    def pop(self, key, *args):
+        self._detach(self.get(key))
+        return super(Positions, self).pop(key, *args)
+
+    def popitem(self):
+        key, position = super(Positions, self).popitem()
+        self._detach(position)
+        return key, position
+
+    # dict 的 update / setdefault 不经过 __setitem__, 需要重写才能挂载到列中
+    def update(self, *args, **kwargs):
+        for key, position in six.iteritems(dict(*args, **kwargs)):
+            self[key] = position
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def clear(self):
+        for position in list(self._rows):
+            self._detach(position)
+        super(Positions, self).clear()
+        self._market_value = 0.
+
+    def _set_column(self, name, row, value):
+        column = self._columns[name]
+        if name == '_market_value':
+            self._market_value += value - column.item(row)
+        column[row] = value
+
+    def _attach(self, position):
+        row = len(self._rows)
+        if row == len(self._columns['_market_value']):  # 容量不足时按倍数扩容
+            for name in self._column_names:
+                column = self._columns[name]
+                self._columns[name] = np.concatenate([column, np.zeros_like(column)])
+        for name in self._column_names:
+            self._columns[name][row] = getattr(position, '_raw' + name)
+        position._container = self
+        position._row = row
+        self._rows.append(position)
+        self._market_value += self._columns['_market_value'].item(row)
+
+    def _detach(self, position):
+        if position is None:
+            return
+        row = position._row
+        # 将列中的数据写回仓位自身, 被移除的仓位仍可独立使用
+        for name in self._column_names:
+            setattr(position, '_raw' + name, self._columns[name].item(row))
+        self._market_value -= self._columns['_market_value'].item(row)
+        # 用最后一行填补空出的行, 保持列数据连续
+        last = len(self._rows) - 1
+        if row != last:
+            moved = self._rows[last]
+            for name in self._column_names:
+                column = self._columns[name]
+                column[row] = column[last]
+            moved._row = row
+            self._rows[row] = moved
+        self._rows.pop()
+        position._container = None
+        position._row = None
+
+    def _row_order_book_ids(self):
+        return [position._order_book_id for position in self._rows]
+
+    def _mark_to_market(self, prices):
+        """
+        按最新价批量更新所有仓位的最新价及市值
+
+        :param prices: 与 _row_order_book_ids() 一一对应的最新价数组, nan 表示没有行情, 不做更新
+        """
+        n = len(self._rows)
+        columns = self._columns
+        valid = ~np.isnan(prices)
+        quantity = columns['_buy_trade_quantity'][:n] - columns['_sell_trade_quantity'][:n]
+        columns['_last_price'][:n][valid] = prices[valid]
+        columns['_market_value'][:n][valid] = quantity[valid] * prices[valid]
+        self._market_value = columns['_market_value'][:n].sum().item()
+
+    def _refresh_market_value(self):
+        # 重新全量汇总市值, 消除增量累加带来的浮点误差
+        self._market_value = self._columns['_market_value'][:len(self._rows)].sum().item()
+
     def _clone(self):
         ps = {}
         for order_book_id in self:
@@ -44,9 +173,7 @@ class PositionsClone(dict):
     def __missing__(self, key):
         p = PositionClone()
         position = self._position_type(key)
-        for key in dir(position):
-            if "__" in key:
-                continue
+        for key in clone_keys(position):
             setattr(p, key, getattr(position, key))
         return p
 
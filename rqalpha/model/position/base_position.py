@@ -24,11 +24,55 @@ class PositionClone(object):
         return self.__dict__
 
 
+class PositionColumn(object):
+    """
+    按列存储的仓位属性: 仓位挂在 Positions 上时读写 Positions 中对应的列, 否则读写仓位自身的 _raw 属性
+    """
+    def __init__(self, name):
+        self.name = name
+        self.raw_name = '_raw' + name
+
+    def __get__(self, position, owner):
+        if position is None:
+            return self
+        container = position._container
+        if container is None:
+            return getattr(position, self.raw_name)
+        return container._columns[self.name].item(position._row)
+
+    def __set__(self, position, value):
+        container = position._container
+        if container is None:
+            setattr(position, self.raw_name, value)
+        else:
+            container._set_column(self.name, position._row, value)
+
+
+def clone_keys(position):
+    # 生成仓位快照时需要复制的属性, 不包括与 Positions 关联的内部属性
+    for key in dir(position):
+        if "__" in key or key in ("_container", "_row") or key.startswith("_raw_"):
+            continue
+        yield key
+
+
 class BasePosition(object):
+    # 按列存储的字段在未挂到 Positions 上时存放在对应的 _raw 属性中
+    __slots__ = ["_container", "_row", "_order_book_id", "_raw_last_price", "_raw_market_value",
+                 "_raw_buy_trade_quantity", "_raw_sell_trade_quantity", "_buy_trade_value", "_sell_trade_value",
+                 "_buy_order_value", "_sell_order_value", "_buy_order_quantity", "_sell_order_quantity",
+                 "_total_orders", "_total_trades", "_is_traded"]
 
     __repr__ = property_repr
 
+    _last_price = PositionColumn('_last_price')
+    _market_value = PositionColumn('_market_value')
+    _buy_trade_quantity = PositionColumn('_buy_trade_quantity')
+    _sell_trade_quantity = PositionColumn('_sell_trade_quantity')
+
     def __init__(self, order_book_id):
+        self._container = None  # 所属的 Positions, 为空时仓位数据存储在自身属性中
+        self._row = None  # 在 Positions 列数组中的行号
         self._order_book_id = order_book_id
         self._last_price = 0
         self._market_value = 0.
@@ -88,9 +132,7 @@ class BasePosition(object):
 
     def _clone(self):
         p = PositionClone()
-        for key in dir(self):
-            if "__" in key:
-                continue
+        for key in clone_keys(self):
             setattr(p, key, getattr(self, key))
         return p
 
@@ -16,7 +16,7 @@
 
 import six
 
-from .base_position import BasePosition
+from .base_position import BasePosition, PositionColumn
 from ...execution_context import ExecutionContext
 from ...environment import Environment
 from ...const import ACCOUNT_TYPE, SIDE
@@ -71,6 +71,28 @@ FuturePersistMap = {
 
 
 class FuturePosition(BasePosition):
+    __slots__ = ["_buy_open_order_value", "_sell_open_order_value", "_buy_close_order_value", "_sell_close_order_value",
+                 "_buy_open_order_quantity", "_sell_open_order_quantity", "_buy_close_order_quantity",
+                 "_sell_close_order_quantity", "_raw_buy_open_trade_quantity", "_buy_open_trade_value",
+                 "_raw_sell_open_trade_quantity", "_sell_open_trade_value", "_raw_buy_close_trade_quantity",
+                 "_buy_close_trade_value", "_raw_sell_close_trade_quantity", "_sell_close_trade_value",
+                 "_raw_daily_realized_pnl", "_raw_prev_settle_price", "_buy_old_holding_list", "_sell_old_holding_list",
+                 "_buy_today_holding_list", "_sell_today_holding_list", "_contract_multiplier", "_de_listed_date",
+                 "_buy_open_transaction_cost", "_buy_close_transaction_cost", "_sell_open_transaction_cost",
+                 "_sell_close_transaction_cost", "_raw_buy_daily_realized_pnl", "_raw_sell_daily_realized_pnl",
+                 "_buy_avg_open_price", "_sell_avg_open_price", "_raw_buy_market_value", "_raw_sell_market_value"]
+
+    # 结算时需要整体计算的字段按列存储在 Positions 中
+    _buy_open_trade_quantity = PositionColumn('_buy_open_trade_quantity')
+    _sell_open_trade_quantity = PositionColumn('_sell_open_trade_quantity')
+    _buy_close_trade_quantity = PositionColumn('_buy_close_trade_quantity')
+    _sell_close_trade_quantity = PositionColumn('_sell_close_trade_quantity')
+    _buy_market_value = PositionColumn('_buy_market_value')
+    _sell_market_value = PositionColumn('_sell_market_value')
+    _prev_settle_price = PositionColumn('_prev_settle_price')
+    _daily_realized_pnl = PositionColumn('_daily_realized_pnl')
+    _buy_daily_realized_pnl = PositionColumn('_buy_daily_realized_pnl')
+    _sell_daily_realized_pnl = PositionColumn('_sell_daily_realized_pnl')
 
     # buy_open_order_value:       <float> 买开挂单总值
     # sell_open_order_value:      <float> 卖开挂单总值
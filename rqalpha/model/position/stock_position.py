@@ -16,7 +16,7 @@
 
 import six
 
-from .base_position import BasePosition
+from .base_position import BasePosition, PositionColumn
 from ...execution_context import ExecutionContext
 from ...const import ACCOUNT_TYPE
 
@@ -44,6 +44,9 @@ StockPersistMap = {
 
 
 class StockPosition(BasePosition):
+    __slots__ = ["_raw_avg_price", "_buy_today_holding_quantity", "_de_listed_date", "_transaction_cost"]
+
+    _avg_price = PositionColumn('_avg_price')
 
     def __init__(self, order_book_id):
         super(StockPosition, self).__init__(order_book_id)
@@ -15,17 +15,27 @@
 # limitations under the License.
 
 import abc
+import math
 
+import numpy as np
 from six import with_metaclass
 
 from ..const import SIDE
+from ..execution_context import ExecutionContext
+from ..data.liquidity_stats import LiquidityStats
 from ..utils.exception import patch_user_exc
 from ..utils.i18n import gettext as _
 
 
-def init_slippage(rate=0):
-    # 未来可能会有多种slippage模型，目前只返回 FixedSlippage
-    return PriceRatioSlippage(rate)
+def init_slippage(rate=0, model=None, params=None):
+    # model 为空或 price_ratio 时使用固定比例滑点, 其余模型由 params 传入参数
+    if model is None or model == 'price_ratio':
+        return PriceRatioSlippage(rate)
+    try:
+        slippage_cls = SLIPPAGE_MODELS[model]
+    except KeyError:
+        raise patch_user_exc(ValueError(_("invalid slippage model: {}").format(model)))
+    return slippage_cls(**(dict(params) if params else {}))
 
 
 class BaseSlippage(with_metaclass(abc.ABCMeta)):
@@ -46,6 +56,71 @@ class PriceRatioSlippage(BaseSlippage):
         return price + price * self.rate * (1 if order.side == SIDE.BUY else -1)
 
 
+class ImpactSlippage(BaseSlippage):
+    """
+    基于流动性的冲击成本模型基类, 成交价为 price * (1 ± rate), rate 由 ADV 和波动率计算, 且不超过 max_rate
+    """
+    def __init__(self, window=20, max_rate=0.1):
+        self._window = window
+        self._max_rate = max_rate
+        self._stats = None
+
+    def _liquidity(self, order_book_id):
+        if self._stats is None:
+            self._stats = LiquidityStats(ExecutionContext.data_proxy, self._window)
+        return self._stats.get(order_book_id, ExecutionContext.get_current_trading_dt())
+
+    @abc.abstractmethod
+    def get_impact_rate(self, order):
+        raise NotImplementedError
+
+    def get_trade_price(self, order, price):
+        rate = self.get_impact_rate(order)
+        if np.isnan(rate):
+            rate = 0
+        rate = min(rate, self._max_rate)
+        return price + price * rate * (1 if order.side == SIDE.BUY else -1)
+
+
+class SquareRootImpactSlippage(ImpactSlippage):
+    """
+    平方根冲击成本模型: rate = coefficient * 日波动率 * sqrt(委托数量 / ADV)
+    """
+    def __init__(self, coefficient=1., window=20, max_rate=0.1):
+        super(SquareRootImpactSlippage, self).__init__(window, max_rate)
+        self.coefficient = coefficient
+
+    def get_impact_rate(self, order):
+        adv, volatility = self._liquidity(order.order_book_id)
+        if not adv > 0:
+            return 0
+        return self.coefficient * volatility * math.sqrt(order.quantity / adv)
+
+
+class SpreadVolatilitySlippage(ImpactSlippage):
+    """
+    价差加波动率模型: rate = spread / 2 + volatility_coefficient * 日波动率, spread 为相对买卖价差
+    """
+    def __init__(self, spread=0.001, volatility_coefficient=0.1, window=20, max_rate=0.1):
+        super(SpreadVolatilitySlippage, self).__init__(window, max_rate)
+        self.spread = spread
+        self.volatility_coefficient = volatility_coefficient
+
+    def get_impact_rate(self, order):
+        _, volatility = self._liquidity(order.order_book_id)
+        if np.isnan(volatility):
+            # 历史数据不足时只计算价差部分
+            volatility = 0
+        return self.spread / 2 + self.volatility_coefficient * volatility
+
+
+SLIPPAGE_MODELS = {
+    'price_ratio': PriceRatioSlippage,
+    'sqrt_impact': SquareRootImpactSlippage,
+    'spread_volatility': SpreadVolatilitySlippage,
+}
+
+
 # class FixedSlippage(BaseSlippage):
 #     def __init__(self, rate=0.):
 #         self.rate = rate
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Ricequant, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+from collections import OrderedDict
+
+import six
+
+from ..interface import AbstractPersistProvider
+from .logger import system_log
+
+
+class AsyncPersistProvider(AbstractPersistProvider):
+    """
+    后台线程写入的持久化方案, 包装另一个持久化方案。
+
+    主线程的 store 只记录已经序列化好的 bytes, 一次保存结束(commit_batch)时交给后台线程写入。
+    后台线程来不及写入时, 同一个 key 的旧状态直接被新状态覆盖, 待写入的数据最多每个 key 一份;
+    多次保存合并后仍作为一批写入被包装的持久化方案。
+    """
+    def __init__(self, persist_provider):
+        self._provider = persist_provider
+        self._batch = None
+        self._pending = OrderedDict()  # 等待后台线程写入的 key -> bytes, None 表示删除
+        self._writing = {}  # 后台线程正在写入的 key -> bytes, None 表示删除
+        self._error = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="persist_writer")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                # 写入失败后等主线程取走错误再重试, 避免反复失败
+                while (not self._pending or self._error is not None) and not self._closed:
+                    self._cond.wait()
+                if not self._pending or self._error is not None:
+                    return
+                self._writing, self._pending = self._pending, OrderedDict()
+            try:
+                self._write(self._writing)
+            except Exception as e:
+                system_log.exception("persist writer failed")
+                with self._cond:
+                    # 写入失败的状态放回队列, 期间新提交的同一 key 的状态更新, 以新状态为准
+                    pending = OrderedDict(self._writing)
+                    for key, value in six.iteritems(self._pending):
+                        pending.pop(key, None)
+                        pending[key] = value
+                    self._pending = pending
+                    self._error = e
+            with self._cond:
+                self._writing = {}
+                self._cond.notify_all()
+
+    def _write(self, items):
+        begin_batch = getattr(self._provider, 'begin_batch', None)
+        if begin_batch is not None:
+            begin_batch()
+        try:
+            for key, value in six.iteritems(items):
+                if value is None:
+                    try:
+                        self._provider.delete(key)
+                    except NotImplementedError:
+                        pass
+                else:
+                    self._provider.store(key, value)
+            if begin_batch is not None:
+                self._provider.commit_batch()
+        except Exception:
+            # 放弃写了一半的批次, 重试时才能重新开始
+            abort_batch = getattr(self._provider, 'abort_batch', None)
+            if begin_batch is not None and abort_batch is not None:
+                abort_batch()
+            raise
+
+    def _check_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("persist writer failed: {}".format(error))
+
+    def begin_batch(self):
+        self._batch = OrderedDict()
+
+    def commit_batch(self):
+        batch, self._batch = self._batch, None
+        if not batch:
+            return
+        with self._cond:
+            if self._closed:
+                self._check_error()
+                self._write(batch)
+                return
+            for key, value in six.iteritems(batch):
+                # 覆盖尚未写入的旧状态
+                self._pending.pop(key, None)
+                self._pending[key] = value
+            self._cond.notify_all()
+            # 本批已经入队, 取走错误后后台线程会连同之前失败的状态一起重试
+            self._check_error()
+
+    def abort_batch(self):
+        # 尚未提交的写入还没有交给后台线程, 直接丢弃
+        self._batch = None
+
+    def _add(self, key, value):
+        if self._batch is None:
+            self.begin_batch()
+            self._batch[key] = value
+            self.commit_batch()
+        else:
+            self._batch[key] = value
+
+    def store(self, key, value):
+        assert isinstance(value, bytes), "value must be bytes"
+        self._add(key, value)
+
+    def delete(self, key):
+        # 与写入一样排队, 保证同一个 key 的写入和删除按顺序生效
+        self._add(key, None)
+
+    def load(self, key, large_file=False):
+        with self._cond:
+            for items in (self._batch, self._pending, self._writing):
+                if items and key in items:
+                    return items[key]
+        return self._provider.load(key)
+
+    def flush(self):
+        """
+        等待后台线程写完目前已提交的全部状态
+        """
+        with self._cond:
+            while (self._pending or self._writing) and self._error is None:
+                self._cond.wait()
+            self._check_error()
+
+    def close(self):
+        """
+        写完全部状态后结束后台线程, 之后的写入直接在调用线程中进行。
+        后台线程写入失败时, 在调用线程中重试一次尚未写入的状态, 重试仍失败才抛出异常
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        with self._cond:
+            if self._pending:
+                pending, self._pending = self._pending, OrderedDict()
+                try:
+                    self._write(pending)
+                except Exception as e:
+                    self._pending = pending
+                    raise RuntimeError("persist writer failed: {}".format(e))
+                # 之前的错误已由后台线程记录, 重试成功后不再抛出
+                self._error = None
+            self._check_error()
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Ricequant, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# 本模块只在 Python 3 下使用, asyncio 在函数中导入, 以便 Python 2 下可以正常导入 rqalpha
+
+
+def iter_async_events(event_source, start_date, end_date, frequency):
+    """
+    在新的事件循环中运行异步事件源, 转换为普通的事件生成器供主循环使用。
+    事件循环只在等待下一个事件时运行, 处理事件期间事件源中的协程暂停, 不会与策略代码并发执行。
+
+    :param event_source: :class:`~rqalpha.interface.AbstractAsyncEventSource`
+    """
+    import asyncio
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    events = event_source.async_events(start_date, end_date, frequency)
+    try:
+        while True:
+            try:
+                event = loop.run_until_complete(events.__anext__())
+            except StopAsyncIteration:
+                break
+            yield event
+    finally:
+        # 结束异步生成器, 使其有机会取消内部的协程
+        loop.run_until_complete(events.aclose())
+        loop.close()
+        asyncio.set_event_loop(None)
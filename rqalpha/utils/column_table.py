@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Ricequant, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import OrderedDict
+
+import six
+import numpy as np
+
+
+# 列的存储类型: 布尔/整数/浮点分别存放在 bool/int64/float64 数组中, 出现更宽的类型时整列转换; 其余值存放在 object 数组中
+BOOL, INT, FLOAT, OBJECT = 'b', 'i', 'f', 'o'
+
+_DTYPES = {BOOL: np.bool_, INT: np.int64, FLOAT: np.float64, OBJECT: object}
+
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+def kind_of(value):
+    if isinstance(value, (bool, np.bool_)):
+        return BOOL
+    if isinstance(value, np.integer):
+        return INT
+    if isinstance(value, six.integer_types):
+        # 超出 int64 范围的整数按原样保存
+        return INT if _INT64_MIN <= value <= _INT64_MAX else OBJECT
+    if isinstance(value, (float, np.floating)):
+        return FLOAT
+    return OBJECT
+
+
+class Column(object):
+    def __init__(self, kind, capacity):
+        self.kind = kind
+        self.data = np.empty(capacity, dtype=_DTYPES[kind])
+        # 浮点列中哪些值原本是 python float: python 与 numpy 对 .5 边界的舍入方式不同, 取整时需要区分
+        self.py_float = np.zeros(capacity, dtype=bool)
+
+    def grow(self, capacity):
+        data = np.empty(capacity, dtype=self.data.dtype)
+        data[:len(self.data)] = self.data
+        self.data = data
+        py_float = np.zeros(capacity, dtype=bool)
+        py_float[:len(self.py_float)] = self.py_float
+        self.py_float = py_float
+
+    def get(self, i):
+        value = self.data[i]
+        if self.kind == FLOAT:
+            return float(value)
+        if self.kind == INT:
+            return int(value)
+        if self.kind == BOOL:
+            return bool(value)
+        return value
+
+    def set(self, i, value, size):
+        kind = kind_of(value)
+        if kind != self.kind and self.kind != OBJECT:
+            if kind == OBJECT:
+                # 出现了非数值, 整列退化为 object 数组
+                data = np.empty(len(self.data), dtype=object)
+                data[:size] = [self.get(j) for j in range(size)]
+                self.data = data
+                self.kind = OBJECT
+            elif kind == FLOAT or (self.kind == BOOL and kind == INT):
+                self.data = self.data.astype(_DTYPES[kind])
+                self.kind = kind
+        self.data[i] = value
+        self.py_float[i] = type(value) is float
+
+    def values(self, size, ndigits=None):
+        """
+        前 size 行的数据, 数值列为对应 dtype 的数组
+
+        :param ndigits: 不为 None 时浮点列保留的小数位数, 结果与逐个值调用 round 相同
+        """
+        values = self.data[:size].copy()
+        if ndigits is None or self.kind != FLOAT:
+            return values
+        rounded = np.round(values, ndigits)
+        py_float = self.py_float[:size]
+        if py_float.any():
+            rounded[py_float] = [round(v, ndigits) for v in values[py_float].tolist()]
+        return rounded
+
+
+class ColumnTable(object):
+    """
+    追加写入的列式表: 字段在创建时固定, 每个字段一列, 预分配 capacity 行, 容量不足时成倍扩展
+    """
+    def __init__(self, keys, capacity=256):
+        self.keys = list(keys)
+        self._columns = None
+        self._capacity = max(int(capacity), 1)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, values):
+        if self._columns is None:
+            self._columns = [Column(kind_of(v), self._capacity) for v in values]
+        elif self._size == self._capacity:
+            self._capacity *= 2
+            for column in self._columns:
+                column.grow(self._capacity)
+        for column, value in zip(self._columns, values):
+            column.set(self._size, value, self._size)
+        self._size += 1
+
+    def truncate(self, size):
+        self._size = min(size, self._size)
+
+    def clear(self):
+        self._size = 0
+
+    def row(self, i):
+        return [(key, column.get(i)) for key, column in zip(self.keys, self._columns)]
+
+    def kind(self, key):
+        return self._columns[self.keys.index(key)].kind
+
+    def columns(self, ndigits=None):
+        """
+        :param ndigits: 不为 None 时浮点列保留的小数位数
+        :return: OrderedDict, 字段名 -> `numpy.ndarray`
+        """
+        if self._columns is None:
+            return OrderedDict((key, np.empty(0, dtype=object)) for key in self.keys)
+        return OrderedDict((key, column.values(self._size, ndigits)) for key, column in zip(self.keys, self._columns))
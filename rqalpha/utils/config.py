@@ -27,7 +27,7 @@ import shutil
 from . import RqAttrDict, logger
 from .exception import patch_user_exc
 from .logger import user_log, user_system_log, system_log, std_log, user_std_handler
-from ..const import ACCOUNT_TYPE, MATCHING_TYPE, RUN_TYPE, PERSIST_MODE
+from ..const import ACCOUNT_TYPE, MATCHING_TYPE, RUN_TYPE, PERSIST_MODE, PERSIST_CODEC
 from ..utils.i18n import gettext as _, localization
 from ..utils.dict_func import deep_update
 from ..mod.utils import mod_config_value_parse
@@ -166,6 +166,7 @@ def parse_config(config_args, config_path=None, click_type=True, source_code=Non
     base_config.account_list = gen_account_list(base_config.strategy_type) # 资金账户列表: 股票, 期货
     base_config.matching_type = parse_matching_type(base_config.matching_type) # 每日交易时间: 下日开盘/当日收盘
     base_config.persist_mode = parse_persist_mode(base_config.persist_mode)
+    base_config.persist_codec = parse_persist_codec(base_config.persist_codec)
 
     if extra_config.log_level.upper() != "NONE":
         user_log.handlers.append(user_std_handler)
@@ -269,3 +270,13 @@ def parse_persist_mode(persist_mode):
         return PERSIST_MODE.ON_CRASH
     else:
         raise RuntimeError(_('unknown persist mode: {persist_mode}').format(persist_mode=persist_mode))
+
+
+def parse_persist_codec(persist_codec):
+    assert isinstance(persist_codec, six.string_types)
+    if persist_codec == 'json':
+        return PERSIST_CODEC.JSON
+    elif persist_codec == 'binary':
+        return PERSIST_CODEC.BINARY
+    else:
+        raise RuntimeError(_('unknown persist codec: {persist_codec}').format(persist_codec=persist_codec))
@@ -38,3 +38,9 @@ class DiskPersistProvider(AbstractPersistProvider):
                 return f.read()
         except IOError as e:
             return None
+
+    def delete(self, key):
+        try:
+            os.remove(os.path.join(self._path, key))
+        except OSError:
+            pass
@@ -15,6 +15,7 @@
 # limitations under the License.
 
 import six
+import json
 import hashlib
 from collections import OrderedDict
 
@@ -22,6 +23,7 @@ import jsonpickle
 
 from ..events import EVENT
 from .logger import system_log
+from . import state_codec
 from ..const import PERSIST_MODE
 
 
@@ -36,10 +38,10 @@ class CoreObjectsPersistProxy(object):
             if state is not None:
                 result[key] = state
 
-        return jsonpickle.dumps(result).encode('utf-8')
+        return state_codec.dumps(result, jsonpickle.dumps)
 
     def set_state(self, state):
-        state = jsonpickle.loads(state.decode('utf-8'))
+        state = state_codec.loads(state, jsonpickle.loads)
         for key, value in six.iteritems(state):
             try:
                 self._objects[key].set_state(value)
@@ -47,10 +49,29 @@ class CoreObjectsPersistProxy(object):
                 system_log.warn('core object state for {} ignored'.format(key))
 
 
+# 增量保存时, 对象的 key 下保存的是各部分的清单, 以此开头与完整状态区分
+DELTA_MANIFEST_HEADER = b'RQALPHA-DELTA\n'
+
+
+def _part_key(key, part):
+    return '{}.{}'.format(key, part)
+
+
 class PersistHelper(object):
+    """
+    保存/恢复各对象的状态。对象除了 `get_state`/`set_state` 之外, 可以选择实现以下方法:
+
+    *   `is_dirty()`: 自上次保存后状态是否发生了变化, 返回 False 时跳过该对象, 不再调用 get_state 和计算 md5
+    *   `mark_clean()`: 状态保存成功后调用, 用于重置变化标记
+    *   `get_state_delta(full)` / `set_state_parts(parts)`: 分部分增量保存。get_state_delta 返回
+        (全部部分名称的列表, 有变化部分的 OrderedDict: 部分名称 -> bytes), full 为 True 时需返回全部部分;
+        每个部分保存在 `<key>.<部分名称>` 下, key 下只保存部分清单; 不再出现在清单中的部分在新清单保存后
+        通过持久化方案的 `delete` 删除
+    """
     def __init__(self, persist_provider, event_bus, persist_mode):
         self._objects = OrderedDict()
         self._last_state = {}
+        self._last_parts = {}  # key -> 已保存的部分清单
         self._persist_provider = persist_provider
         if persist_mode == PERSIST_MODE.REAL_TIME:
             event_bus.add_listener(EVENT.POST_BEFORE_TRADING, self.persist)
@@ -59,15 +80,83 @@ class PersistHelper(object):
             event_bus.add_listener(EVENT.POST_SETTLEMENT, self.persist)
 
     def persist(self, *args, **kwargs):
+        # 持久化方案支持批量写入时, 一次保存的全部 key 作为一批提交; 中途失败时放弃整批, 下次保存时重新写入
+        begin_batch = getattr(self._persist_provider, 'begin_batch', None)
+        last_state, last_parts = dict(self._last_state), dict(self._last_parts)
+        if begin_batch is not None:
+            begin_batch()
+        try:
+            persisted = self._persist_objects()
+            if begin_batch is not None:
+                self._persist_provider.commit_batch()
+        except Exception:
+            abort_batch = getattr(self._persist_provider, 'abort_batch', None)
+            if begin_batch is not None and abort_batch is not None:
+                abort_batch()
+            self._last_state, self._last_parts = last_state, last_parts
+            raise
+        # 整批写入成功后才重置对象的变化标记
+        for obj in persisted:
+            mark_clean = getattr(obj, 'mark_clean', None)
+            if mark_clean is not None:
+                mark_clean()
+
+    def _persist_objects(self):
+        """
+        :return: 本次保存的对象列表
+        """
+        persisted = []
         for key, obj in six.iteritems(self._objects):
-            state = obj.get_state()
-            if not state:
+            is_dirty = getattr(obj, 'is_dirty', None)
+            if is_dirty is not None and not is_dirty():
                 continue
-            md5 = hashlib.md5(state).hexdigest()
-            if self._last_state.get(key) == md5:
-                continue
-            self._persist_provider.store(key, state)
-            self._last_state[key] = md5
+            if hasattr(obj, 'get_state_delta'):
+                self._persist_delta(key, obj)
+            else:
+                self._persist_full(key, obj)
+            persisted.append(obj)
+        return persisted
+
+    def _persist_full(self, key, obj):
+        state = obj.get_state()
+        if not state:
+            return
+        md5 = hashlib.md5(state).hexdigest()
+        if self._last_state.get(key) == md5:
+            return
+        self._persist_provider.store(key, state)
+        self._last_state[key] = md5
+
+    def _stored_parts(self, key):
+        # 持久化方案中已有的部分清单, 没有或为完整状态时返回空列表
+        state = self._persist_provider.load(key)
+        if not state or not state.startswith(DELTA_MANIFEST_HEADER):
+            return []
+        return json.loads(state[len(DELTA_MANIFEST_HEADER):].decode('utf-8'))
+
+    def _persist_delta(self, key, obj):
+        # 本次运行中第一次保存时写入全部部分, 之后只写入有变化的部分
+        full = key not in self._last_parts
+        old_parts = self._stored_parts(key) if full else self._last_parts[key]
+        parts, changed = obj.get_state_delta(full=full)
+        for part, state in six.iteritems(changed):
+            self._persist_provider.store(_part_key(key, part), state)
+        # 清单在各部分写入之后再更新
+        if parts != old_parts:
+            self._persist_provider.store(key, DELTA_MANIFEST_HEADER + json.dumps(parts).encode('utf-8'))
+            self._last_parts[key] = parts
+            # 新清单保存之后再删除不再使用的部分, 如已经从 daily_orders 中清理掉的订单
+            self._delete_parts(key, set(old_parts) - set(parts))
+        else:
+            self._last_parts[key] = parts
+
+    def _delete_parts(self, key, parts):
+        for part in sorted(parts):
+            try:
+                self._persist_provider.delete(_part_key(key, part))
+            except NotImplementedError:
+                # 持久化方案不支持删除时保留这些部分, 恢复时不会读取它们
+                return
 
     def register(self, key, obj):
         if key in self._objects:
@@ -80,4 +169,19 @@ class PersistHelper(object):
             system_log.debug('restore {} with state = {}', key, state)
             if not state:
                 continue
-            obj.set_state(state)
+            if state.startswith(DELTA_MANIFEST_HEADER):
+                self._restore_delta(key, obj, state)
+            else:
+                # 完整状态, 包括增量保存之前的旧版本数据
+                obj.set_state(state)
+
+    def _restore_delta(self, key, obj, state):
+        parts = json.loads(state[len(DELTA_MANIFEST_HEADER):].decode('utf-8'))
+        states = OrderedDict()
+        for part in parts:
+            part_state = self._persist_provider.load(_part_key(key, part))
+            if not part_state:
+                raise RuntimeError('persisted state {} is missing'.format(_part_key(key, part)))
+            states[part] = part_state
+        obj.set_state_parts(states)
+        self._last_parts[key] = parts
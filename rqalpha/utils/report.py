@@ -20,6 +20,13 @@ import six
 import pandas as pd
 
 
+def _iter_frames(result_dict, name):
+    # 分块输出的结果(StreamResult)按块读取大表, 不整表读入内存
+    if hasattr(result_dict, "iter_table"):
+        return result_dict.iter_table(name)
+    return [result_dict[name]]
+
+
 def generate_report(result_dict, target_report_csv_path):
     from six import StringIO
 
@@ -43,24 +50,22 @@ def generate_report(result_dict, target_report_csv_path):
 
     for name in ["total_portfolios", "stock_portfolios", "future_portfolios",
                  "stock_positions", "future_positions", "trades"]:
-        try:
-            df = result_dict[name]
-        except KeyError:
+        if name not in result_dict:
             continue
 
-        # replace all date in dataframe as string
-        if df.index.name == "date":
-            df = df.reset_index()
-            df["date"] = df["date"].apply(lambda x: x.strftime("%Y-%m-%d"))
-            df = df.set_index("date")
-
-        csv_txt = StringIO()
-        csv_txt.write(df.to_csv(encoding='utf-8'))
-
-        df.to_excel(xlsx_writer, sheet_name=name)
-
         with open(os.path.join(output_path, "{}.csv".format(name)), 'w') as csvfile:
-            csvfile.write(csv_txt.getvalue())
+            row = 0
+            for df in _iter_frames(result_dict, name):
+                # replace all date in dataframe as string
+                if df.index.name == "date":
+                    df = df.reset_index()
+                    df["date"] = df["date"].apply(lambda x: x.strftime("%Y-%m-%d"))
+                    df = df.set_index("date")
+
+                # 分块输出的结果逐块写入, 只在第一块写入表头
+                csvfile.write(df.to_csv(header=row == 0, encoding='utf-8'))
+                df.to_excel(xlsx_writer, sheet_name=name, startrow=row if row == 0 else row + 1, header=row == 0)
+                row += len(df)
 
     # report.xls <--- 所有sheet的汇总
     xlsx_writer.save()
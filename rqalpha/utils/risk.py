@@ -317,3 +317,295 @@ class Risk(object):
         self._portfolio = None
         self._benchmark = None
         return result
+
+
+class OnlineRisk(object):
+    """
+    逐日累积的风险指标: 每次 update 为 O(1), 任意时刻的指标与用截至当日的收益序列构造的 Risk 一致
+
+    收益率与基准收益率的均值、方差、协方差使用 Welford 算法累积, 最大回撤使用净值的历史最大值累积
+    """
+    def __init__(self, period=DAILY):
+        self._annual_factor = _annual_factor(period)
+        self._risk_free_rate = 0.
+        self._days = 1
+
+        self._count = 0
+        self._mean = 0.
+        self._benchmark_mean = 0.
+        self._m2 = 0.  # 收益率离差平方和
+        self._benchmark_m2 = 0.  # 基准收益率离差平方和
+        self._co_moment = 0.  # 收益率与基准收益率的离差乘积和
+
+        self._log_return = 0.  # log(1 + r) 的累加
+        self._benchmark_log_return = 0.
+        self._max_nav = -np.inf
+        self._max_drawdown = 0.
+
+        self._active_sum = 0.  # 超额收益的累加
+        self._active_square_sum = 0.  # 超额收益平方的累加
+        self._downside_square_sum = 0.  # 负超额收益平方的累加
+
+    def update(self, daily_return, benchmark_daily_return):
+        """
+        累积一个交易日的收益
+
+        :param float daily_return: 当日收益率
+        :param float benchmark_daily_return: 当日基准收益率
+        """
+        self._count += 1
+        n = self._count
+
+        delta = daily_return - self._mean
+        self._mean += delta / n
+        benchmark_delta = benchmark_daily_return - self._benchmark_mean
+        self._benchmark_mean += benchmark_delta / n
+        self._m2 += delta * (daily_return - self._mean)
+        self._benchmark_m2 += benchmark_delta * (benchmark_daily_return - self._benchmark_mean)
+        self._co_moment += delta * (benchmark_daily_return - self._benchmark_mean)
+
+        self._log_return += np.log1p(daily_return)
+        self._benchmark_log_return += np.log1p(benchmark_daily_return)
+        nav = np.exp(self._log_return)
+        self._max_nav = max(self._max_nav, nav)
+        self._max_drawdown = min(self._max_drawdown, (nav - self._max_nav) / self._max_nav)
+
+        active = daily_return - benchmark_daily_return
+        self._active_sum += active
+        self._active_square_sum += active * active
+        if active < 0:
+            self._downside_square_sum += active * active
+
+    def set_period(self, risk_free_rate, days):
+        """
+        设置计算年化指标所用的无风险利率和自然日天数, 与 Risk 的同名参数含义相同
+        """
+        self._risk_free_rate = risk_free_rate
+        self._days = days
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def return_rate(self):
+        return np.expm1(self._log_return)
+
+    @property
+    def annual_return(self):
+        return (1 + self.return_rate) ** (365 / self._days) - 1
+
+    @property
+    def benchmark_return(self):
+        return np.expm1(self._benchmark_log_return)
+
+    @property
+    def benchmark_annual_return(self):
+        return (1 + self.benchmark_return) ** (365 / self._days) - 1
+
+    @property
+    def beta(self):
+        if self._count < 2:
+            return np.nan
+        return self._co_moment / self._benchmark_m2
+
+    @property
+    def alpha(self):
+        if self._count < 2:
+            return np.nan
+        return self.annual_return - self._risk_free_rate - self.beta * (
+            self.benchmark_annual_return - self._risk_free_rate)
+
+    def _std(self, m2):
+        return (m2 / self._count) ** 0.5
+
+    @property
+    def volatility(self):
+        if self._count < 2:
+            return 0
+        return self._std(self._m2) * (self._count ** 0.5)
+
+    @property
+    def annual_volatility(self):
+        if self._count < 2:
+            return 0
+        return self._std(self._m2) * (self._annual_factor ** 0.5)
+
+    @property
+    def benchmark_volatility(self):
+        if self._count < 2:
+            return 0
+        return self._std(self._benchmark_m2) * (self._count ** 0.5)
+
+    @property
+    def benchmark_annual_volatility(self):
+        if self._count < 2:
+            return 0
+        return self._std(self._benchmark_m2) * (self._annual_factor ** 0.5)
+
+    @property
+    def max_drawdown(self):
+        if self._count < 1:
+            return np.nan
+        return abs(self._max_drawdown)
+
+    @property
+    def tracking_error(self):
+        if self._count < 2:
+            return np.nan
+        return (self._active_square_sum / self._count) ** 0.5 * (self._count ** 0.5)
+
+    @property
+    def annual_tracking_error(self):
+        if self._count < 2:
+            return np.nan
+        return (self._active_square_sum / self._count) ** 0.5 * (self._annual_factor ** 0.5)
+
+    @property
+    def information_ratio(self):
+        if self._count < 2:
+            return np.nan
+        tracking_error = self.tracking_error
+        if tracking_error == 0:
+            return np.nan
+        return self._active_sum / self._count / tracking_error
+
+    @property
+    def sharpe(self):
+        if self.volatility == 0:
+            return np.nan
+        return (self.annual_return - self._risk_free_rate) / self.annual_volatility
+
+    @property
+    def downside_risk(self):
+        if self._count < 1:
+            return np.nan
+        return (self._downside_square_sum / self._count) ** 0.5 * (self._count ** 0.5)
+
+    @property
+    def annual_downside_risk(self):
+        if self._count < 1:
+            return np.nan
+        return (self._downside_square_sum / self._count) ** 0.5 * (self._annual_factor ** 0.5)
+
+    @property
+    def sortino(self):
+        if self.downside_risk == 0:
+            return np.nan
+        return (self.annual_return - self._risk_free_rate) / self.downside_risk
+
+    @property
+    def calmar(self):
+        max_dd = self.max_drawdown
+        if not max_dd > 0:
+            return np.nan
+        calmar = self.annual_return / max_dd
+        return np.nan if np.isinf(calmar) else calmar
+
+    def all(self):
+        return {
+            'return': self.return_rate,
+            'annual_return': self.annual_return,
+            'benchmark_return': self.benchmark_return,
+            'benchmark_annual_return': self.benchmark_annual_return,
+            'alpha': self.alpha,
+            'beta': self.beta,
+            'sharpe': self.sharpe,
+            'max_drawdown': self.max_drawdown,
+            'volatility': self.volatility,
+            'annual_volatility': self.annual_volatility,
+            'information_ratio': self.information_ratio,
+            'downside_risk': self.downside_risk,
+            'sortino': self.sortino,
+            'tracking_error': self.tracking_error,
+            'calmar': self.calmar,
+        }
+
+
+class BatchRisk(object):
+    """
+    批量计算多条收益序列的风险指标, 每个指标为一个数组, 第 i 个元素与 Risk(daily_returns[i], ...) 的结果一致
+
+    :param daily_returns: 二维数组, 每行为一条收益序列(策略 x 交易日)
+    :param benchmark_daily_returns: 与 daily_returns 同形状的二维数组, 或所有序列共用的一维数组
+    """
+    def __init__(self, daily_returns, benchmark_daily_returns, risk_free_rate, days, period=DAILY):
+        portfolio = np.atleast_2d(np.asarray(daily_returns, dtype=np.float64))
+        benchmark = np.asarray(benchmark_daily_returns, dtype=np.float64)
+        benchmark = np.broadcast_to(benchmark, portfolio.shape)
+        annual_factor = _annual_factor(period)
+        n = portfolio.shape[1]
+        nan = np.full(len(portfolio), np.nan)
+
+        self.return_rate = np.expm1(np.log1p(portfolio).sum(axis=1))
+        self.annual_return = (1 + self.return_rate) ** (365 / days) - 1
+        self.benchmark_return = np.expm1(np.log1p(benchmark).sum(axis=1))
+        self.benchmark_annual_return = (1 + self.benchmark_return) ** (365 / days) - 1
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if n < 2:
+                self.beta = nan
+                self.alpha = nan
+                self.volatility = self.annual_volatility = np.zeros(len(portfolio))
+                self.benchmark_volatility = self.benchmark_annual_volatility = np.zeros(len(portfolio))
+                self.tracking_error = self.annual_tracking_error = nan
+                self.information_ratio = nan
+            else:
+                portfolio_dev = portfolio - portfolio.mean(axis=1, keepdims=True)
+                benchmark_dev = benchmark - benchmark.mean(axis=1, keepdims=True)
+                self.beta = (portfolio_dev * benchmark_dev).sum(axis=1) / np.square(benchmark_dev).sum(axis=1)
+                self.alpha = self.annual_return - risk_free_rate - self.beta * (
+                    self.benchmark_annual_return - risk_free_rate)
+
+                std = portfolio.std(axis=1)
+                self.volatility = std * (n ** 0.5)
+                self.annual_volatility = std * (annual_factor ** 0.5)
+                benchmark_std = benchmark.std(axis=1)
+                self.benchmark_volatility = benchmark_std * (n ** 0.5)
+                self.benchmark_annual_volatility = benchmark_std * (annual_factor ** 0.5)
+
+                active = portfolio - benchmark
+                active_rms = np.sqrt(np.mean(np.square(active), axis=1))
+                self.tracking_error = active_rms * (n ** 0.5)
+                self.annual_tracking_error = active_rms * (annual_factor ** 0.5)
+                self.information_ratio = np.where(self.tracking_error == 0, np.nan,
+                                                  np.mean(active, axis=1) / self.tracking_error)
+
+            self.sharpe = np.where(self.volatility == 0, np.nan,
+                                   (self.annual_return - risk_free_rate) / self.annual_volatility)
+
+            if n < 1:
+                self.max_drawdown = nan
+                self.downside_risk = self.annual_downside_risk = nan
+            else:
+                nav = np.exp(np.log1p(portfolio).cumsum(axis=1))
+                max_nav = np.maximum.accumulate(nav, axis=1)
+                self.max_drawdown = np.abs(((nav - max_nav) / max_nav).min(axis=1))
+
+                downside_rms = np.sqrt(np.mean(np.square(np.minimum(portfolio - benchmark, 0)), axis=1))
+                self.downside_risk = downside_rms * (n ** 0.5)
+                self.annual_downside_risk = downside_rms * (annual_factor ** 0.5)
+
+            self.sortino = np.where(self.downside_risk == 0, np.nan,
+                                    (self.annual_return - risk_free_rate) / self.downside_risk)
+            calmar = self.annual_return / self.max_drawdown
+            self.calmar = np.where((self.max_drawdown > 0) & ~np.isinf(calmar), calmar, np.nan)
+
+    def all(self):
+        return {
+            'return': self.return_rate,
+            'annual_return': self.annual_return,
+            'benchmark_return': self.benchmark_return,
+            'benchmark_annual_return': self.benchmark_annual_return,
+            'alpha': self.alpha,
+            'beta': self.beta,
+            'sharpe': self.sharpe,
+            'max_drawdown': self.max_drawdown,
+            'volatility': self.volatility,
+            'annual_volatility': self.annual_volatility,
+            'information_ratio': self.information_ratio,
+            'downside_risk': self.downside_risk,
+            'sortino': self.sortino,
+            'tracking_error': self.tracking_error,
+            'calmar': self.calmar,
+        }
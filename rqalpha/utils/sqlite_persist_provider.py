@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Ricequant, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sqlite3
+import threading
+
+import six
+
+from ..interface import AbstractPersistProvider
+
+
+class SQLitePersistProvider(AbstractPersistProvider):
+    """
+    基于 SQLite 的持久化方案: 同一台机器上的多个策略共用一个数据库文件, 以 (run_id, key) 区分。
+
+    一次保存(begin_batch 到 commit_batch 之间)的全部写入在一个事务中提交, 写入失败时由 abort_batch 回滚;
+    第一次 load 时用一条查询读出该 run_id 的全部状态, 之后的 load 直接从中返回, 事务提交后才更新。
+    """
+    def __init__(self, path, run_id, timeout=30.):
+        """
+        :param str path: 数据库文件
+        :param str run_id: 策略标识
+        :param float timeout: 数据库被其他进程锁住时等待的秒数
+        """
+        dir_name = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(dir_name):
+            os.makedirs(dir_name)
+        self._run_id = run_id
+        self._loaded = None
+        self._in_batch = False
+        self._staged = {}  # 当前事务中写入的 key -> bytes, None 表示删除
+        # 开启后台持久化时写入发生在其他线程中, 由锁保证同一时间只有一个线程访问连接
+        self._lock = threading.RLock()
+        # 多个策略进程共用一个数据库, timeout 即 busy_timeout, 写锁被占用时等待而不是立即失败
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS persist ("
+                           "run_id TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, "
+                           "PRIMARY KEY (run_id, key))")
+
+    def _ensure_loaded(self):
+        if self._loaded is None:
+            cursor = self._conn.execute("SELECT key, value FROM persist WHERE run_id = ?", (self._run_id, ))
+            self._loaded = {k: bytes(v) for k, v in cursor}
+
+    def begin_batch(self):
+        with self._lock:
+            # 在事务外读出已提交的状态, 事务中的查询会读到尚未提交的写入
+            self._ensure_loaded()
+            self._conn.execute("BEGIN")
+            self._in_batch = True
+
+    def commit_batch(self):
+        with self._lock:
+            self._conn.execute("COMMIT")
+            self._in_batch = False
+            self._apply(self._staged)
+            self._staged = {}
+
+    def abort_batch(self):
+        """
+        回滚当前事务, 之后可以重新开始一批写入
+        """
+        with self._lock:
+            self._staged = {}
+            if not self._in_batch:
+                return
+            self._in_batch = False
+            try:
+                self._conn.execute("ROLLBACK")
+            except sqlite3.OperationalError:
+                # 部分错误发生时 SQLite 已自动回滚
+                pass
+
+    def _apply(self, items):
+        if self._loaded is None:
+            return
+        for key, value in six.iteritems(items):
+            if value is None:
+                self._loaded.pop(key, None)
+            else:
+                self._loaded[key] = value
+
+    def _set(self, key, value):
+        if self._in_batch:
+            self._staged[key] = value
+        else:
+            self._apply({key: value})
+
+    def store(self, key, value):
+        assert isinstance(value, bytes), "value must be bytes"
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO persist (run_id, key, value) VALUES (?, ?, ?)",
+                               (self._run_id, key, sqlite3.Binary(value)))
+            self._set(key, value)
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM persist WHERE run_id = ? AND key = ?", (self._run_id, key))
+            self._set(key, None)
+
+    def load(self, key, large_file=False):
+        with self._lock:
+            self._ensure_loaded()
+            return self._loaded.get(key)
+
+    def close(self):
+        with self._lock:
+            self.abort_batch()
+            self._conn.close()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Ricequant, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import six
+from six.moves import cPickle as pickle
+
+from ..const import PERSIST_CODEC
+from . import json as json_utils
+
+
+# 二进制格式: 头部 + 1 字节版本号 + pickle 数据; 没有头部的为 json 格式, 即之前版本保存的数据
+STATE_HEADER = b'RQSTATE'
+STATE_VERSION = 1
+_BINARY_HEADER = STATE_HEADER + six.int2byte(STATE_VERSION)
+
+_codec = PERSIST_CODEC.JSON
+
+
+def set_persist_codec(codec):
+    global _codec
+    _codec = codec
+
+
+def get_persist_codec():
+    return _codec
+
+
+def dumps(obj, json_dumps=json_utils.convert_dict_to_json):
+    """
+    按配置的格式序列化状态
+
+    :param obj: 由 dict/list/日期/枚举等组成的状态
+    :param json_dumps: json 格式下使用的序列化函数, 返回 str
+    :return: bytes
+    """
+    if _codec == PERSIST_CODEC.BINARY:
+        return _BINARY_HEADER + pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+    return json_dumps(obj).encode('utf-8')
+
+
+def loads(state, json_loads=json_utils.convert_json_to_dict):
+    """
+    反序列化状态, 根据头部自动识别格式, 与当前配置的格式无关, 因此切换格式后仍可以读取之前保存的数据
+
+    :param bytes state: 保存的状态
+    :param json_loads: json 格式下使用的反序列化函数, 参数为 str
+    """
+    if state.startswith(STATE_HEADER):
+        version = six.indexbytes(state, len(STATE_HEADER))
+        if version != STATE_VERSION:
+            raise RuntimeError('unsupported persisted state version: {}'.format(version))
+        return pickle.loads(state[len(_BINARY_HEADER):])
+    return json_loads(state.decode('utf-8'))
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Ricequant, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import struct
+import zlib
+
+from ..interface import AbstractPersistProvider
+from .logger import system_log
+
+
+SNAPSHOT_FILE = "snapshot"
+LOG_FILE = "wal.log"
+
+# 日志由若干批记录组成, 每批: 数据长度 + crc32 + 数据; 数据为若干条 (key 长度, value 长度, key, value)
+# value 长度为 _DELETED 的记录表示删除该 key, 其后没有 value
+_BATCH_HEADER = struct.Struct("<II")
+_RECORD_HEADER = struct.Struct("<II")
+_DELETED = 0xffffffff
+
+
+def _encode_record(key, value):
+    if value is None:
+        return _RECORD_HEADER.pack(len(key), _DELETED) + key
+    return _RECORD_HEADER.pack(len(key), len(value)) + key + value
+
+
+def _encode_batch(items):
+    payload = b"".join(_encode_record(key, value) for key, value in items)
+    return _BATCH_HEADER.pack(len(payload), zlib.crc32(payload) & 0xffffffff) + payload
+
+
+def _decode_payload(payload):
+    items = []
+    pos = 0
+    while pos < len(payload):
+        key_len, value_len = _RECORD_HEADER.unpack_from(payload, pos)
+        pos += _RECORD_HEADER.size
+        key = payload[pos:pos + key_len].decode('utf-8')
+        pos += key_len
+        if value_len == _DELETED:
+            items.append((key, None))
+            continue
+        items.append((key, payload[pos:pos + value_len]))
+        pos += value_len
+    return items
+
+
+def _read_batches(data):
+    """
+    :return: (完整且校验通过的记录列表, 有效数据的长度), 遇到写了一半或校验失败的批次即停止
+    """
+    items = []
+    pos = 0
+    while pos + _BATCH_HEADER.size <= len(data):
+        length, crc = _BATCH_HEADER.unpack_from(data, pos)
+        start = pos + _BATCH_HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) & 0xffffffff != crc:
+            break
+        items.extend(_decode_payload(payload))
+        pos = start + length
+    return items, pos
+
+
+def _replace(src, dst):
+    try:
+        os.replace(src, dst)
+    except AttributeError:
+        # python 2 没有 os.replace
+        if os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+
+class WALPersistProvider(AbstractPersistProvider):
+    """
+    基于预写日志的持久化: store 只在日志末尾追加带校验的记录, 日志超过一定大小后合并为快照。
+    启动时读取快照并重放日志, 崩溃时写了一半的记录会被丢弃, 因此恢复出的状态总是某次完整写入后的状态。
+
+    PersistHelper 一次保存的多个 key 作为一批写入, 整批生效或整批丢弃。
+    """
+    def __init__(self, path="./persist", compact_size=16 * 1024 * 1024, fsync=False):
+        """
+        :param str path: 目录
+        :param int compact_size: 日志超过该字节数且超过快照大小时合并为快照
+        :param bool fsync: 每次写入后是否调用 fsync, 开启后可以应对系统崩溃, 但写入更慢
+        """
+        self._path = path
+        self._compact_size = compact_size
+        self._fsync = fsync
+        self._states = {}
+        self._batch = None
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        snapshot_size = self._replay(self._snapshot_file)
+        self._snapshot_size = snapshot_size
+        log_size = self._replay(self._log_file)
+        self._log = open(self._log_file, "ab")
+        # 丢弃末尾不完整的记录, 之后的追加才能被正确读取
+        self._log.truncate(log_size)
+        self._log.seek(log_size)
+        self._log_size = log_size
+
+    @property
+    def _snapshot_file(self):
+        return os.path.join(self._path, SNAPSHOT_FILE)
+
+    @property
+    def _log_file(self):
+        return os.path.join(self._path, LOG_FILE)
+
+    def _replay(self, file_path):
+        if not os.path.exists(file_path):
+            return 0
+        with open(file_path, "rb") as f:
+            data = f.read()
+        items, size = _read_batches(data)
+        if size < len(data):
+            system_log.warn("{}: {} bytes of incomplete records dropped".format(file_path, len(data) - size))
+        for key, value in items:
+            if value is None:
+                self._states.pop(key, None)
+            else:
+                self._states[key] = value
+        return size
+
+    def _write(self, f, data):
+        f.write(data)
+        f.flush()
+        if self._fsync:
+            os.fsync(f.fileno())
+
+    def _append(self, items):
+        """
+        :param items: [(key, value)], value 为 None 表示删除; 写入日志后才更新内存中的状态
+        """
+        data = _encode_batch([(key.encode('utf-8'), value) for key, value in items])
+        try:
+            self._write(self._log, data)
+        except Exception:
+            # 去掉写了一半的记录, 否则之后追加的记录在重放时都会被丢弃
+            self._log.seek(self._log_size)
+            self._log.truncate(self._log_size)
+            raise
+        self._log_size += len(data)
+        for key, value in items:
+            if value is None:
+                self._states.pop(key, None)
+            else:
+                self._states[key] = value
+        if self._log_size > max(self._compact_size, self._snapshot_size):
+            self.compact()
+
+    def begin_batch(self):
+        self._batch = []
+
+    def commit_batch(self):
+        batch, self._batch = self._batch, None
+        if batch:
+            self._append(batch)
+
+    def abort_batch(self):
+        # 尚未写入日志的记录直接丢弃
+        self._batch = None
+
+    def _add(self, key, value):
+        if self._batch is not None:
+            self._batch.append((key, value))
+        else:
+            self._append([(key, value)])
+
+    def store(self, key, value):
+        assert isinstance(value, bytes), "value must be bytes"
+        self._add(key, value)
+
+    def delete(self, key):
+        # 快照中只有存在的 key, 合并后删除记录随之消失
+        if self._batch is not None or key in self._states:
+            self._add(key, None)
+
+    def load(self, key, large_file=False):
+        return self._states.get(key)
+
+    def compact(self):
+        """
+        将当前全部状态写入快照并清空日志。快照先写入临时文件再替换, 替换前崩溃时旧快照和日志仍然完整;
+        替换后、清空日志前崩溃时, 日志中的记录都不比快照新, 重放后结果不变
+        """
+        data = _encode_batch([(key.encode('utf-8'), value) for key, value in self._states.items()])
+        tmp_file = self._snapshot_file + ".tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        _replace(tmp_file, self._snapshot_file)
+        self._snapshot_size = len(data)
+
+        self._log.seek(0)
+        self._log.truncate()
+        self._log_size = 0
+
+    def close(self):
+        self._log.close()
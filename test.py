@@ -154,7 +154,7 @@ def test_api():
 
     from tests.api.test_api_stock import test_order_shares_code_new, test_order_lots_code_new, \
         test_order_value_code_new, \
-        test_order_percent_code_new, test_order_target_value_code_new
+        test_order_percent_code_new, test_order_target_value_code_new, test_order_target_portfolio_code_new
 
     from tests.api.test_api_future import test_buy_open_code_new, test_sell_open_code_new, test_buy_close_code_new, \
         test_sell_close_code_new
@@ -247,6 +247,7 @@ def test_api():
     run(stock_api_config, test_order_value_code_new)
     run(stock_api_config, test_order_percent_code_new)
     run(stock_api_config, test_order_target_value_code_new)
+    run(stock_api_config, test_order_target_portfolio_code_new)
 
     # =================== Test Future API ===================
     run(future_api_config, test_buy_open_code_new)
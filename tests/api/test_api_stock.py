@@ -112,3 +112,23 @@ def test_order_target_value():
         assert order.order_book_id == context.s1
         assert order.price == context.limitprice
 test_order_target_value_code_new = "".join(inspect.getsourcelines(test_order_target_value)[0])
+
+
+def test_order_target_portfolio():
+    from rqalpha.api import order_target_portfolio, SIDE
+    def init(context):
+        context.fired = False
+        context.s1 = "000001.XSHE"
+        context.s2 = "600000.XSHG"
+
+    def handle_bar(context, bar_dict):
+        if context.fired:
+            return
+        context.fired = True
+        orders = order_target_portfolio({context.s1: 0.1, context.s2: 0.05})
+        assert len(orders) == 2
+        for order in orders:
+            assert order.side == SIDE.BUY
+            assert order.order_book_id in (context.s1, context.s2)
+            assert order.unfilled_quantity + order.filled_quantity == order.quantity
+test_order_target_portfolio_code_new = "".join(inspect.getsourcelines(test_order_target_portfolio)[0])
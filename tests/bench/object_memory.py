@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+高频创建对象的内存占用及创建速度基准
+
+在仓库根目录下运行 ``python -m tests.bench.object_memory [count]``, 分别在改动前后的版本上运行即可比较结果。
+需要 Python 3 (tracemalloc)。
+"""
+import sys
+import time
+import datetime
+import tracemalloc
+
+from rqalpha.const import SIDE
+from rqalpha.events import Event, EVENT
+from rqalpha.execution_context import ExecutionContext
+from rqalpha.model.bar import BarObject
+from rqalpha.model.order import Order, MarketOrder
+from rqalpha.model.position import StockPosition, FuturePosition
+
+
+class _Instrument(object):
+    round_lot = 100
+    contract_multiplier = 10
+    listed_date = None
+    de_listed_date = None
+
+
+class _DataProxy(object):
+    def instruments(self, order_book_id):
+        return INSTRUMENT
+
+
+INSTRUMENT = _Instrument()
+DT = datetime.datetime(2017, 1, 3, 9, 31)
+BAR = {"datetime": 20170103093100, "open": 10., "close": 10.1, "high": 10.2, "low": 9.9, "volume": 1000.}
+
+FACTORIES = [
+    ("Order", lambda: Order.__from_create__(DT, DT, "000001.XSHE", 100, SIDE.BUY, MarketOrder(), None)),
+    ("StockPosition", lambda: StockPosition("000001.XSHE")),
+    ("FuturePosition", lambda: FuturePosition("IF1701")),
+    ("BarObject", lambda: BarObject(INSTRUMENT, BAR, DT)),
+    ("Event", lambda: Event(EVENT.BAR, DT, DT)),
+]
+
+
+def measure(factory, count):
+    # 单个对象占用的内存: 创建 count 个对象并保持引用, 取 tracemalloc 的增量均值
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = [factory() for _ in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    # 扣除列表本身的大小
+    size -= sys.getsizeof(objects)
+    del objects
+
+    # 创建速度: 不保持引用, 模拟回测中逐 bar 创建后即丢弃的用法
+    start = time.time()
+    for _ in range(count):
+        factory()
+    elapsed = time.time() - start
+    return size / float(count), count / elapsed
+
+
+def main(count=20000):
+    ExecutionContext.data_proxy = _DataProxy()
+    print("{:<16}{:>14}{:>16}".format("object", "bytes/object", "objects/sec"))
+    for name, factory in FACTORIES:
+        size, rate = measure(factory, count)
+        print("{:<16}{:>14.0f}{:>16.0f}".format(name, size, rate))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import datetime
+
+import pytest
+
+from rqalpha.const import PERSIST_CODEC, SIDE, POSITION_EFFECT
+from rqalpha.events import EventBus
+from rqalpha.execution_context import ExecutionContext
+from rqalpha.model.account import StockAccount
+from rqalpha.model.order import Order, MarketOrder
+from rqalpha.model.trade import Trade
+from rqalpha.utils import state_codec, RqAttrDict
+
+
+class _Instrument(object):
+    round_lot = 100
+    listed_date = None
+    de_listed_date = None
+
+
+class _DataProxy(object):
+    def instruments(self, order_book_id):
+        return _Instrument()
+
+
+class _Env(object):
+    def __init__(self):
+        self.config = RqAttrDict({"base": {"slippage": 0, "slippage_model": None, "slippage_params": None,
+                                           "commission_multiplier": 1}})
+        self.event_bus = EventBus()
+        self._commission_initializer = lambda account_type, multiplier: None
+
+
+@pytest.fixture(autouse=True)
+def data_proxy():
+    ExecutionContext.data_proxy = _DataProxy()
+    ExecutionContext.accounts = {}
+    yield
+    ExecutionContext.data_proxy = None
+    ExecutionContext.accounts = None
+    state_codec.set_persist_codec(PERSIST_CODEC.JSON)
+
+
+def _account():
+    dt = datetime.datetime(2017, 1, 3, 9, 31)
+    account = StockAccount(_Env(), 100000., dt)
+    for order_book_id in ("000001.XSHE", "600000.XSHG"):
+        order = Order.__from_create__(dt, dt, order_book_id, 100, SIDE.BUY, MarketOrder(), POSITION_EFFECT.OPEN)
+        account.daily_orders[order.order_id] = order
+        trade = Trade.__from_create__(order, dt, dt, 10., 100)
+        account.daily_trades.append(trade)
+    return account
+
+
+@pytest.mark.parametrize("codec", [PERSIST_CODEC.JSON, PERSIST_CODEC.BINARY])
+def test_full_state_round_trip(codec):
+    state_codec.set_persist_codec(codec)
+    account = _account()
+    restored = _account()
+    restored.set_state(account.get_state())
+
+    assert sorted(restored.daily_orders) == sorted(account.daily_orders)
+    assert [trade.order.order_id for trade in restored.daily_trades] == \
+        [trade.order.order_id for trade in account.daily_trades]
+    for trade in restored.daily_trades:
+        assert trade.order is restored.daily_orders[trade.order.order_id]
+
+
+@pytest.mark.parametrize("codec", [PERSIST_CODEC.JSON, PERSIST_CODEC.BINARY])
+def test_delta_state_round_trip(codec):
+    state_codec.set_persist_codec(codec)
+    account = _account()
+    parts, changed = account.get_state_delta(full=True)
+    assert list(changed) == parts
+
+    restored = _account()
+    restored.set_state_parts(changed)
+    assert sorted(restored.daily_orders) == sorted(account.daily_orders)
+    assert len(restored.daily_trades) == len(account.daily_trades)
+
+
+def test_delta_writes_only_changed_parts():
+    from rqalpha.events import EVENT
+
+    account = _account()
+    parts, changed = account.get_state_delta(full=True)
+    assert set(['portfolio', 'meta', 'trades']) <= set(changed)
+    account.mark_clean()
+    assert not account.is_dirty()
+    assert account.get_state_delta(full=False)[1] == {}
+
+    # 只改变订单状态的事件不重写组合和 meta
+    order_id = sorted(account.daily_orders)[0]
+    order = account.daily_orders[order_id]
+    account._env.event_bus.publish_event(EVENT.ORDER_CREATION_PASS, account, order)
+    assert account.is_dirty()
+    parts, changed = account.get_state_delta(full=False)
+    assert list(changed) == ['order.{}'.format(order_id)]
+    assert parts == ['portfolio', 'meta', 'trades'] + ['order.{}'.format(i) for i in account.daily_orders]
+    account.mark_clean()
+
+    # 其他账户的订单不影响本账户
+    other = _account()
+    account._env.event_bus.publish_event(EVENT.ORDER_CREATION_PASS, other, order)
+    assert not account.is_dirty()
+
+    # 冻结资金等组合变化时才写入组合
+    account._mark_order_and_portfolio_dirty(account, order)
+    assert list(account.get_state_delta(full=False)[1]) == ['portfolio', 'order.{}'.format(order_id)]
+    account.mark_clean()
+
+    account._last_trade_id = 5
+    assert account.is_dirty()
+    assert list(account.get_state_delta(full=False)[1]) == ['meta']
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import datetime
+
+import six
+import numpy as np
+import pandas as pd
+
+from rqalpha.const import SIDE, POSITION_EFFECT
+from rqalpha.mod.analyser.mod import AnalyserMod
+from rqalpha.utils.repr import properties
+
+
+class _Instrument(object):
+    def __init__(self, order_book_id):
+        self.symbol = "S" + order_book_id[:6]
+
+
+class _DataProxy(object):
+    def instruments(self, order_book_id):
+        return _Instrument(order_book_id)
+
+
+class _Env(object):
+    data_proxy = _DataProxy()
+    accounts = {}
+
+
+class _Portfolio(object):
+    def __init__(self, value, units, daily_returns, frozen, note):
+        self._value = value
+        self._units = units
+        self._daily_returns = daily_returns
+        self._frozen = frozen
+        self._note = note
+
+    @property
+    def portfolio_value(self):
+        return self._value
+
+    @property
+    def units(self):
+        return self._units
+
+    @property
+    def daily_returns(self):
+        return self._daily_returns
+
+    @property
+    def is_frozen(self):
+        return self._frozen
+
+    @property
+    def note(self):
+        return self._note
+
+    @property
+    def start_date(self):
+        return datetime.date(2017, 1, 1)
+
+
+class _SubPortfolio(object):
+    def __init__(self, cash, units):
+        self.cash = cash
+        self.units = units
+        self.side = SIDE.BUY
+        self._hidden = 1
+
+
+class _Position(object):
+    def __init__(self, quantity, market_value, is_traded):
+        self.quantity = quantity
+        self.market_value = market_value
+        self.is_traded = is_traded
+
+
+class _Order(object):
+    def __init__(self, order_book_id, side):
+        self.order_book_id = order_book_id
+        self.side = side
+        self.position_effect = POSITION_EFFECT.OPEN
+
+
+class _Trade(object):
+    def __init__(self, order, price, amount, dt):
+        self._order = order
+        self._price = price
+        self._amount = amount
+        self._dt = dt
+
+    @property
+    def order(self):
+        return self._order
+
+    @property
+    def last_price(self):
+        return self._price
+
+    @property
+    def last_quantity(self):
+        return self._amount
+
+    @property
+    def datetime(self):
+        return self._dt
+
+    @property
+    def trading_datetime(self):
+        return self._dt
+
+
+# 以下为按行记录 dict 的原实现, 作为按列记录结果的参照
+def _to_portfolio_record(date, portfolio):
+    data = {
+        k: AnalyserMod._safe_convert(v, 3) for k, v in six.iteritems(properties(portfolio))
+        if not k.startswith('_') and not k.endswith('_') and k not in {
+            "positions", "start_date", "starting_cash"
+        }
+    }
+    data['date'] = date
+    return data
+
+
+def _to_portfolio_record2(date, portfolio):
+    data = {
+        k: AnalyserMod._safe_convert(v, 3) for k, v in six.iteritems(portfolio.__dict__)
+        if not k.startswith('_') and not k.endswith('_') and k not in {
+            "positions", "start_date", "starting_cash"
+        }
+    }
+    data['date'] = date
+    return data
+
+
+def _to_position_record(date, order_book_id, position):
+    data = {
+        k: AnalyserMod._safe_convert(v, 3) for k, v in six.iteritems(position.__dict__)
+        if not k.startswith('_') and not k.endswith('_')
+    }
+    data['order_book_id'] = order_book_id
+    data['symbol'] = _Instrument(order_book_id).symbol
+    data['date'] = date
+    return data
+
+
+def _to_trade_record(trade):
+    data = {
+        k: AnalyserMod._safe_convert(v) for k, v in six.iteritems(properties(trade))
+        if not k.startswith('_') and not k.endswith('_') and k != 'order'
+    }
+    data['order_book_id'] = trade.order.order_book_id
+    data['symbol'] = _Instrument(trade.order.order_book_id).symbol
+    data['side'] = AnalyserMod._safe_convert(trade.order.side)
+    data['position_effect'] = AnalyserMod._safe_convert(trade.order.position_effect)
+    data['datetime'] = data['datetime'].strftime("%Y-%m-%d %H:%M:%S")
+    data['trading_datetime'] = data['trading_datetime'].strftime("%Y-%m-%d %H:%M:%S")
+    return data
+
+
+def _dated_frame(records):
+    df = pd.DataFrame(records)
+    df['date'] = pd.to_datetime(df['date'])
+    return df.set_index('date').sort_index()
+
+
+def _mod():
+    mod = AnalyserMod()
+    mod._env = _Env()
+    mod._capacity = 2
+    return mod
+
+
+def _assert_same(new, old):
+    pd.testing.assert_frame_equal(new, old, check_like=True)
+
+
+DATES = [datetime.date(2017, 1, 3), datetime.date(2017, 1, 4), datetime.date(2017, 1, 5)]
+
+
+def test_portfolio_frame_matches_dict_records():
+    # python float 与 numpy float 在 .5 边界上取整结果不同, 整数超过 2 ** 53 时不能用 float64 保存
+    portfolios = [
+        _Portfolio(100000.1235, 2 ** 53 + 1, 0.0005, False, None),
+        _Portfolio(np.float64(0.0005), 3, np.float64(0.2785), True, "a"),
+        _Portfolio(99999.2785, 2 ** 64, 0.1235, False, SIDE.SELL),
+    ]
+    mod = _mod()
+    for date, portfolio in zip(DATES, portfolios):
+        mod._record_portfolio(date, portfolio)
+    old = [_to_portfolio_record(date, portfolio) for date, portfolio in zip(DATES, portfolios)]
+    _assert_same(mod._table_frame('total_portfolios', mod._total_portfolios), _dated_frame(old))
+
+
+def test_sub_portfolio_and_position_frames_match_dict_records():
+    mod = _mod()
+    sub_portfolios = [_SubPortfolio(1000.0005, 1), _SubPortfolio(np.float64(1000.0005), 2), _SubPortfolio(7, 3)]
+    positions = [_Position(100, 1000.1235, True), _Position(2 ** 53 + 1, 0.0005, False),
+                 _Position(np.int64(300), np.float32(2.5), True)]
+    for date, sub_portfolio, position in zip(DATES, sub_portfolios, positions):
+        mod._record_sub_portfolio('stock', date, sub_portfolio)
+        mod._record_position('stock', date, "000001.XSHE", position)
+
+    old = [_to_portfolio_record2(date, p) for date, p in zip(DATES, sub_portfolios)]
+    _assert_same(mod._table_frame('stock_portfolios', mod._sub_portfolios['stock']), _dated_frame(old))
+
+    old = [_to_position_record(date, "000001.XSHE", p) for date, p in zip(DATES, positions)]
+    new = mod._table_frame('stock_positions', mod._positions['stock'])
+    _assert_same(new, _dated_frame(old))
+    assert new['quantity'].dtype == np.int64
+    assert new['is_traded'].dtype == np.bool_
+
+
+def test_trade_frame_matches_dict_records():
+    mod = _mod()
+    trades = [
+        _Trade(_Order("000001.XSHE", SIDE.BUY), 10.1235, 100, datetime.datetime(2017, 1, 3, 9, 31)),
+        _Trade(_Order("600000.XSHG", SIDE.SELL), np.float64(10.1235), 2 ** 53 + 1,
+               datetime.datetime(2017, 1, 3, 14, 59)),
+        _Trade(_Order("000001.XSHE", SIDE.SELL), 0.0005, 200, datetime.datetime(2017, 1, 4, 10, 0)),
+    ]
+    for trade in trades:
+        mod._collect_trade(None, trade)
+    old = pd.DataFrame([_to_trade_record(trade) for trade in trades]).set_index('datetime')
+    new = mod._table_frame('trades', mod._trades)
+    _assert_same(new, old)
+    assert new['last_price'].tolist() == [10.123, 10.124, 0.001]
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import os
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from rqalpha.mod.analyser.stream import ResultStreamWriter, StreamResult, STREAM_DIR, iter_table, load_result
+
+
+def _positions(dates, quantity):
+    return pd.DataFrame({
+        "date": pd.to_datetime(dates),
+        "order_book_id": ["000001.XSHE"] * len(dates),
+        "quantity": np.array([quantity] * len(dates), dtype=np.int64),
+        "market_value": [1000.5] * len(dates),
+        "is_traded": [True] * len(dates),
+    }).set_index("date")
+
+
+def test_writer_only_touches_its_own_directory(tmpdir):
+    other = tmpdir.join("data.csv")
+    other.write("keep")
+    ResultStreamWriter(str(tmpdir)).write("trades", pd.DataFrame({"a": [1]}, index=pd.Index(["x"], name="datetime")))
+    assert other.read() == "keep"
+    assert os.path.exists(os.path.join(str(tmpdir), STREAM_DIR, "trades.csv"))
+
+
+def test_round_trip_keeps_dtypes(tmpdir):
+    writer = ResultStreamWriter(str(tmpdir))
+    writer.write("stock_positions", _positions(["2017-01-03", "2017-01-04"], 100))
+    writer.write("stock_positions", _positions(["2017-01-05"], 200))
+    writer.write_summary({"strategy_name": "test"})
+
+    result = load_result(str(tmpdir))
+    assert isinstance(result, StreamResult)
+    assert result["summary"]["strategy_name"] == "test"
+    df = result["stock_positions"]
+    assert len(df) == 3
+    assert df.index[0] == datetime.datetime(2017, 1, 3)
+    assert df["quantity"].dtype == np.int64
+    assert df["market_value"].dtype == np.float64
+    assert df["is_traded"].dtype == np.bool_
+    assert df["order_book_id"].iloc[0] == "000001.XSHE"
+
+    chunks = list(iter_table(str(tmpdir), "stock_positions", chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert chunks[1]["quantity"].iloc[0] == 200
+
+
+def test_widened_column_dtype(tmpdir):
+    writer = ResultStreamWriter(str(tmpdir))
+    writer.write("total_portfolios", _positions(["2017-01-03"], 100))
+    second = _positions(["2017-01-04"], 100)
+    second["quantity"] = 100.5
+    writer.write("total_portfolios", second)
+    df = load_result(str(tmpdir))["total_portfolios"]
+    assert df["quantity"].dtype == np.float64
+    assert list(df["quantity"]) == [100., 100.5]
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import threading
+
+import pytest
+
+from rqalpha.utils.async_persist_provider import AsyncPersistProvider
+
+
+class _MemoryProvider(object):
+    def __init__(self):
+        self.states = {}
+        self.batches = []
+        self._batch = None
+
+    def begin_batch(self):
+        self._batch = {}
+
+    def commit_batch(self):
+        self.batches.append(self._batch)
+        self.states.update(self._batch)
+        self._batch = None
+
+    def store(self, key, value):
+        self._batch[key] = value
+
+    def delete(self, key):
+        self.states.pop(key, None)
+
+    def load(self, key):
+        return self.states.get(key)
+
+
+class _FailingProvider(_MemoryProvider):
+    # 前 failures 次提交失败
+    def __init__(self, failures):
+        super(_FailingProvider, self).__init__()
+        self.failures = failures
+
+    def commit_batch(self):
+        if self.failures > 0:
+            self.failures -= 1
+            self._batch = None
+            raise IOError("disk full")
+        super(_FailingProvider, self).commit_batch()
+
+
+def _commit(provider, items):
+    provider.begin_batch()
+    for key, value in items:
+        provider.store(key, value)
+    provider.commit_batch()
+
+
+def test_writes_reach_wrapped_provider():
+    inner = _MemoryProvider()
+    provider = AsyncPersistProvider(inner)
+    _commit(provider, [("a", b"1"), ("b", b"1")])
+    _commit(provider, [("a", b"2")])
+    assert provider.load("a") == b"2"
+    provider.flush()
+    assert inner.states == {"a": b"2", "b": b"1"}
+    provider.delete("b")
+    provider.close()
+    assert inner.states == {"a": b"2"}
+
+
+def test_pending_writes_are_coalesced():
+    inner = _MemoryProvider()
+    gate = threading.Event()
+    original = inner.commit_batch
+
+    def slow_commit():
+        gate.wait()
+        original()
+    inner.commit_batch = slow_commit
+
+    provider = AsyncPersistProvider(inner)
+    _commit(provider, [("a", b"1")])
+    # 后台线程阻塞在第一批时, 之后的多次提交合并, 同一个 key 只保留最新的状态
+    for i in range(2, 6):
+        _commit(provider, [("a", str(i).encode()), ("b", str(i).encode())])
+    gate.set()
+    provider.close()
+    assert inner.states == {"a": b"5", "b": b"5"}
+    assert len(inner.batches) <= 3
+
+
+def test_failed_batch_is_requeued():
+    inner = _FailingProvider(failures=1)
+    provider = AsyncPersistProvider(inner)
+    _commit(provider, [("a", b"1"), ("b", b"1")])
+    with pytest.raises(RuntimeError):
+        provider.flush()
+    # 失败的状态没有丢失, 仍可读取
+    assert provider.load("b") == b"1"
+
+    # 下一次提交时与失败的状态一起重试, 同一个 key 以新状态为准
+    _commit(provider, [("a", b"2")])
+    provider.flush()
+    assert inner.states == {"a": b"2", "b": b"1"}
+    provider.close()
+
+
+def test_error_is_raised_on_next_commit():
+    inner = _FailingProvider(failures=1)
+    provider = AsyncPersistProvider(inner)
+    _commit(provider, [("a", b"1")])
+    while provider._error is None:
+        provider._cond.acquire()
+        provider._cond.wait(0.01)
+        provider._cond.release()
+    with pytest.raises(RuntimeError):
+        _commit(provider, [("a", b"2")])
+    provider.close()
+    assert inner.states == {"a": b"2"}
+
+
+class _FailingStoreProvider(object):
+    # 不支持批量写入, 第一次 store 失败
+    def __init__(self):
+        self.d = {}
+        self.failed = False
+
+    def store(self, key, value):
+        if not self.failed:
+            self.failed = True
+            raise IOError("disk full")
+        self.d[key] = value
+
+    def load(self, key):
+        return self.d.get(key)
+
+
+def test_close_retries_failed_writes():
+    inner = _FailingStoreProvider()
+    provider = AsyncPersistProvider(inner)
+    provider.store("x", b"1")
+    provider.close()
+    assert inner.d == {"x": b"1"}
+    assert not provider._pending
+
+
+def test_close_raises_when_retry_fails():
+    inner = _FailingProvider(failures=2)
+    provider = AsyncPersistProvider(inner)
+    _commit(provider, [("x", b"1")])
+    with pytest.raises(RuntimeError):
+        provider.close()
+    # 未写入的状态仍保留, 不会被静默丢弃
+    assert provider.load("x") == b"1"
+
+
+def test_mod_handler_tears_down_mods_after_persist_error():
+    from rqalpha.mod.mod_handler import ModHandler
+
+    class _Mod(object):
+        def __init__(self):
+            self.torn_down = False
+
+        def tear_down(self, *args):
+            self.torn_down = True
+
+    class _Env(object):
+        pass
+
+    env = _Env()
+    env.persist_provider = AsyncPersistProvider(_FailingProvider(failures=2))
+    _commit(env.persist_provider, [("x", b"1")])
+    mod = _Mod()
+    handler = ModHandler()
+    handler._env = env
+    handler._mod_list = [("mod", None)]
+    handler._mod_dict = {"mod": mod}
+    handler.tear_down(0)
+    assert mod.torn_down
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# 异步事件源仅支持 Python 3.6 及以上版本
+import asyncio
+
+import pytest
+
+from rqalpha.utils.async_utils import iter_async_events
+
+
+class _AsyncSource(object):
+    def __init__(self, count, error=None):
+        self.count = count
+        self.error = error
+        self.task = None
+        self.closed = False
+        self.loop = None
+
+    async def _background(self):
+        while True:
+            await asyncio.sleep(10)
+
+    async def async_events(self, start_date, end_date, frequency):
+        self.loop = asyncio.get_event_loop()
+        self.task = asyncio.ensure_future(self._background())
+        try:
+            for i in range(self.count):
+                await asyncio.sleep(0)
+                yield i
+            if self.error is not None:
+                raise self.error
+        finally:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.closed = True
+
+
+def _assert_cleaned_up(source):
+    assert source.closed
+    assert source.task.cancelled()
+    assert source.loop.is_closed()
+
+
+def test_all_events():
+    source = _AsyncSource(3)
+    assert list(iter_async_events(source, None, None, "1m")) == [0, 1, 2]
+    _assert_cleaned_up(source)
+
+
+def test_generator_closed_early():
+    source = _AsyncSource(10)
+    events = iter_async_events(source, None, None, "1m")
+    assert next(events) == 0
+    assert next(events) == 1
+    assert not source.closed
+    events.close()
+    _assert_cleaned_up(source)
+
+
+def test_exception_from_event_source():
+    source = _AsyncSource(1, RuntimeError("fail"))
+    events = iter_async_events(source, None, None, "1m")
+    assert next(events) == 0
+    with pytest.raises(RuntimeError):
+        next(events)
+    _assert_cleaned_up(source)
+
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import numpy as np
+
+from rqalpha.mod.simple_stock_realtime_trade.bar_aggregator import MinuteBarAggregator
+
+
+def _update(aggregator, row, dt, price, volume, turnover=None):
+    if turnover is None:
+        turnover = volume * price
+    aggregator.update(np.array([row]), np.array([dt], dtype=np.int64), np.array([float(price)]),
+                      np.array([float(volume)]), np.array([float(turnover)]))
+
+
+def test_minute_bars():
+    aggregator = MinuteBarAggregator()
+    _update(aggregator, 0, 20170301092500, 10, 500)
+    _update(aggregator, 0, 20170301093003, 11, 600)
+    _update(aggregator, 0, 20170301093030, 9, 700)
+    _update(aggregator, 0, 20170301093100, 10, 800)
+    _update(aggregator, 0, 20170301093103, 12, 1000)
+    bars = aggregator.history(0, 10, 20170301150000)
+    assert list(bars['datetime']) == [20170301092500, 20170301093100, 20170301093200]
+    # 开盘前的快照从 0 开始累计
+    assert list(bars['volume']) == [500, 300, 200]
+    bar = bars[1]
+    assert (bar['open'], bar['high'], bar['low'], bar['close']) == (11, 11, 9, 10)
+
+    # 正在合成的分钟线在结束时间之前不返回
+    bars = aggregator.history(0, 10, 20170301093159)
+    assert list(bars['datetime']) == [20170301092500, 20170301093100]
+    assert list(aggregator.history(0, 1, 20170301150000)['datetime']) == [20170301093200]
+
+
+def test_start_after_open_uses_first_snapshot_as_baseline():
+    aggregator = MinuteBarAggregator()
+    _update(aggregator, 0, 20170301100003, 10, 1000000, 10000000)
+    _update(aggregator, 0, 20170301100030, 10, 1000100, 10001000)
+    _update(aggregator, 0, 20170301100103, 10, 1000300, 10003000)
+    bars = aggregator.history(0, 10, 20170301150000)
+    assert list(bars['volume']) == [100, 200]
+    assert list(bars['total_turnover']) == [1000, 2000]
+
+
+def test_new_day_resets_baseline():
+    aggregator = MinuteBarAggregator()
+    _update(aggregator, 0, 20170301145930, 10, 5000)
+    _update(aggregator, 0, 20170301150000, 10, 6000)
+    _update(aggregator, 0, 20170302092500, 10, 300)
+    _update(aggregator, 0, 20170302093003, 10, 400)
+    bars = aggregator.history(0, 10, 20170302150000)
+    assert list(bars['datetime']) == [20170301150000, 20170302092500, 20170302093100]
+    # 前一天从 14:59:30 的快照开始累计, 次日开盘前的快照从 0 开始累计
+    assert list(bars['volume']) == [1000, 300, 100]
+
+
+def test_ring_buffer_and_invalid_snapshots():
+    aggregator = MinuteBarAggregator(capacity=3)
+    for i in range(6):
+        _update(aggregator, 2, 20170301093001 + 100 * i, 10 + i, 100 * (i + 1))
+    # 价格为 0 或时间无法解析的快照被忽略
+    _update(aggregator, 2, 20170301093700, 0, 10000)
+    _update(aggregator, 2, 0, 20, 10000)
+    bars = aggregator.history(2, 10, 20170301150000)
+    # 3 根已完成的分钟线和正在合成的一根
+    assert list(bars['close']) == [12, 13, 14, 15]
+    assert list(bars['volume']) == [100] * 4
+    assert len(aggregator.history(0, 10, 20170301150000)) == 0
+    assert len(aggregator.history(5, 10, 20170301150000)) == 0
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import pytest
+
+from rqalpha.const import SIDE, ORDER_STATUS, ACCOUNT_TYPE, INSTRUMENT_TYPE
+from rqalpha.events import EVENT
+from rqalpha.mod.simulation.simulation_broker import SimulationBroker
+from rqalpha.model.commission import StockCommission
+
+from .test_tick_matching import env, _Account, _Instrument, _Position, _order, _tick  # noqa: F401
+
+OBID = "000001.XSHE"
+
+
+@pytest.fixture
+def broker(env):
+    _Instrument.enum_type = INSTRUMENT_TYPE.CS
+    account = _Account()
+    account.commission_decider = StockCommission(1)
+    account.portfolio.positions[OBID] = _Position()
+    broker = SimulationBroker(env)
+    broker._accounts = {ACCOUNT_TYPE.STOCK: account}
+    trades = []
+    env.event_bus.add_listener(EVENT.TRADE, lambda a, trade: trades.append(trade))
+    yield broker, account, trades
+    del _Instrument.enum_type
+
+
+def _submit(broker, account, quantity):
+    order = _order(quantity, SIDE.BUY)
+    broker._open_orders.append((account, order))
+    return order
+
+
+def test_partial_fills_charge_min_commission_once(broker):
+    broker, account, trades = broker
+    commission = account.commission_decider
+    order = _submit(broker, account, 300)
+    # 每笔 tick 只能成交 100 股: 10.01 * 100 * 0.0008 不足最低手续费
+    volume = 0
+    for i in range(2):
+        volume += 400
+        broker.tick(_tick(volume=volume, ask_volume=100))
+        assert order.status == ORDER_STATUS.ACTIVE
+        # 订单未进入终态前保留剩余最低手续费的记录
+        assert order.order_id in commission.commission_map
+    assert [t.commission for t in trades] == [5, 0]
+    assert commission.commission_map[order.order_id] == pytest.approx(5 - 2 * 10.01 * 100 * 0.0008)
+
+    broker.tick(_tick(volume=volume + 400, ask_volume=100))
+    assert order.status == ORDER_STATUS.FILLED
+    assert sum(t.commission for t in trades) == 5
+    assert len(commission.commission_map) == 0
+
+
+def test_large_fill_releases_record(broker):
+    broker, account, trades = broker
+    order = _submit(broker, account, 1000)
+    broker.tick(_tick())
+    assert order.status == ORDER_STATUS.FILLED
+    assert trades[0].commission == pytest.approx(10.01 * 1000 * 0.0008)
+    assert len(account.commission_decider.commission_map) == 0
+
+
+def test_cancelled_order_releases_record(broker):
+    broker, account, trades = broker
+    order = _submit(broker, account, 300)
+    broker.tick(_tick(volume=400, ask_volume=100))
+    assert order.order_id in account.commission_decider.commission_map
+    broker.cancel_order(order)
+    assert order.status == ORDER_STATUS.CANCELLED
+    assert len(account.commission_decider.commission_map) == 0
+
+
+def test_rejected_at_close_releases_record(broker):
+    broker, account, trades = broker
+    filled, rejected = _submit(broker, account, 100), _submit(broker, account, 300)
+    broker.tick(_tick(volume=800, ask_volume=200))
+    assert filled.status == ORDER_STATUS.FILLED
+    assert rejected.order_id in account.commission_decider.commission_map
+    broker.after_trading()
+    assert rejected.status == ORDER_STATUS.REJECTED
+    assert len(account.commission_decider.commission_map) == 0
+    assert broker.get_open_orders() == []
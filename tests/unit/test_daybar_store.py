@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import datetime
+
+import numpy as np
+
+from rqalpha.data.base_data_source import BaseDataSource
+from rqalpha.data.converter import FutureDayBarConverter
+from rqalpha.data.daybar_store import DayBarStore
+
+
+class _Table(object):
+    def __init__(self, cols, line_map):
+        self.cols = cols
+        self.attrs = {'line_map': line_map}
+
+
+def _store():
+    # 两个合约的日线按标的连续存放
+    table = _Table({
+        'date': np.array([20170103, 20170104, 20170105, 20170104, 20170105], dtype=np.uint32),
+        'settlement': np.array([30000000, 30100000, 30200000, 25000000, 25100000], dtype=np.int64),
+    }, {'IF1701': (0, 3), 'IH1701': (3, 5)})
+    store = DayBarStore.__new__(DayBarStore)
+    store._table = table
+    store._index = table.attrs['line_map']
+    store._converter = FutureDayBarConverter
+    return store
+
+
+def test_get_field_at_matches_per_instrument_lookup():
+    store = _store()
+    prices = store.get_field_at(['IH1701', 'IF1701', 'IC1701'], 20170104, 'settlement')
+    assert prices[0] == 2500.
+    assert prices[1] == 3010.
+    assert np.isnan(prices[2])
+
+
+def test_get_field_at_missing_date():
+    store = _store()
+    prices = store.get_field_at(['IF1701', 'IH1701'], 20170103, 'settlement')
+    assert prices[0] == 3000.
+    assert np.isnan(prices[1])
+    assert np.isnan(store.get_field_at(['IF1701'], 20170106, 'settlement')[0])
+
+
+class _Instrument(object):
+    def __init__(self, order_book_id):
+        self.order_book_id = order_book_id
+
+
+class _OverriddenSettleSource(BaseDataSource):
+    def get_settle_price(self, instrument, date):
+        return 1.
+
+
+def _data_source(cls):
+    source = cls.__new__(cls)
+    source._day_bars = [None, None, _store(), None]
+    return source
+
+
+def test_get_settle_prices_reads_store():
+    source = _data_source(BaseDataSource)
+    prices = source.get_settle_prices([_Instrument('IF1701'), _Instrument('IH1701')], datetime.date(2017, 1, 4))
+    assert list(prices) == [3010., 2500.]
+
+
+def test_get_settle_prices_uses_overridden_get_settle_price():
+    source = _data_source(_OverriddenSettleSource)
+    prices = source.get_settle_prices([_Instrument('IF1701'), _Instrument('IH1701')], datetime.date(2017, 1, 4))
+    assert list(prices) == [1., 1.]
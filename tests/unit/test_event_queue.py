@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import threading
+
+from rqalpha.events import EVENT
+from rqalpha.mod.simple_stock_realtime_trade.event_queue import EventQueue, EventSourceMetrics
+
+
+def _drain(queue):
+    items = []
+    while True:
+        item = queue.get(timeout=0)
+        if item is None:
+            return items
+        items.append(item)
+
+
+def test_consecutive_bars_are_coalesced_in_order():
+    queue = EventQueue(coalesce_bars=True)
+    queue.put(1, EVENT.BEFORE_TRADING)
+    queue.put(2, EVENT.BAR)
+    queue.put(3, EVENT.BAR)
+    queue.put(4, EVENT.BAR)
+    queue.put(5, EVENT.AFTER_TRADING)
+    queue.put(6, EVENT.BAR)
+    queue.put(7, EVENT.SETTLEMENT)
+    assert len(queue) == 5
+    assert queue.coalesced == 2
+    items = _drain(queue)
+    # 其他事件不合并, 先后顺序不变; 合并后的 BAR 使用最新的时间
+    assert [(dt, event_type) for dt, event_type, _ in items] == [
+        (1, EVENT.BEFORE_TRADING), (4, EVENT.BAR), (5, EVENT.AFTER_TRADING), (6, EVENT.BAR), (7, EVENT.SETTLEMENT)]
+
+
+def test_coalesced_bar_keeps_first_enqueue_time():
+    queue = EventQueue(coalesce_bars=True)
+    queue.put(1, EVENT.BAR)
+    enqueue_time = queue._items[-1][2]
+    queue.put(2, EVENT.BAR)
+    assert queue.get(timeout=0) == (2, EVENT.BAR, enqueue_time)
+
+
+def test_bars_after_dequeue_are_not_coalesced():
+    queue = EventQueue(coalesce_bars=True)
+    queue.put(1, EVENT.BAR)
+    assert queue.get(timeout=0)[0] == 1
+    queue.put(2, EVENT.BAR)
+    assert queue.get(timeout=0)[0] == 2
+    assert queue.coalesced == 0
+
+
+def test_without_coalescing():
+    queue = EventQueue(coalesce_bars=False)
+    for dt in range(3):
+        queue.put(dt, EVENT.BAR)
+    assert [item[0] for item in _drain(queue)] == [0, 1, 2]
+    assert queue.coalesced == 0
+
+
+def test_get_waits_for_put():
+    queue = EventQueue()
+    assert queue.get(timeout=0.01) is None
+    timer = threading.Timer(0.05, queue.put, (1, EVENT.BAR))
+    timer.start()
+    try:
+        assert queue.get(timeout=5)[0] == 1
+    finally:
+        timer.join()
+
+
+def test_metrics():
+    metrics = EventSourceMetrics(lag_warning_threshold=1)
+    metrics.on_dequeue(0, 3)
+    assert metrics.is_lagging()
+    metrics.on_bar_handled(0.5)
+    metrics.on_bar_handled(1.5)
+    result = metrics.to_dict()
+    assert result["events"] == 1 and result["bars"] == 2
+    assert result["max_queue_depth"] == 3
+    assert result["max_bar_time"] == 1.5 and result["mean_bar_time"] == 1.
+    assert not EventSourceMetrics().is_lagging()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import os
+from collections import OrderedDict
+
+import pytest
+
+from rqalpha.const import PERSIST_MODE
+from rqalpha.events import EventBus
+from rqalpha.utils.disk_persist_provider import DiskPersistProvider
+from rqalpha.utils.persisit_helper import PersistHelper
+from rqalpha.utils.wal_persist_provider import WALPersistProvider
+
+
+class _Parts(object):
+    # 按部分保存的对象, 每个部分的内容为一段 bytes
+    def __init__(self, parts):
+        self.parts = OrderedDict(parts)
+        self.restored = None
+
+    def get_state(self):
+        return b"".join(self.parts.values())
+
+    def set_state(self, state):
+        raise AssertionError("full state should not be restored")
+
+    def get_state_delta(self, full):
+        return list(self.parts), OrderedDict(self.parts)
+
+    def set_state_parts(self, parts):
+        self.restored = OrderedDict(parts)
+
+
+def _helper(path, obj):
+    helper = PersistHelper(DiskPersistProvider(path), EventBus(), PERSIST_MODE.ON_CRASH)
+    helper.register("account", obj)
+    return helper
+
+
+def test_dropped_parts_are_deleted(tmpdir):
+    path = str(tmpdir)
+    obj = _Parts([("portfolio", b"p"), ("order.1", b"o1"), ("order.2", b"o2")])
+    helper = _helper(path, obj)
+    helper.persist()
+    assert os.path.exists(os.path.join(path, "account.order.1"))
+
+    del obj.parts["order.1"]
+    helper.persist()
+    assert not os.path.exists(os.path.join(path, "account.order.1"))
+    assert os.path.exists(os.path.join(path, "account.order.2"))
+
+    restored = _Parts([])
+    _helper(path, restored).restore()
+    assert restored.restored == OrderedDict([("portfolio", b"p"), ("order.2", b"o2")])
+
+
+def test_stale_parts_of_previous_run_are_deleted(tmpdir):
+    path = str(tmpdir)
+    _helper(path, _Parts([("portfolio", b"p"), ("order.1", b"o1")])).persist()
+
+    # 新的一次运行没有恢复状态, 第一次保存时按已保存的清单清理
+    _helper(path, _Parts([("portfolio", b"p2")])).persist()
+    assert sorted(os.listdir(path)) == ["account", "account.portfolio"]
+
+
+class _FailingWAL(WALPersistProvider):
+    def __init__(self, path):
+        super(_FailingWAL, self).__init__(path)
+        self.fail = False
+
+    def store(self, key, value):
+        if self.fail and key.startswith("account.order"):
+            raise IOError("disk full")
+        super(_FailingWAL, self).store(key, value)
+
+
+class _Dirty(_Parts):
+    def __init__(self, parts):
+        super(_Dirty, self).__init__(parts)
+        self.dirty = True
+
+    def is_dirty(self):
+        return self.dirty
+
+    def mark_clean(self):
+        self.dirty = False
+
+
+def test_failed_persist_aborts_batch(tmpdir):
+    path = str(tmpdir)
+    provider = _FailingWAL(path)
+    obj = _Dirty([("portfolio", b"p"), ("order.1", b"o1")])
+    helper = PersistHelper(provider, EventBus(), PERSIST_MODE.ON_CRASH)
+    helper.register("account", obj)
+    helper.persist()
+    assert not obj.dirty
+
+    obj.parts["portfolio"] = b"p2"
+    obj.parts["order.2"] = b"o2"
+    obj.dirty = True
+    provider.fail = True
+    with pytest.raises(IOError):
+        helper.persist()
+    # 整批放弃: 已经写入的 portfolio 和新清单都不生效, 对象仍标记为有变化
+    assert obj.dirty
+    assert provider.load("account.portfolio") == b"p"
+    provider.compact()
+    restored = _Parts([])
+    helper = PersistHelper(WALPersistProvider(path), EventBus(), PERSIST_MODE.ON_CRASH)
+    helper.register("account", restored)
+    helper.restore()
+    assert restored.restored == OrderedDict([("portfolio", b"p"), ("order.1", b"o1")])
+
+    provider.fail = False
+    helper = PersistHelper(provider, EventBus(), PERSIST_MODE.ON_CRASH)
+    helper.register("account", obj)
+    helper.persist()
+    assert not obj.dirty
+    assert provider.load("account.order.2") == b"o2"
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import datetime
+
+import pytest
+
+from rqalpha.const import ACCOUNT_TYPE
+from rqalpha.execution_context import ExecutionContext
+from rqalpha.model.portfolio import StockPortfolio
+from rqalpha.model.portfolio.portfolio_history import PortfolioHistory
+
+
+class _Instrument(object):
+    round_lot = 100
+    listed_date = None
+    de_listed_date = None
+
+
+class _DataProxy(object):
+    def instruments(self, order_book_id):
+        return _Instrument()
+
+
+@pytest.fixture(autouse=True)
+def data_proxy():
+    ExecutionContext.data_proxy = _DataProxy()
+    ExecutionContext.accounts = {}
+    yield
+    ExecutionContext.data_proxy = None
+    ExecutionContext.accounts = None
+
+
+def _buy(portfolio, order_book_id, quantity, price):
+    position = portfolio.positions[order_book_id]
+    position._buy_trade_quantity += quantity
+    position._buy_trade_value += quantity * price
+    position._avg_price = price
+    position._last_price = price
+    position._market_value = position._quantity * price
+
+
+def test_snapshots_are_independent_of_later_changes():
+    day1, day2 = datetime.date(2017, 1, 3), datetime.date(2017, 1, 4)
+    portfolio = StockPortfolio(100000., day1, ACCOUNT_TYPE.STOCK)
+    history = PortfolioHistory()
+
+    _buy(portfolio, "000001.XSHE", 1000, 9.)
+    history.append(day1, portfolio)
+    _buy(portfolio, "000001.XSHE", 500, 10.)
+    _buy(portfolio, "600000.XSHG", 200, 15.)
+    history.append(day2, portfolio)
+
+    first = history[day1]
+    assert list(first.positions) == ["000001.XSHE"]
+    assert first.positions["000001.XSHE"].quantity == 1000
+    assert first.positions["000001.XSHE"].market_value == 9000.
+    assert first.market_value == 9000.
+
+    second = history[day2]
+    assert list(second.positions) == ["000001.XSHE", "600000.XSHG"]
+    assert second.positions["000001.XSHE"].quantity == 1500
+    assert second.positions["000001.XSHE"].avg_price == 10.
+    assert second.positions["600000.XSHG"].bought_value == 3000.
+    assert history.get(datetime.date(2017, 1, 5)) is None
+
+
+def test_same_day_append_replaces_snapshot():
+    day = datetime.date(2017, 1, 3)
+    portfolio = StockPortfolio(100000., day, ACCOUNT_TYPE.STOCK)
+    history = PortfolioHistory()
+
+    _buy(portfolio, "000001.XSHE", 1000, 9.)
+    history.append(day, portfolio)
+    _buy(portfolio, "600000.XSHG", 200, 15.)
+    history.append(day, portfolio)
+
+    assert len(history) == 1
+    assert sorted(history[day].positions) == ["000001.XSHE", "600000.XSHG"]
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import pytest
+
+from rqalpha.execution_context import ExecutionContext
+from rqalpha.model.position import Positions, StockPosition
+
+
+class _Instrument(object):
+    round_lot = 100
+    listed_date = None
+    de_listed_date = None
+
+
+class _DataProxy(object):
+    def instruments(self, order_book_id):
+        return _Instrument()
+
+
+@pytest.fixture(autouse=True)
+def data_proxy():
+    ExecutionContext.data_proxy = _DataProxy()
+    yield
+    ExecutionContext.data_proxy = None
+
+
+def test_attach_and_detach_keep_values():
+    positions = Positions(StockPosition)
+    position = positions["000001.XSHE"]
+    position._buy_trade_quantity = 1000
+    assert position._buy_trade_quantity == 1000
+
+    positions.pop("000001.XSHE")
+    assert position._container is None
+    assert position._buy_trade_quantity == 1000
+
+
+def test_double_attach_raises():
+    a = Positions(StockPosition)
+    b = Positions(StockPosition)
+    position = a["000001.XSHE"]
+    with pytest.raises(RuntimeError):
+        b["000001.XSHE"] = position
+    # 重新设置到同一个 key 不算重复挂载
+    a["000001.XSHE"] = position
+    assert a["000001.XSHE"] is position
+
+
+
+def _market_value(positions):
+    return positions._market_value
+
+
+def test_update_and_setdefault_attach():
+    positions = Positions(StockPosition)
+    a, b, c = StockPosition("000001.XSHE"), StockPosition("000002.XSHE"), StockPosition("000003.XSHE")
+    positions.update({"000001.XSHE": a}, **{"000002.XSHE": b})
+    assert positions.setdefault("000003.XSHE", c) is c
+    assert positions.setdefault("000003.XSHE", StockPosition("000003.XSHE")) is c
+    for position in (a, b, c):
+        assert position._container is positions
+    assert sorted(p._order_book_id for p in positions._rows) == ["000001.XSHE", "000002.XSHE", "000003.XSHE"]
+
+    # 挂载后市值列的变化计入汇总
+    a._market_value = 100.
+    c._market_value = 50.
+    assert _market_value(positions) == 150.
+
+    key, position = positions.popitem()
+    assert position._container is None
+    assert len(positions._rows) == 2
+    assert _market_value(positions) == 150. - position._market_value
+
+
+def test_update_rejects_position_attached_elsewhere():
+    a = Positions(StockPosition)
+    b = Positions(StockPosition)
+    position = a["000001.XSHE"]
+    with pytest.raises(RuntimeError):
+        b.update({"000001.XSHE": position})
+    with pytest.raises(RuntimeError):
+        b.setdefault("000001.XSHE", position)
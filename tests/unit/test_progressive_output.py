@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import os
+import datetime
+
+import pandas as pd
+
+from rqalpha.events import EVENT, EventBus
+from rqalpha.mod.progressive_output_csv import mod as output_mod
+from rqalpha.mod.progressive_output_csv.mod import ProgressiveOutputCSVMod, read_columns, COLUMNS_DIR
+from rqalpha.utils import RqAttrDict
+
+
+class _Portfolio(object):
+    portfolio_value = 100000.
+    market_value = 0.
+    total_returns = 0.
+
+
+class _Account(object):
+    portfolio = _Portfolio()
+
+
+class _Env(object):
+    def __init__(self):
+        self.event_bus = EventBus()
+        self.account = _Account()
+        self.calendar_dt = datetime.datetime(2017, 3, 1, 9, 31)
+
+
+def _start(tmpdir, **kwargs):
+    config = {"output_path": str(tmpdir), "flush_rows": 100, "flush_interval": 1000, "daily_only": False,
+              "output_format": "csv"}
+    config.update(kwargs)
+    env = _Env()
+    mod = ProgressiveOutputCSVMod()
+    mod.start_up(env, RqAttrDict(config))
+    return env, mod
+
+
+def _bar(env, i):
+    env.calendar_dt = datetime.datetime(2017, 3, 1, 9, 31) + datetime.timedelta(days=i)
+    env.account.portfolio.portfolio_value = 100000. + i
+    env.event_bus.publish_event(EVENT.POST_BAR)
+
+
+def _csv_rows(tmpdir):
+    path = os.path.join(str(tmpdir), "portfolio.csv")
+    if not os.path.exists(path):
+        return 0
+    return len(pd.read_csv(path))
+
+
+def test_buffer_by_rows(tmpdir):
+    env, mod = _start(tmpdir, flush_rows=3)
+    for i in range(2):
+        _bar(env, i)
+    assert _csv_rows(tmpdir) == 0
+    _bar(env, 2)
+    assert _csv_rows(tmpdir) == 3
+    _bar(env, 3)
+    assert _csv_rows(tmpdir) == 3
+    # 运行结束时写入剩余的行
+    mod.tear_down(0)
+    df = pd.read_csv(os.path.join(str(tmpdir), "portfolio.csv"))
+    assert list(df["portfolio_value"]) == [100000., 100001., 100002., 100003.]
+    assert list(df["datetime"]) == ["2017-03-0{}".format(i) for i in range(1, 5)]
+
+
+def test_buffer_by_interval(tmpdir, monkeypatch):
+    now = [1000.]
+    monkeypatch.setattr(output_mod.time, "time", lambda: now[0])
+    env, mod = _start(tmpdir, flush_interval=5)
+    _bar(env, 0)
+    now[0] += 4
+    _bar(env, 1)
+    assert _csv_rows(tmpdir) == 0
+    now[0] += 1
+    _bar(env, 2)
+    assert _csv_rows(tmpdir) == 3
+    mod.tear_down(0)
+
+
+def test_daily_only(tmpdir):
+    env, mod = _start(tmpdir, daily_only=True, flush_rows=1)
+    _bar(env, 0)
+    assert _csv_rows(tmpdir) == 0
+    env.event_bus.publish_event(EVENT.POST_AFTER_TRADING)
+    assert _csv_rows(tmpdir) == 1
+    mod.tear_down(0)
+
+
+def test_columns_round_trip(tmpdir):
+    env, mod = _start(tmpdir, output_format="columns", flush_rows=2)
+    for i in range(3):
+        _bar(env, i)
+    mod.tear_down(0)
+    df = read_columns(str(tmpdir))
+    assert list(df["datetime"]) == [20170301093100, 20170302093100, 20170303093100]
+    assert list(df["portfolio_value"]) == [100000., 100001., 100002.]
+    assert df["datetime"].dtype.kind == "i"
+
+    # 再次运行时追加
+    env, mod = _start(tmpdir, output_format="columns")
+    _bar(env, 3)
+    mod.tear_down(0)
+    assert len(read_columns(str(tmpdir))) == 4
+
+
+def test_columns_with_torn_write(tmpdir):
+    env, mod = _start(tmpdir, output_format="columns")
+    for i in range(2):
+        _bar(env, i)
+    mod.tear_down(0)
+    # 模拟写入中途退出: 最后一列少写了一行, 另一列只写了半个值
+    path = os.path.join(str(tmpdir), COLUMNS_DIR)
+    for name, size in (("total_returns.f8", 8), ("market_value.f8", 12)):
+        with open(os.path.join(path, name), "r+b") as f:
+            f.truncate(size)
+    assert len(read_columns(str(tmpdir))) == 1
+
+    env, mod = _start(tmpdir, output_format="columns")
+    _bar(env, 5)
+    mod.tear_down(0)
+    df = read_columns(str(tmpdir))
+    assert list(df["portfolio_value"]) == [100000., 100005.]
+    assert list(df["datetime"]) == [20170301093100, 20170306093100]
+
+
+def test_tear_down_without_start_up():
+    # 之前的模块 start_up 失败时, tear_down 不能出错
+    ProgressiveOutputCSVMod().tear_down(1)
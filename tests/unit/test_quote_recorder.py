@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import datetime
+
+import pandas as pd
+import pytest
+
+from rqalpha.mod.simple_stock_realtime_trade.quote_recorder import QuoteRecorder, iter_records
+
+
+def _quotes(codes, price):
+    return pd.DataFrame({
+        "code": codes,
+        "name": ["N" + code for code in codes],
+        "price": [str(price)] * len(codes),
+        "volume": [""] * len(codes),
+        "is_index": [code == "sh" for code in codes],
+    })
+
+
+@pytest.mark.parametrize("chunksize", [1, 2, 3, 100])
+def test_records_are_grouped_across_chunks(tmpdir, chunksize):
+    path = str(tmpdir.join("quotes"))
+    recorder = QuoteRecorder(path)
+    start = datetime.datetime(2017, 3, 1, 9, 30, 0, 500000)
+    fetches = []
+    for day in range(2):
+        for i in range(4):
+            fetch_time = start + datetime.timedelta(days=day, seconds=3 * i)
+            codes = ["600000", "000001", "sh"][:i % 3 + 1]
+            recorder.record(fetch_time, _quotes(codes, 10 + i))
+            fetches.append((fetch_time, codes, str(10 + i)))
+
+    records = list(iter_records(path, chunksize=chunksize))
+    assert len(records) == len(fetches)
+    for (fetch_time, df), (expected_time, codes, price) in zip(records, fetches):
+        assert fetch_time == expected_time
+        assert list(df.columns) == ["code", "name", "price", "volume", "is_index"]
+        assert list(df["code"]) == codes
+        assert list(df["price"]) == [price] * len(codes)
+        # 空字符串保持原样, 由 QuoteTable 解析
+        assert list(df["volume"]) == [""] * len(codes)
+        assert list(df["is_index"]) == [code == "sh" for code in codes]
+        assert list(df.index) == list(range(len(codes)))
+
+
+def test_empty_directory(tmpdir):
+    assert list(iter_records(str(tmpdir))) == []
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import numpy as np
+import pandas as pd
+
+from rqalpha.mod.simple_stock_realtime_trade.quote_table import QuoteTable, QUOTE_FIELDS
+
+
+def _quotes(rows):
+    """
+    :param rows: [(code, time, price, volume, amount, is_index)]
+    :return: 与 tushare 实时行情相同格式的 DataFrame, 值为字符串
+    """
+    records = []
+    for code, time, price, volume, amount, is_index in rows:
+        record = {field: "0" for field in QUOTE_FIELDS}
+        record.update({
+            "code": code, "name": "N" + code, "date": "2017-03-01", "time": time,
+            "open": "10.0", "pre_close": "10.0", "high": price, "low": price, "price": price,
+            "volume": volume, "amount": amount, "is_index": is_index,
+        })
+        records.append(record)
+    return pd.DataFrame(records)
+
+
+def test_update_and_get():
+    table = QuoteTable()
+    table.update(_quotes([
+        ("600000", "09:30:05", "11.0", "100", "1100", False),
+        ("000001", "09:30:06", "", "", "", False),
+        ("sh", "09:30:07", "3200.5", "1000", "2000", True),
+    ]))
+    assert len(table) == 3
+    assert "600000.XSHG" in table and "000001.XSHE" in table and "000001.XSHG" in table
+
+    bar = table.get("600000.XSHG")
+    assert bar["price"] == bar["close"] == bar["last"] == 11.0
+    assert bar["prev_close"] == 10.0
+    assert bar["volume"] == 100 and bar["total_turnover"] == 1100
+    assert np.isclose(bar["chg"], 0.1)
+    assert bar["datetime"] == 20170301093005
+    assert bar["name"] == "N600000" and bar["is_index"] is False
+
+    # 空字符串记为 0
+    bar = table.get("000001.XSHE")
+    assert bar["price"] == 0 and bar["volume"] == 0
+    assert table.get("000001.XSHG")["is_index"] is True
+    assert table.get("000002.XSHE") is None
+
+
+def test_invalid_values():
+    table = QuoteTable()
+    table.update(_quotes([
+        ("600000", "09:30:05", "abc", "100", "1100", False),
+        ("600001", "bad", "12.0", "200", "2400", False),
+    ]))
+    # 无法解析的值记为 0, 不影响其他字段
+    bar = table.get("600000.XSHG")
+    assert bar["price"] == 0 and bar["volume"] == 100
+    bar = table.get("600001.XSHG")
+    assert bar["price"] == 12.0 and bar["datetime"] == 0
+
+
+def test_update_in_place_and_grow():
+    table = QuoteTable(capacity=2)
+    codes = ["60000{}".format(i) for i in range(5)]
+    table.update(_quotes([(code, "09:30:05", "11.0", "100", "1100", False) for code in codes]))
+    table.update(_quotes([("600003", "09:30:10", "12.0", "300", "3500", False)]))
+    assert len(table) == 5
+    assert table.get("600003.XSHG")["price"] == 12.0
+    assert table.get("600004.XSHG")["price"] == 11.0
+
+    df = table.to_frame()
+    assert list(df.index) == sorted(code + ".XSHG" for code in codes)
+    assert df.loc["600003.XSHG", "volume"] == 300
+
+
+def test_empty_update():
+    table = QuoteTable()
+    table.update(pd.DataFrame())
+    assert len(table) == 0
+    assert table.to_frame().empty
+    assert len(table.history_bars("600000.XSHG", 10, 20170301150000)) == 0
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# encoding: utf-8
+from rqalpha.const import RUN_TYPE
+from rqalpha.mod.simple_stock_realtime_trade import mod as realtime_mod
+from rqalpha.utils import RqAttrDict
+
+
+class _Env(object):
+    def __init__(self, persist):
+        self.config = RqAttrDict({"base": {
+            "run_type": RUN_TYPE.PAPER_TRADING, "data_bundle_path": None, "persist": persist,
+            "strategy_file": "strategy.py",
+        }})
+        self.persist_provider = None
+
+    def set_data_source(self, data_source):
+        pass
+
+    def set_event_source(self, event_source):
+        pass
+
+    def set_persist_provider(self, provider):
+        self.persist_provider = provider
+
+
+def _mod_config(tmpdir, **kwargs):
+    config = {
+        "persist_path": str(tmpdir.join("persist")), "persist_provider": "disk",
+        "sqlite_path": str(tmpdir.join("persist.sqlite")), "run_id": None,
+        "fps": 3, "subscribe_universe_only": False, "record_path": None, "replay_path": None, "replay_speed": 0,
+        "bar_buffer_size": 240, "async_mode": False, "coalesce_bars": True, "lag_warning_threshold": None,
+    }
+    config.update(kwargs)
+    return RqAttrDict(config)
+
+
+def test_replay_does_not_persist(tmpdir, monkeypatch):
+    monkeypatch.setattr(realtime_mod, "DataSource", lambda *args: None)
+    monkeypatch.setattr(realtime_mod, "ReplayEventSource", lambda *args: None)
+    env = _Env(persist=True)
+    mod = realtime_mod.RealtimeTradeMod()
+    mod.start_up(env, _mod_config(tmpdir, replay_path=str(tmpdir.join("quotes"))))
+    assert env.persist_provider is None
+    assert not env.config.base.persist
+    assert not tmpdir.join("persist").exists()
+    mod.tear_down(0)
+
+
+def test_paper_trading_persists(tmpdir, monkeypatch):
+    monkeypatch.setattr(realtime_mod, "DataSource", lambda *args: None)
+    monkeypatch.setattr(realtime_mod, "RealtimeEventSource", lambda *args: None)
+    env = _Env(persist=False)
+    mod = realtime_mod.RealtimeTradeMod()
+    mod.start_up(env, _mod_config(tmpdir, persist_provider="sqlite"))
+    assert env.persist_provider is not None
+    assert env.config.base.persist
+    mod.tear_down(0)
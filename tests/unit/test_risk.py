@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import numpy as np
+import pytest
+
+from rqalpha.utils.risk import Risk, OnlineRisk, BatchRisk
+
+
+RISK_FREE_RATE = 0.03
+
+
+def _returns(seed, n):
+    rng = np.random.RandomState(seed)
+    return rng.normal(0.0005, 0.02, n), rng.normal(0.0003, 0.015, n)
+
+
+def _assert_same(expected, actual):
+    assert set(expected) == set(actual)
+    for key in expected:
+        np.testing.assert_allclose(actual[key], expected[key], rtol=1e-7, atol=1e-10, equal_nan=True,
+                                   err_msg=key)
+
+
+@pytest.mark.parametrize("n", [1, 2, 30, 250])
+def test_online_risk_matches_risk(n):
+    returns, benchmark = _returns(n, n)
+    online = OnlineRisk()
+    online.set_period(RISK_FREE_RATE, n + n // 2)
+    for r, b in zip(returns, benchmark):
+        online.update(r, b)
+    expected = Risk(returns, benchmark, RISK_FREE_RATE, n + n // 2).all()
+    _assert_same(expected, online.all())
+
+
+def test_online_risk_matches_risk_at_every_day():
+    returns, benchmark = _returns(0, 40)
+    online = OnlineRisk()
+    for i, (r, b) in enumerate(zip(returns, benchmark)):
+        online.update(r, b)
+        online.set_period(RISK_FREE_RATE, i + 1)
+        _assert_same(Risk(returns[:i + 1], benchmark[:i + 1], RISK_FREE_RATE, i + 1).all(), online.all())
+
+
+@pytest.mark.parametrize("n", [1, 2, 30, 250])
+def test_batch_risk_matches_risk(n):
+    series = [_returns(seed, n) for seed in range(5)]
+    returns = np.array([r for r, _ in series])
+    benchmark = np.array([b for _, b in series])
+    batch = BatchRisk(returns, benchmark, RISK_FREE_RATE, n + 7).all()
+    for i in range(len(series)):
+        expected = Risk(returns[i], benchmark[i], RISK_FREE_RATE, n + 7).all()
+        _assert_same(expected, {key: value[i] for key, value in batch.items()})
+
+
+def test_batch_risk_shared_benchmark():
+    returns = np.array([_returns(seed, 60)[0] for seed in range(3)])
+    benchmark = _returns(99, 60)[1]
+    batch = BatchRisk(returns, benchmark, RISK_FREE_RATE, 90).all()
+    for i in range(3):
+        expected = Risk(returns[i], benchmark, RISK_FREE_RATE, 90).all()
+        _assert_same(expected, {key: value[i] for key, value in batch.items()})
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import math
+import datetime
+
+import numpy as np
+import pytest
+
+from rqalpha.const import SIDE, POSITION_EFFECT
+from rqalpha.data.liquidity_stats import LiquidityStats
+from rqalpha.execution_context import ExecutionContext
+from rqalpha.model.order import Order, MarketOrder
+from rqalpha.model.slippage import (init_slippage, PriceRatioSlippage, SquareRootImpactSlippage,
+                                    SpreadVolatilitySlippage)
+
+BAR_DTYPE = np.dtype([('datetime', np.uint64), ('close', np.float64), ('volume', np.float64)])
+CLOSES = [10., 11., 9.9, 10.89, 10.]
+VOLUMES = [1000., 2000., 3000., 4000., 5000.]
+
+
+class _DataProxy(object):
+    def __init__(self, closes=CLOSES, volumes=VOLUMES):
+        self.bars = np.array([(20170301000000 + 1000000 * i, close, volume)
+                              for i, (close, volume) in enumerate(zip(closes, volumes))], dtype=BAR_DTYPE)
+        self.calls = 0
+
+    def history_bars(self, order_book_id, bar_count, frequency, fields, dt, skip_suspended=True):
+        self.calls += 1
+        return self.bars
+
+
+@pytest.fixture(autouse=True)
+def context():
+    ExecutionContext.data_proxy = _DataProxy()
+    ExecutionContext.trading_dt = datetime.datetime(2017, 3, 5, 9, 31)
+    yield
+    ExecutionContext.data_proxy = None
+    ExecutionContext.trading_dt = None
+
+
+def _order(quantity, side=SIDE.BUY):
+    dt = ExecutionContext.trading_dt
+    return Order.__from_create__(dt, dt, "000001.XSHE", quantity, side, MarketOrder(), POSITION_EFFECT.OPEN)
+
+
+def _volatility(closes):
+    returns = np.log(np.array(closes[1:]) / np.array(closes[:-1]))
+    return np.sqrt(np.mean(returns ** 2) - np.mean(returns) ** 2)
+
+
+def test_liquidity_stats_use_previous_days_only():
+    stats = LiquidityStats(ExecutionContext.data_proxy, window=3)
+    # 2017-03-05 之前的 3 个交易日为第 2~4 天(下标 1~3), 收益率为这 3 天各自相对前一天的对数收益率
+    adv, volatility = stats.get("000001.XSHE", datetime.datetime(2017, 3, 5))
+    assert adv == pytest.approx(3000.)
+    assert volatility == pytest.approx(_volatility(CLOSES[0:4]))
+    # 第一天之前没有数据
+    adv, volatility = stats.get("000001.XSHE", datetime.datetime(2017, 3, 1))
+    assert np.isnan(adv) and np.isnan(volatility)
+    # 只有一个收益率时波动率不足以计算
+    adv, volatility = stats.get("000001.XSHE", datetime.datetime(2017, 3, 3))
+    assert adv == pytest.approx(1500.) and np.isnan(volatility)
+    assert ExecutionContext.data_proxy.calls == 1
+
+
+def test_sqrt_impact():
+    slippage = SquareRootImpactSlippage(coefficient=0.5, window=3)
+    volatility = _volatility(CLOSES[0:4])
+    rate = 0.5 * volatility * math.sqrt(750. / 3000.)
+    assert slippage.get_trade_price(_order(750), 10.) == pytest.approx(10. * (1 + rate))
+    assert slippage.get_trade_price(_order(750, SIDE.SELL), 10.) == pytest.approx(10. * (1 - rate))
+
+
+def test_impact_is_capped():
+    slippage = SquareRootImpactSlippage(coefficient=100., window=3, max_rate=0.02)
+    assert slippage.get_trade_price(_order(3000), 10.) == pytest.approx(10.2)
+
+
+def test_spread_volatility():
+    slippage = SpreadVolatilitySlippage(spread=0.002, volatility_coefficient=0.2, window=3)
+    rate = 0.001 + 0.2 * _volatility(CLOSES[0:4])
+    assert slippage.get_trade_price(_order(100), 10.) == pytest.approx(10. * (1 + rate))
+    assert slippage.get_trade_price(_order(100, SIDE.SELL), 10.) == pytest.approx(10. * (1 - rate))
+
+
+def test_insufficient_history():
+    # 只有一天数据: ADV 可算, 波动率为 nan
+    ExecutionContext.data_proxy = _DataProxy(CLOSES[:1], VOLUMES[:1])
+    assert SquareRootImpactSlippage(window=3).get_trade_price(_order(100), 10.) == 10.
+    # 价差加波动率模型只计算价差部分
+    assert SpreadVolatilitySlippage(spread=0.002, window=3).get_trade_price(_order(100), 10.) == \
+        pytest.approx(10.01)
+
+    # 没有日线时 ADV 也为 nan
+    ExecutionContext.data_proxy = _DataProxy([], [])
+    assert SquareRootImpactSlippage().get_trade_price(_order(100), 10.) == 10.
+    assert SpreadVolatilitySlippage(spread=0.002).get_trade_price(_order(100), 10.) == pytest.approx(10.01)
+
+
+def test_init_slippage():
+    assert isinstance(init_slippage(0.01), PriceRatioSlippage)
+    assert init_slippage(0.01, 'price_ratio').rate == 0.01
+    slippage = init_slippage(0, 'sqrt_impact', {'coefficient': 2., 'window': 10})
+    assert isinstance(slippage, SquareRootImpactSlippage)
+    assert slippage.coefficient == 2. and slippage._window == 10
+    slippage = init_slippage(0, 'spread_volatility', None)
+    assert isinstance(slippage, SpreadVolatilitySlippage) and slippage.spread == 0.001
+    with pytest.raises(ValueError):
+        init_slippage(0, 'unknown')
+    with pytest.raises(ValueError):
+        init_slippage(1.5)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import sqlite3
+
+import pytest
+
+from rqalpha.utils.sqlite_persist_provider import SQLitePersistProvider
+
+
+def _keys(path, run_id):
+    conn = sqlite3.connect(path)
+    try:
+        return {k: bytes(v) for k, v in conn.execute(
+            "SELECT key, value FROM persist WHERE run_id = ?", (run_id, ))}
+    finally:
+        conn.close()
+
+
+def test_batch_is_committed_in_one_transaction(tmpdir):
+    path = str(tmpdir.join("persist.db"))
+    provider = SQLitePersistProvider(path, "run")
+    provider.begin_batch()
+    provider.store("a", b"1")
+    provider.store("b", b"2")
+    # 提交前其他连接看不到这一批中的任何写入
+    assert _keys(path, "run") == {}
+    provider.commit_batch()
+    assert _keys(path, "run") == {"a": b"1", "b": b"2"}
+    provider.close()
+
+
+def test_run_ids_are_isolated(tmpdir):
+    path = str(tmpdir.join("persist.db"))
+    first = SQLitePersistProvider(path, "first")
+    first.store("a", b"1")
+    first.close()
+    second = SQLitePersistProvider(path, "second")
+    second.store("a", b"2")
+    assert second.load("a") == b"2"
+    second.close()
+
+    first = SQLitePersistProvider(path, "first")
+    assert first.load("a") == b"1"
+    assert first.load("b") is None
+    first.close()
+
+
+def test_delete(tmpdir):
+    path = str(tmpdir.join("persist.db"))
+    provider = SQLitePersistProvider(path, "run")
+    provider.store("a", b"1")
+    provider.store("b", b"2")
+    assert provider.load("a") == b"1"
+    provider.delete("a")
+    assert provider.load("a") is None
+    provider.close()
+
+    provider = SQLitePersistProvider(path, "run")
+    assert provider.load("a") is None
+    assert provider.load("b") == b"2"
+    provider.close()
+
+
+def test_close_rolls_back_open_batch(tmpdir):
+    path = str(tmpdir.join("persist.db"))
+    provider = SQLitePersistProvider(path, "run")
+    provider.store("a", b"1")
+    provider.begin_batch()
+    provider.store("a", b"2")
+    provider.store("b", b"2")
+    provider.close()
+
+    provider = SQLitePersistProvider(path, "run")
+    assert provider.load("a") == b"1"
+    assert provider.load("b") is None
+    provider.close()
+
+
+def test_abort_batch_rolls_back_and_allows_new_batch(tmpdir):
+    path = str(tmpdir.join("persist.db"))
+    provider = SQLitePersistProvider(path, "run")
+    provider.store("a", b"1")
+    provider.begin_batch()
+    provider.store("a", b"2")
+    provider.delete("a")
+    provider.store("b", b"2")
+    # 提交前的写入不影响 load
+    assert provider.load("a") == b"1"
+    assert provider.load("b") is None
+    provider.abort_batch()
+    assert provider.load("a") == b"1"
+    assert provider.load("b") is None
+
+    provider.begin_batch()
+    provider.store("b", b"3")
+    provider.commit_batch()
+    assert provider.load("b") == b"3"
+    provider.close()
+    assert _keys(path, "run") == {"a": b"1", "b": b"3"}
+
+
+def test_locked_database(tmpdir):
+    path = str(tmpdir.join("persist.db"))
+    provider = SQLitePersistProvider(path, "run", timeout=0.01)
+    provider.store("a", b"1")
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    provider.begin_batch()
+    with pytest.raises(sqlite3.OperationalError):
+        provider.store("a", b"2")
+    provider.abort_batch()
+    other.execute("ROLLBACK")
+    other.close()
+
+    # 锁释放后可以重新写入
+    provider.begin_batch()
+    provider.store("a", b"3")
+    provider.commit_batch()
+    assert provider.load("a") == b"3"
+    provider.close()
+    assert _keys(path, "run") == {"a": b"3"}
+
+
+def test_async_writer_recovers_from_locked_database(tmpdir):
+    from rqalpha.utils.async_persist_provider import AsyncPersistProvider
+
+    path = str(tmpdir.join("persist.db"))
+    inner = SQLitePersistProvider(path, "run", timeout=0.01)
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    provider = AsyncPersistProvider(inner)
+    provider.store("a", b"1")
+    with pytest.raises(RuntimeError):
+        provider.flush()
+    other.execute("ROLLBACK")
+    other.close()
+
+    provider.store("b", b"2")
+    provider.flush()
+    provider.close()
+    inner.close()
+    assert _keys(path, "run") == {"a": b"1", "b": b"2"}
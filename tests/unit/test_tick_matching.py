@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import datetime
+
+import numpy as np
+import pytest
+
+from rqalpha.const import SIDE, POSITION_EFFECT, ORDER_STATUS, MATCHING_TYPE, ACCOUNT_TYPE
+from rqalpha.data.tick_store import TICK_DTYPE
+from rqalpha.environment import Environment
+from rqalpha.events import EVENT, Event
+from rqalpha.execution_context import ExecutionContext
+from rqalpha.mod.simulation.matcher import TickMatcher
+from rqalpha.mod.simulation.simulation_broker import SimulationBroker
+from rqalpha.mod.simulation.simulation_event_source import SimulationEventSource
+from rqalpha.model.order import Order, MarketOrder, LimitOrder
+from rqalpha.model.tick import Tick
+from rqalpha.utils import RqAttrDict
+from rqalpha.utils.datetime_func import convert_dt_to_int
+
+DATE = datetime.date(2017, 3, 1)
+DT = datetime.datetime(2017, 3, 1, 9, 30, 3)
+
+
+class _Instrument(object):
+    round_lot = 100
+    listed_date = None
+    de_listed_date = None
+
+    def __init__(self, order_book_id):
+        self.order_book_id = order_book_id
+
+
+class _Universe(object):
+    def __init__(self, order_book_ids):
+        self.order_book_ids = set(order_book_ids)
+
+    def get(self):
+        return self.order_book_ids
+
+    def update(self, order_book_ids):
+        self.order_book_ids = set(order_book_ids)
+
+
+class _DataProxy(object):
+    def __init__(self, ticks=None):
+        self.ticks = ticks or {}
+
+    def instruments(self, order_book_id):
+        return _Instrument(order_book_id)
+
+    def get_ticks(self, instrument, trading_date):
+        return self.ticks.get(instrument.order_book_id, np.empty(0, dtype=TICK_DTYPE))
+
+    def get_trading_dates(self, start_date, end_date):
+        import pandas as pd
+        return pd.DatetimeIndex([DATE])
+
+
+class _Position(object):
+    def _cal_close_today_amount(self, fill, side):
+        return 0
+
+
+class _Decider(object):
+    def get_trade_price(self, order, price):
+        return price
+
+    def get_commission(self, trade):
+        return 0.
+
+    def get_tax(self, trade):
+        return 0.
+
+    def release(self, orders):
+        pass
+
+
+class _Account(object):
+    def __init__(self):
+        self.portfolio = RqAttrDict({})
+        self.portfolio.positions = {}
+        self.slippage_decider = self.commission_decider = self.tax_decider = _Decider()
+        self.trades = []
+
+
+def _config(matching_type=MATCHING_TYPE.CURRENT_BAR_CLOSE):
+    return RqAttrDict({
+        "base": {"frequency": "tick", "matching_type": matching_type, "volume_percent": 0.25},
+        "validator": {"bar_limit": True},
+    })
+
+
+@pytest.fixture(autouse=True)
+def env():
+    env = Environment(_config())
+    env.set_data_proxy(_DataProxy())
+    env._universe = _Universe([])
+    env.calendar_dt = env.trading_dt = DT
+    ExecutionContext.data_proxy = env.data_proxy
+    yield env
+    ExecutionContext.data_proxy = None
+    Environment._env = None
+
+
+def _tick_array(rows):
+    """
+    :param rows: [(datetime, last, volume, bid, bid_volume, ask, ask_volume)]
+    """
+    ticks = np.zeros(len(rows), dtype=TICK_DTYPE)
+    for i, (dt, last, volume, bid, bid_volume, ask, ask_volume) in enumerate(rows):
+        ticks[i]['datetime'] = dt
+        ticks[i]['last'] = last
+        ticks[i]['volume'] = volume
+        ticks[i]['bid'], ticks[i]['bid_volume'] = bid, bid_volume
+        ticks[i]['ask'], ticks[i]['ask_volume'] = ask, ask_volume
+        ticks[i]['limit_up'], ticks[i]['limit_down'] = 11., 9.
+    return ticks
+
+
+def _tick(last=10., volume=100000, bid=9.99, bid_volume=100000, ask=10.01, ask_volume=100000,
+          order_book_id="000001.XSHE"):
+    snapshot = _tick_array([(convert_dt_to_int(DT), last, volume, bid, bid_volume, ask, ask_volume)])[0]
+    return Tick(order_book_id, DT, snapshot)
+
+
+def _order(quantity, side, style=None, order_book_id="000001.XSHE"):
+    order = Order.__from_create__(DT, DT, order_book_id, quantity, side, style or MarketOrder(),
+                                  POSITION_EFFECT.OPEN)
+    order._active()
+    return order
+
+
+def _match(matcher, account, orders, tick):
+    for order in orders:
+        account.portfolio.positions.setdefault(order.order_book_id, _Position())
+    matcher.update(DT, DT, tick)
+    matcher.match([(account, order) for order in orders])
+
+
+@pytest.fixture
+def trades(env):
+    trades = []
+    env.event_bus.add_listener(EVENT.TRADE, lambda account, trade: trades.append(trade))
+    return trades
+
+
+def test_buy_at_ask_and_sell_at_bid(trades):
+    matcher, account = TickMatcher(), _Account()
+    buy, sell = _order(1000, SIDE.BUY), _order(500, SIDE.SELL)
+    _match(matcher, account, [buy, sell], _tick())
+    assert [(t.last_price, t.last_quantity) for t in trades] == [(10.01, 1000), (9.99, 500)]
+    assert buy.status == sell.status == ORDER_STATUS.FILLED
+
+
+def test_last_price_without_order_book(trades):
+    matcher, account = TickMatcher(), _Account()
+    _match(matcher, account, [_order(100, SIDE.BUY), _order(100, SIDE.SELL)],
+           _tick(bid=0, bid_volume=0, ask=0, ask_volume=0))
+    assert [t.last_price for t in trades] == [10., 10.]
+
+
+def test_limit_order_fills_only_on_cross(trades):
+    matcher, account = TickMatcher(), _Account()
+    buy = _order(100, SIDE.BUY, LimitOrder(10.))
+    sell = _order(100, SIDE.SELL, LimitOrder(10.))
+    _match(matcher, account, [buy, sell], _tick(bid=9.99, ask=10.01))
+    assert trades == []
+    assert buy.status == sell.status == ORDER_STATUS.ACTIVE
+
+    _match(matcher, account, [buy], _tick(volume=200000, bid=9.98, ask=10.))
+    _match(matcher, account, [sell], _tick(volume=300000, bid=10.02, ask=10.03))
+    # 按对手价成交, 而不是限价
+    assert [(t.order, t.last_price) for t in trades] == [(buy, 10.), (sell, 10.02)]
+
+
+def test_limit_price_outside_limits_is_rejected(trades):
+    matcher, account = TickMatcher(), _Account()
+    buy = _order(100, SIDE.BUY, LimitOrder(11.5))
+    sell = _order(100, SIDE.SELL, LimitOrder(8.5))
+    _match(matcher, account, [buy, sell], _tick())
+    assert buy.status == sell.status == ORDER_STATUS.REJECTED
+    assert trades == []
+
+
+def test_market_order_at_limit_up_is_rejected(trades):
+    matcher, account = TickMatcher(), _Account()
+    buy, sell = _order(100, SIDE.BUY), _order(100, SIDE.SELL)
+    _match(matcher, account, [buy, sell], _tick(last=11., bid=11., ask=0, ask_volume=0))
+    assert buy.status == ORDER_STATUS.REJECTED
+    assert [(t.order, t.last_price) for t in trades] == [(sell, 11.)]
+
+
+def test_volume_cap_per_tick(trades):
+    matcher, account = TickMatcher(), _Account()
+    first, second = _order(3000, SIDE.BUY), _order(500, SIDE.BUY)
+    # 成交量增量 4050 的 25% 按整手取整为 1000, 同一笔 tick 内的委托单共用该额度
+    _match(matcher, account, [first, second], _tick(volume=4050))
+    assert [t.last_quantity for t in trades] == [1000]
+    assert second.filled_quantity == 0
+
+    # 下一笔 tick 只按相对上一笔的成交量增量计算
+    _match(matcher, account, [first, second], _tick(volume=8050))
+    assert [t.last_quantity for t in trades] == [1000, 1000]
+
+    # 累计成交量没有变化时不成交, 市价单不撤单
+    _match(matcher, account, [first, second], _tick(volume=8050))
+    assert len(trades) == 2
+    assert first.status == second.status == ORDER_STATUS.ACTIVE
+
+
+def test_volume_cap_by_level_one_size(trades):
+    matcher, account = TickMatcher(), _Account()
+    buy, sell = _order(3000, SIDE.BUY), _order(3000, SIDE.SELL)
+    _match(matcher, account, [buy, sell], _tick(volume=100000, ask_volume=350, bid_volume=1250))
+    assert [(t.order, t.last_quantity) for t in trades] == [(buy, 300), (sell, 1200)]
+
+
+def test_reset_clears_last_tick(trades):
+    matcher, account = TickMatcher(), _Account()
+    _match(matcher, account, [], _tick(volume=100000))
+    matcher.reset()
+    # 新交易日的第一笔 tick 以当日累计成交量计算
+    buy = _order(100, SIDE.BUY)
+    _match(matcher, account, [buy], _tick(volume=400))
+    assert [t.last_quantity for t in trades] == [100]
+
+    order = _order(100, SIDE.BUY, order_book_id="600000.XSHG")
+    # 还没有收到该标的的 tick 时等待
+    matcher.match([(account, order)])
+    assert order.status == ORDER_STATUS.ACTIVE
+
+
+def test_broker_tick_matches_only_that_instrument(env, trades):
+    broker = SimulationBroker(env)
+    account = _Account()
+    account.portfolio.positions.update({"000001.XSHE": _Position(), "600000.XSHG": _Position()})
+    orders = [_order(100, SIDE.BUY), _order(100, SIDE.BUY, order_book_id="600000.XSHG")]
+    broker._open_orders = [(account, order) for order in orders]
+
+    broker.tick(_tick(order_book_id="600000.XSHG"))
+    # 000001.XSHE 的委托单没有参与撮合, 只有 600000.XSHG 的委托单成交并移出队列
+    assert [t.order for t in trades] == [orders[1]]
+    assert broker.get_open_orders() == [(account, orders[0])]
+
+    broker.tick(_tick(order_book_id="000001.XSHE"))
+    assert [t.order for t in trades] == orders[::-1]
+    assert broker.get_open_orders() == []
+
+
+def _dt(hms):
+    return 20170301000000 + hms
+
+
+def _event_ticks(events):
+    return [(e.calendar_dt, e.data['tick'].order_book_id, e.data['tick'].last) for e in events if e.event_type == EVENT.TICK]
+
+
+def test_ticks_are_merged_in_time_order(env):
+    env.data_proxy.ticks = {
+        "000001.XSHE": _tick_array([(_dt(93003), 1, 0, 0, 0, 0, 0), (_dt(93006), 2, 0, 0, 0, 0, 0),
+                                    (_dt(93009), 3, 0, 0, 0, 0, 0)]),
+        "600000.XSHG": _tick_array([(_dt(93003), 11, 0, 0, 0, 0, 0), (_dt(93004), 12, 0, 0, 0, 0, 0)]),
+    }
+    env._universe = _Universe(["000001.XSHE", "600000.XSHG"])
+    source = SimulationEventSource(env, [ACCOUNT_TYPE.STOCK])
+    events = list(source.events(DATE, DATE, "tick"))
+    assert [e.event_type for e in events] == [EVENT.BEFORE_TRADING] + [EVENT.TICK] * 5 + \
+        [EVENT.AFTER_TRADING, EVENT.SETTLEMENT]
+    ticks = _event_ticks(events)
+    # 按时间归并; 同一时刻的 tick 的先后顺序取决于股票池的遍历顺序
+    assert [last for _, _, last in ticks][2:] == [12, 2, 3]
+    assert sorted(last for _, _, last in ticks[:2]) == [1, 11]
+    assert [dt for dt, _, _ in ticks] == sorted(dt for dt, _, _ in ticks)
+    assert all(obid == ("000001.XSHE" if last < 10 else "600000.XSHG") for _, obid, last in ticks)
+    assert events[0].calendar_dt == datetime.datetime(2017, 3, 1, 9, 0, 3)
+
+
+def test_universe_change_during_the_day(env):
+    env.data_proxy.ticks = {
+        "000001.XSHE": _tick_array([(_dt(93003), 1, 0, 0, 0, 0, 0), (_dt(93006), 2, 0, 0, 0, 0, 0),
+                                    (_dt(93009), 3, 0, 0, 0, 0, 0)]),
+        "600000.XSHG": _tick_array([(_dt(93003), 11, 0, 0, 0, 0, 0), (_dt(93007), 12, 0, 0, 0, 0, 0),
+                                    (_dt(93010), 13, 0, 0, 0, 0, 0)]),
+    }
+    env._universe = _Universe(["000001.XSHE"])
+    source = SimulationEventSource(env, [ACCOUNT_TYPE.STOCK])
+    seen = []
+    for event in source.events(DATE, DATE, "tick"):
+        if event.event_type != EVENT.TICK:
+            continue
+        seen.append(event.data['tick'].last)
+        if event.data['tick'].last == 1:
+            # 订阅 600000.XSHG: 只并入之后的 tick
+            env.update_universe(["000001.XSHE", "600000.XSHG"])
+        elif event.data['tick'].last == 12:
+            # 取消订阅 000001.XSHE: 剩余的 tick 被剔除
+            env.update_universe(["600000.XSHG"])
+    assert seen == [1, 2, 12, 13]
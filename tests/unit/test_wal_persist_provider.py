@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import os
+
+from rqalpha.utils.wal_persist_provider import WALPersistProvider, LOG_FILE, SNAPSHOT_FILE
+
+
+def _reopen(path, provider, **kwargs):
+    provider.close()
+    return WALPersistProvider(path, **kwargs)
+
+
+def test_store_and_replay(tmpdir):
+    path = str(tmpdir)
+    provider = WALPersistProvider(path)
+    provider.store("a", b"1")
+    provider.store("a", b"2")
+    provider.store("b", b"3")
+    provider = _reopen(path, provider)
+    assert provider.load("a") == b"2"
+    assert provider.load("b") == b"3"
+    assert provider.load("c") is None
+    provider.close()
+
+
+def test_torn_tail_is_dropped(tmpdir):
+    path = str(tmpdir)
+    provider = WALPersistProvider(path)
+    provider.begin_batch()
+    provider.store("a", b"1")
+    provider.store("b", b"1")
+    provider.commit_batch()
+    provider.begin_batch()
+    provider.store("a", b"2")
+    provider.store("b", b"2")
+    provider.commit_batch()
+    provider.close()
+
+    # 模拟写最后一批时崩溃: 截掉最后几个字节
+    log_file = os.path.join(path, LOG_FILE)
+    size = os.path.getsize(log_file)
+    with open(log_file, "r+b") as f:
+        f.truncate(size - 3)
+
+    provider = WALPersistProvider(path)
+    # 最后一批整批丢弃, 不会只恢复出其中一部分
+    assert provider.load("a") == b"1"
+    assert provider.load("b") == b"1"
+
+    # 截断后的日志可以继续追加
+    provider.store("a", b"3")
+    provider = _reopen(path, provider)
+    assert provider.load("a") == b"3"
+    assert provider.load("b") == b"1"
+    provider.close()
+
+
+def test_corrupted_batch_is_dropped(tmpdir):
+    path = str(tmpdir)
+    provider = WALPersistProvider(path)
+    provider.store("a", b"1")
+    provider.store("a", b"2")
+    provider.close()
+
+    log_file = os.path.join(path, LOG_FILE)
+    with open(log_file, "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        f.write(b"x")
+
+    provider = WALPersistProvider(path)
+    assert provider.load("a") == b"1"
+    provider.close()
+
+
+def test_compaction(tmpdir):
+    path = str(tmpdir)
+    provider = WALPersistProvider(path, compact_size=64)
+    for i in range(20):
+        provider.store("a", str(i).encode())
+    provider.store("b", b"x")
+    provider.delete("b")
+
+    # 日志超过 compact_size 后合并为快照, 日志随之清空
+    assert os.path.exists(os.path.join(path, SNAPSHOT_FILE))
+    assert os.path.getsize(os.path.join(path, LOG_FILE)) < 64
+
+    provider = _reopen(path, provider, compact_size=64)
+    assert provider.load("a") == b"19"
+    assert provider.load("b") is None
+    provider.close()
+
+
+def test_crash_after_snapshot_replace(tmpdir):
+    # 快照替换后、清空日志前崩溃: 日志中的记录都不比快照新, 重放后结果不变
+    path = str(tmpdir)
+    provider = WALPersistProvider(path)
+    provider.store("a", b"1")
+    provider.store("a", b"2")
+    log_file = os.path.join(path, LOG_FILE)
+    with open(log_file, "rb") as f:
+        log = f.read()
+    provider.compact()
+    provider.close()
+    with open(log_file, "wb") as f:
+        f.write(log)
+
+    provider = WALPersistProvider(path)
+    assert provider.load("a") == b"2"
+    provider.close()
+
+
+def test_delete_survives_replay(tmpdir):
+    path = str(tmpdir)
+    provider = WALPersistProvider(path)
+    provider.store("a", b"1")
+    provider.delete("a")
+    provider.delete("missing")
+    provider = _reopen(path, provider)
+    assert provider.load("a") is None
+    provider.close()
+
+
+def test_batch_is_staged_until_commit(tmpdir):
+    path = str(tmpdir)
+    provider = WALPersistProvider(path)
+    provider.store("a", b"1")
+    provider.begin_batch()
+    provider.store("a", b"2")
+    provider.store("b", b"2")
+    provider.delete("a")
+    # 提交前的写入不可见, 合并快照也不会带上它们
+    assert provider.load("a") == b"1"
+    assert provider.load("b") is None
+    provider.compact()
+    provider.abort_batch()
+    assert provider.load("a") == b"1"
+    assert provider.load("b") is None
+    provider = _reopen(path, provider)
+    assert provider.load("a") == b"1"
+    assert provider.load("b") is None
+
+    provider.begin_batch()
+    provider.store("b", b"3")
+    provider.delete("a")
+    provider.commit_batch()
+    assert provider.load("a") is None
+    assert provider.load("b") == b"3"
+    provider = _reopen(path, provider)
+    assert provider.load("a") is None
+    assert provider.load("b") == b"3"
+    provider.close()
+
+
+def test_commit_that_triggers_compaction(tmpdir):
+    path = str(tmpdir)
+    provider = WALPersistProvider(path, compact_size=0)
+    provider.begin_batch()
+    provider.store("a", b"1")
+    provider.commit_batch()
+    assert os.path.getsize(os.path.join(path, LOG_FILE)) == 0
+    provider = _reopen(path, provider)
+    assert provider.load("a") == b"1"
+    provider.close()